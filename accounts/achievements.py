@@ -0,0 +1,216 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
+
+from bizventure_kids.db import write_atomic
+
+from .fragments import bump_generation
+from .models import Achievement, DailyStreak, Profile, UserAchievement, UserStats
+
+LESSON_COMPLETED = "lesson_completed"
+QUIZ_PASSED = "quiz_passed"
+SCENARIO_COMPLETED = "scenario_completed"
+STREAK_UPDATED = "streak_updated"
+POINTS_CHANGED = "points_changed"
+
+# Achievement types each event can unlock
+EVENT_RULES = {
+    LESSON_COMPLETED: ["lesson"],
+    QUIZ_PASSED: ["quiz"],
+    SCENARIO_COMPLETED: ["scenario"],
+    STREAK_UPDATED: ["streak"],
+    POINTS_CHANGED: ["points"],
+}
+
+ACTIVE_ACHIEVEMENTS_CACHE_KEY = "achievements:active"
+
+
+def threshold_for(achievement_type, points_required):
+    """Counter value needed to earn an achievement.
+
+    ``points_required`` is the number of lessons/scenarios/streak days or
+    points, or the quiz percentage for 'quiz' rules (100 when unset).
+    """
+    if achievement_type == "quiz":
+        return points_required or 100
+    return max(points_required, 1)
+
+
+def get_active_rules():
+    """Active achievements grouped by type, cached until one is changed.
+
+    The entry also expires after CONTENT_CACHE_TIMEOUT, which bounds how
+    long a process keeps old rules after a change it wasn't told about,
+    such as a bulk update in a migration.
+    """
+    rules = cache.get(ACTIVE_ACHIEVEMENTS_CACHE_KEY)
+    if rules is None:
+        rules = {}
+        achievements = Achievement.objects.filter(is_active=True).values(
+            "id",
+            "achievement_type",
+            "points_required",
+            "points_reward",
+            "coins_reward",
+        )
+        for achievement in achievements:
+            achievement["threshold"] = threshold_for(
+                achievement["achievement_type"], achievement["points_required"]
+            )
+            rules.setdefault(achievement["achievement_type"], []).append(achievement)
+        cache.set(ACTIVE_ACHIEVEMENTS_CACHE_KEY, rules, settings.CONTENT_CACHE_TIMEOUT)
+    return rules
+
+
+def invalidate_rules():
+    cache.delete(ACTIVE_ACHIEVEMENTS_CACHE_KEY)
+
+
+def get_counter(user, achievement_type, context):
+    """Current value of the counter a rule type is evaluated against"""
+    if achievement_type == "lesson":
+        stats = UserStats.objects.filter(user=user).first()
+        return stats.completed_lessons if stats else 0
+    if achievement_type == "scenario":
+        stats = UserStats.objects.filter(user=user).first()
+        return stats.completed_scenarios if stats else 0
+    if achievement_type == "streak":
+        streak = DailyStreak.objects.filter(user=user).first()
+        return streak.current_streak if streak else 0
+    if achievement_type == "points":
+        return (
+            Profile.objects.filter(user=user)
+            .values_list("total_points", flat=True)
+            .first()
+            or 0
+        )
+    if achievement_type == "quiz":
+        return context.get("percentage", 0)
+    return 0
+
+
+def dispatch(user, event, **context):
+    """Evaluate the achievement rules relevant to ``event`` for one user.
+
+    Newly earned achievements are inserted with a single
+    bulk_create(ignore_conflicts=True) and their rewards go through the
+    points ledger. Returns the ids of achievements that were newly earned.
+    """
+    from .rewards import award
+
+    rules = get_active_rules()
+    candidates = []
+    for achievement_type in EVENT_RULES.get(event, []):
+        type_rules = rules.get(achievement_type)
+        if not type_rules:
+            continue
+        counter = get_counter(user, achievement_type, context)
+        candidates.extend(rule for rule in type_rules if counter >= rule["threshold"])
+
+    if not candidates:
+        return []
+
+    earned_ids = set(
+        UserAchievement.objects.filter(
+            user=user, achievement_id__in=[rule["id"] for rule in candidates]
+        ).values_list("achievement_id", flat=True)
+    )
+    new_rules = [rule for rule in candidates if rule["id"] not in earned_ids]
+    if not new_rules:
+        return []
+
+    UserAchievement.objects.bulk_create(
+        [UserAchievement(user=user, achievement_id=rule["id"]) for rule in new_rules],
+        ignore_conflicts=True,
+    )
+    # The ledger key makes each reward apply once even if two requests
+    # raced through the check above.
+    for rule in new_rules:
+        award(
+            user,
+            "achievement",
+            rule["id"],
+            points=rule["points_reward"],
+            coins=rule["coins_reward"],
+        )
+    return [rule["id"] for rule in new_rules]
+
+
+def qualifying_user_ids(achievement):
+    """Queryset of ids of users who meet an achievement's rule but lack it.
+
+    Evaluated as one set-based query against the same counters dispatch()
+    uses. 'special' achievements have no rule and return None.
+    """
+    threshold = threshold_for(achievement.achievement_type, achievement.points_required)
+    if achievement.achievement_type == "lesson":
+        queryset = UserStats.objects.filter(completed_lessons__gte=threshold)
+    elif achievement.achievement_type == "scenario":
+        queryset = UserStats.objects.filter(completed_scenarios__gte=threshold)
+    elif achievement.achievement_type == "streak":
+        queryset = DailyStreak.objects.filter(current_streak__gte=threshold)
+    elif achievement.achievement_type == "points":
+        queryset = Profile.objects.filter(total_points__gte=threshold)
+    elif achievement.achievement_type == "quiz":
+        from lessons.models import UserQuizAttempt
+
+        queryset = UserQuizAttempt.objects.filter(percentage__gte=threshold)
+    else:
+        return None
+
+    already_earned = UserAchievement.objects.filter(
+        achievement=achievement, user_id=OuterRef("user_id")
+    )
+    return (
+        queryset.filter(~Exists(already_earned))
+        .values_list("user_id", flat=True)
+        .order_by("user_id")
+        .distinct()
+    )
+
+
+def backfill(achievement, batch_size=1000, apply_rewards=True):
+    """Award an achievement to every qualifying user who doesn't have it.
+
+    Inserts UserAchievement rows (and, with ``apply_rewards``, ledger rows
+    plus one F() UPDATE of the profiles) in chunks of ``batch_size`` users.
+    Rows another process inserted first are skipped and not counted.
+    Returns the number of users newly awarded.
+    """
+    from .rewards import apply_rewards_in_bulk
+
+    user_ids = qualifying_user_ids(achievement)
+    if user_ids is None:
+        return 0
+    user_ids = list(user_ids)
+
+    awarded = 0
+    for start in range(0, len(user_ids), batch_size):
+        chunk = user_ids[start : start + batch_size]
+        with write_atomic():
+            earned = UserAchievement.objects.filter(
+                achievement=achievement, user_id__in=chunk
+            ).values_list("user_id", flat=True).order_by()
+            existing = set(earned)
+            UserAchievement.objects.bulk_create(
+                [
+                    UserAchievement(user_id=user_id, achievement=achievement)
+                    for user_id in chunk
+                    if user_id not in existing
+                ],
+                ignore_conflicts=True,
+            )
+            new = sorted(set(earned.all()) - existing)
+            if not new:
+                continue
+            bump_generation(*new)
+            if apply_rewards:
+                apply_rewards_in_bulk(
+                    new,
+                    "achievement",
+                    achievement.id,
+                    achievement.points_reward,
+                    achievement.coins_reward,
+                )
+        awarded += len(new)
+    return awarded
@@ -1,12 +1,17 @@
 from django.contrib import admin
-from .models import Profile, ParentProfile, Achievement, UserAchievement, DailyStreak
+from .models import (
+    Profile, ParentProfile, PointsTransaction, Achievement, UserAchievement,
+    UserStats, DailyStreak
+)
+from .rewards import award
 
 @admin.register(Profile)
 class ProfileAdmin(admin.ModelAdmin):
     list_display = ['user', 'age', 'gender', 'level', 'total_points', 'coins', 'created_at']
     list_filter = ['level', 'gender', 'created_at']
     search_fields = ['user__username', 'user__email', 'parent_name']
-    readonly_fields = ['created_at', 'updated_at', 'level']
+    # Balances only change through the points ledger
+    readonly_fields = ['created_at', 'updated_at', 'total_points', 'level', 'coins']
     
     fieldsets = (
         ('User Info', {
@@ -30,6 +35,34 @@ class ProfileAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(PointsTransaction)
+class PointsTransactionAdmin(admin.ModelAdmin):
+    list_display = ['user', 'source', 'source_key', 'points', 'coins', 'created_at']
+    list_filter = ['source', 'created_at']
+    search_fields = ['user__username', 'source_key']
+    raw_id_fields = ['user']
+    readonly_fields = ['created_at']
+    
+    def save_model(self, request, obj, form, change):
+        # New entries (manual adjustments) are applied to the profile too
+        entry = award(obj.user, obj.source, obj.source_key, obj.points, obj.coins)
+        if entry is None:
+            # Recorded concurrently since the form was validated
+            entry = PointsTransaction.objects.get(
+                user=obj.user, source=obj.source, source_key=obj.source_key
+            )
+        # The admin redirects to and logs the row award() created
+        obj.pk = entry.pk
+        obj.source_key = entry.source_key
+        obj.created_at = entry.created_at
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(ParentProfile)
 class ParentProfileAdmin(admin.ModelAdmin):
     list_display = ['user', 'phone', 'occupation', 'report_frequency', 'created_at']
@@ -59,4 +92,10 @@ class DailyStreakAdmin(admin.ModelAdmin):
     list_display = ['user', 'current_streak', 'longest_streak', 'last_activity_date']
     list_filter = ['last_activity_date']
     search_fields = ['user__username']
-    readonly_fields = ['last_activity_date']
\ No newline at end of file
+    readonly_fields = ['last_activity_date']
+
+@admin.register(UserStats)
+class UserStatsAdmin(admin.ModelAdmin):
+    list_display = ['user', 'completed_lessons', 'in_progress_lessons', 'completed_scenarios', 'certificates', 'quiz_attempts', 'updated_at']
+    search_fields = ['user__username']
+    readonly_fields = ['updated_at']
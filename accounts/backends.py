@@ -0,0 +1,32 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+# Wide Profile columns no page reads through request.user
+DEFERRED_PROFILE_FIELDS = [
+    "profile__bio",
+    "profile__parent_name",
+    "profile__parent_email",
+    "profile__parent_phone",
+    "profile__parent_relation",
+]
+
+
+class ProfileBackend(ModelBackend):
+    """ModelBackend that loads request.user together with its profiles.
+
+    The header reads user.profile and user.parent_profile on every page, so
+    both are joined into the per-request user query. A missing
+    parent_profile is cached as well and costs no query.
+    """
+
+    def get_user(self, user_id):
+        UserModel = get_user_model()
+        try:
+            user = (
+                UserModel._default_manager.select_related("profile", "parent_profile")
+                .defer(*DEFERRED_PROFILE_FIELDS)
+                .get(pk=user_id)
+            )
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
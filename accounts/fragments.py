@@ -0,0 +1,62 @@
+"""Caching of progress-derived template fragments.
+
+A fragment cached with {% progress_cache %} is keyed on the user's
+Profile.progress_generation, which every progress write (lessons, quizzes,
+scenarios, achievements, rewards, streaks) bumps with an F() UPDATE inside
+its own transaction, and on a content version bumped when lessons, paths
+or achievements are edited. A fragment is served from cache until the child
+does something, or at most CONTENT_CACHE_TIMEOUT.
+
+Views fetch their fragments with get_fragments() before building the
+context and only run the queries a fragment needs when it missed; the
+{% progress_cache %} tag then uses the fetched copy instead of reading the
+cache again.
+"""
+
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db.models import F
+
+from .models import Profile
+
+CONTENT_VERSION_KEY = "progress-fragments:content-version"
+
+
+def bump_generation(*user_ids):
+    Profile.objects.filter(user_id__in=user_ids).update(
+        progress_generation=F("progress_generation") + 1
+    )
+
+
+def content_version():
+    version = cache.get(CONTENT_VERSION_KEY)
+    if version is None:
+        cache.add(CONTENT_VERSION_KEY, uuid4().hex, None)
+        version = cache.get(CONTENT_VERSION_KEY)
+    return version
+
+
+def invalidate_content():
+    cache.set(CONTENT_VERSION_KEY, uuid4().hex, None)
+
+
+def fragment_key(name, user, vary_on=()):
+    """Cache key of a user's copy of a progress fragment"""
+    return make_template_fragment_key(
+        f"progress:{name}",
+        [user.pk, user.profile.progress_generation, content_version(), *vary_on],
+    )
+
+
+def get_fragments(user, names, vary_on=()):
+    """Map each fragment name to the user's cached copy, None on a miss"""
+    keys = {name: fragment_key(name, user, vary_on) for name in names}
+    found = cache.get_many(keys.values())
+    return {name: found.get(key) for name, key in keys.items()}
+
+
+def set_fragment(key, value):
+    cache.set(key, value, settings.CONTENT_CACHE_TIMEOUT)
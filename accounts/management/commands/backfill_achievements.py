@@ -0,0 +1,62 @@
+import time
+
+from django.core.management.base import BaseCommand
+from accounts.achievements import backfill
+from accounts.models import Achievement
+
+
+class Command(BaseCommand):
+    help = "Award every active achievement to all users who already qualify for it"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Users per bulk insert (default: 1000)",
+        )
+        parser.add_argument(
+            "--no-rewards",
+            action="store_true",
+            help="Insert the achievements without applying their points and coins",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        apply_rewards = not options["no_rewards"]
+
+        achievements = list(
+            Achievement.objects.filter(is_active=True).exclude(achievement_type="special")
+        )
+        # Points rules go last and are re-run while rewards keep raising
+        # totals, so chained achievements are picked up in the same run.
+        achievements.sort(key=lambda achievement: achievement.achievement_type == "points")
+        points_achievements = [a for a in achievements if a.achievement_type == "points"]
+
+        self.stdout.write(f"Backfilling {len(achievements)} achievements...")
+        started = time.monotonic()
+        total = 0
+        passes = [achievements]
+        while passes:
+            awarded_in_pass = 0
+            for achievement in passes.pop():
+                achievement_started = time.monotonic()
+                awarded = backfill(achievement, batch_size=batch_size, apply_rewards=apply_rewards)
+                elapsed = time.monotonic() - achievement_started
+                awarded_in_pass += awarded
+                if awarded:
+                    self.stdout.write(
+                        f"  {achievement.name}: {awarded} users in {elapsed:.2f}s"
+                        f" ({awarded / max(elapsed, 1e-6):.0f} rows/s)"
+                    )
+            if awarded_in_pass and apply_rewards and points_achievements:
+                passes.append(points_achievements)
+            total += awarded_in_pass
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully awarded {total} achievements in {elapsed:.2f}s"
+                f" ({total / max(elapsed, 1e-6):.0f} rows/s)"
+            )
+        )
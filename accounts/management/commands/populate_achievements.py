@@ -7,6 +7,7 @@ from accounts.models import (
     DailyStreak,
     ParentProfile,
 )
+from accounts.rewards import award
 from django.utils import timezone
 from datetime import timedelta
 
@@ -38,7 +39,7 @@ class Command(BaseCommand):
                 "description_ar": "أتقن كشك الليمون",
                 "icon": "🍋",
                 "achievement_type": "scenario",
-                "points_required": 0,
+                "points_required": 1,
                 "points_reward": 25,
                 "coins_reward": 10,
                 "order": 2,
@@ -50,7 +51,7 @@ class Command(BaseCommand):
                 "description_ar": "بناء إمبراطورية ألعاب ناجحة",
                 "icon": "🏆",
                 "achievement_type": "scenario",
-                "points_required": 0,
+                "points_required": 5,
                 "points_reward": 50,
                 "coins_reward": 25,
                 "order": 3,
@@ -74,7 +75,7 @@ class Command(BaseCommand):
                 "description_ar": "سجل دخول لمدة 7 أيام متتالية",
                 "icon": "🕒",
                 "achievement_type": "streak",
-                "points_required": 0,
+                "points_required": 7,
                 "points_reward": 40,
                 "coins_reward": 20,
                 "order": 5,
@@ -86,7 +87,7 @@ class Command(BaseCommand):
                 "description_ar": "أكمل 10 سيناريوهات تجارية",
                 "icon": "🏢",
                 "achievement_type": "scenario",
-                "points_required": 0,
+                "points_required": 10,
                 "points_reward": 100,
                 "coins_reward": 50,
                 "order": 6,
@@ -98,7 +99,7 @@ class Command(BaseCommand):
                 "description_ar": "أكمل أول درس",
                 "icon": "🎯",
                 "achievement_type": "lesson",
-                "points_required": 0,
+                "points_required": 1,
                 "points_reward": 10,
                 "coins_reward": 5,
                 "order": 7,
@@ -110,7 +111,7 @@ class Command(BaseCommand):
                 "description_ar": "أكمل 5 دروس",
                 "icon": "📚",
                 "achievement_type": "lesson",
-                "points_required": 0,
+                "points_required": 5,
                 "points_reward": 25,
                 "coins_reward": 10,
                 "order": 8,
@@ -122,7 +123,7 @@ class Command(BaseCommand):
                 "description_ar": "أكمل 10 دروس",
                 "icon": "📖",
                 "achievement_type": "lesson",
-                "points_required": 0,
+                "points_required": 10,
                 "points_reward": 50,
                 "coins_reward": 25,
                 "order": 9,
@@ -134,7 +135,7 @@ class Command(BaseCommand):
                 "description_ar": "احصل على 100% في اختبار",
                 "icon": "💯",
                 "achievement_type": "quiz",
-                "points_required": 0,
+                "points_required": 100,
                 "points_reward": 30,
                 "coins_reward": 15,
                 "order": 10,
@@ -197,10 +198,10 @@ class Command(BaseCommand):
             profile.gender = "male"
             profile.city = "Setif"
             profile.country = "Algeria"
-            profile.total_points = 6500  # Level 5, 65% to Level 6
-            profile.coins = 125
             profile.bio = "أحب تعلم الإدارة المالية والأعمال!"
             profile.save()
+            award(demo_user, "adjustment", "demo-seed", points=6500, coins=125)
+            profile.refresh_from_db()
 
             # Create 7-day streak to match dashboard
             DailyStreak.objects.create(
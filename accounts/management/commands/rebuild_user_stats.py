@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from accounts.stats import rebuild_user_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-user stats snapshot from lessons, quizzes, scenarios and certificates"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows per bulk insert (default: 1000)",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("Rebuilding user stats...")
+
+        count = rebuild_user_stats(batch_size=options["batch_size"])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Successfully rebuilt stats for {count} users")
+        )
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from accounts.rewards import reconcile_balances
+
+
+class Command(BaseCommand):
+    help = "Recompute profile points, coins and level from the points ledger"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Profiles per bulk update (default: 1000)",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("Reconciling profile balances with the points ledger...")
+
+        fixed = reconcile_balances(batch_size=options["batch_size"])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Successfully reconciled {fixed} profiles")
+        )
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_opening_balances(apps, schema_editor):
+    """Seed the ledger with each profile's current totals"""
+    Profile = apps.get_model('accounts', 'Profile')
+    PointsTransaction = apps.get_model('accounts', 'PointsTransaction')
+
+    balances = Profile.objects.exclude(total_points=0, coins=0).values_list(
+        'user_id', 'total_points', 'coins'
+    )
+    PointsTransaction.objects.bulk_create(
+        [
+            PointsTransaction(
+                user_id=user_id,
+                source='opening',
+                source_key='opening',
+                points=points,
+                coins=coins,
+            )
+            for user_id, points, coins in balances.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PointsTransaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('opening', 'Opening Balance'), ('lesson', 'Lesson Completion'), ('scenario', 'Scenario Completion'), ('achievement', 'Achievement'), ('adjustment', 'Manual Adjustment')], max_length=20)),
+                ('source_key', models.CharField(blank=True, max_length=100, null=True)),
+                ('points', models.IntegerField(default=0)),
+                ('coins', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='points_transactions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'source', 'source_key'), name='unique_points_transaction_source')],
+            },
+        ),
+        migrations.RunPython(create_opening_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def build_user_stats(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    UserStats = apps.get_model('accounts', 'UserStats')
+    UserLesson = apps.get_model('lessons', 'UserLesson')
+    UserQuizAttempt = apps.get_model('lessons', 'UserQuizAttempt')
+    Certificate = apps.get_model('lessons', 'Certificate')
+    UserScenario = apps.get_model('scenarios', 'UserScenario')
+
+    counters = {}
+    sources = [
+        UserLesson.objects.values('user_id').order_by().annotate(
+            completed_lessons=Count('id', filter=Q(is_completed=True)),
+            in_progress_lessons=Count('id', filter=Q(is_completed=False)),
+        ),
+        UserScenario.objects.filter(status='completed').values('user_id').order_by().annotate(
+            completed_scenarios=Count('id'),
+        ),
+        Certificate.objects.values('user_id').order_by().annotate(certificates=Count('id')),
+        UserQuizAttempt.objects.values('user_id').order_by().annotate(
+            quiz_attempts=Count('id'), quiz_percentage_total=Sum('percentage'),
+        ),
+    ]
+    for rows in sources:
+        for row in rows:
+            user_id = row.pop('user_id')
+            counters.setdefault(user_id, {}).update(
+                {field: value or 0 for field, value in row.items()}
+            )
+
+    UserStats.objects.bulk_create(
+        [
+            UserStats(user_id=user_id, **counters.get(user_id, {}))
+            for user_id in User.objects.values_list('id', flat=True).iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_pointstransaction'),
+        ('lessons', '0002_userpathprogress'),
+        ('scenarios', '0002_userscenario_days_played_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('completed_lessons', models.IntegerField(default=0)),
+                ('in_progress_lessons', models.IntegerField(default=0)),
+                ('completed_scenarios', models.IntegerField(default=0)),
+                ('certificates', models.IntegerField(default=0)),
+                ('quiz_attempts', models.IntegerField(default=0)),
+                ('quiz_percentage_total', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'User stats',
+            },
+        ),
+        migrations.RunPython(build_user_stats, migrations.RunPython.noop),
+    ]
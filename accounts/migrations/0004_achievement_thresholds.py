@@ -0,0 +1,39 @@
+from django.db import migrations, models
+
+
+# Thresholds for the achievements seeded by populate_achievements, which
+# used to be created with points_required=0 and so could not be evaluated
+SEEDED_THRESHOLDS = {
+    'Lemonade Expert': 1,
+    'Toy Tycoon': 5,
+    '7-Day Streak': 7,
+    'Entrepreneur': 10,
+    'First Steps': 1,
+    'Getting Started': 5,
+    'Lesson Master': 10,
+    'Perfect Score': 100,
+}
+
+
+def set_seeded_thresholds(apps, schema_editor):
+    Achievement = apps.get_model('accounts', 'Achievement')
+    for name, threshold in SEEDED_THRESHOLDS.items():
+        Achievement.objects.filter(name=name, points_required=0).update(
+            points_required=threshold
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_userstats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='achievement',
+            name='points_required',
+            field=models.IntegerField(default=0, help_text='Lessons/scenarios completed, streak days, total points or quiz percentage needed'),
+        ),
+        migrations.RunPython(set_seeded_thresholds, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_achievement_thresholds'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='header_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
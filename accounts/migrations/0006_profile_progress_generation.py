@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_profile_header_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='progress_generation',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -1,8 +1,42 @@
 from django.db import models
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models import Case, F, Value, When
+from django.db.models.lookups import GreaterThanOrEqual
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
+
+# Minimum total points for levels 2, 3, ... 10
+LEVEL_THRESHOLDS = [100, 300, 600, 1000, 2500, 3000, 3500, 4000, 4500]
+
+
+def level_for_points(points):
+    """Level reached with the given total points"""
+    return 1 + sum(1 for threshold in LEVEL_THRESHOLDS if points >= threshold)
+
+
+def level_expression(points):
+    """Database expression computing level_for_points for ``points``.
+
+    Lets an UPDATE set ``level`` from an ``F('total_points') + n``
+    expression in the same statement.
+    """
+    whens = [
+        When(GreaterThanOrEqual(points, threshold), then=Value(level))
+        for level, threshold in reversed(list(enumerate(LEVEL_THRESHOLDS, start=2)))
+    ]
+    return Case(*whens, default=Value(1))
+
+
+def header_version_expression(points):
+    """Database expression for ``header_version`` in an UPDATE that sets
+    ``level`` from ``points``: bumped only if the level changes.
+    """
+    return F("header_version") + Case(
+        When(level=level_expression(points), then=Value(0)), default=Value(1)
+    )
+
+
 class Profile(models.Model):
     GENDER_CHOICES = [
         ('male', 'Male'),
@@ -29,6 +63,11 @@ class Profile(models.Model):
     total_points = models.IntegerField(default=0)
     level = models.IntegerField(default=1)
     coins = models.IntegerField(default=0)
+
+    # Bumped whenever something the header shows changes, see accounts.views.header
+    header_version = models.PositiveIntegerField(default=0)
+    # Bumped by every progress write, see accounts.fragments
+    progress_generation = models.PositiveIntegerField(default=0)
     
     # Settings
     receive_notifications = models.BooleanField(default=True)
@@ -45,22 +84,58 @@ class Profile(models.Model):
     
     def calculate_level(self):
         """Calculate level based on total points"""
-        if self.total_points < 100:
-            return 1
-        elif self.total_points < 300:
-            return 2
-        elif self.total_points < 600:
-            return 3
-        elif self.total_points < 1000:
-            return 4
-        elif self.total_points < 2000:
-            return 5
-        else:
-            return min(10, 5 + (self.total_points - 2000) // 500)
+        return level_for_points(self.total_points)
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = instance._tracked_values()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        self._loaded_values.update(self._tracked_values())
+
+    def _tracked_values(self):
+        """Current values of the loaded, non-automatic columns"""
+        deferred = self.get_deferred_fields()
+        values = {}
+        for field in self._meta.concrete_fields:
+            if field.primary_key or field.attname in deferred:
+                continue
+            if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False):
+                continue
+            value = getattr(self, field.attname)
+            if isinstance(field, models.FileField):
+                value = value.name if value else ""
+            values[field.name] = value
+        return values
+
+    def get_dirty_fields(self):
+        """Names of the fields changed since the row was loaded or saved"""
+        loaded = getattr(self, "_loaded_values", {})
+        return [
+            name
+            for name, value in self._tracked_values().items()
+            if name not in loaded or loaded[name] != value
+        ]
+
     def save(self, *args, **kwargs):
         self.level = self.calculate_level()
+        # Saves of a loaded row only write the columns that changed, so a
+        # stale in-memory total can't overwrite ledger updates, and saves
+        # with no changes are skipped.
+        if not self._state.adding and hasattr(self, "_loaded_values"):
+            update_fields = kwargs.get("update_fields")
+            if update_fields is None:
+                update_fields = self.get_dirty_fields()
+                if not update_fields:
+                    return
+                kwargs["update_fields"] = update_fields + ["updated_at"]
+            elif "total_points" in update_fields and "level" not in update_fields:
+                kwargs["update_fields"] = list(update_fields) + ["level"]
         super().save(*args, **kwargs)
+        self._loaded_values = self._tracked_values()
     
     def get_progress_to_next_level(self):
         """Get percentage progress to next level"""
@@ -77,6 +152,45 @@ class Profile(models.Model):
             return int(((self.total_points - 1000) / 500) * 100)
 
 
+def bump_header_version(user_id):
+    Profile.objects.filter(user_id=user_id).update(header_version=F("header_version") + 1)
+
+
+class PointsTransaction(models.Model):
+    """Append-only ledger of every points/coins change on a Profile.
+
+    ``source_key`` identifies what the reward was for (e.g. a lesson id), so
+    the unique constraint makes each reward apply at most once. Rewards that
+    may legitimately repeat use a null key.
+    """
+    SOURCE_CHOICES = [
+        ('opening', 'Opening Balance'),
+        ('lesson', 'Lesson Completion'),
+        ('scenario', 'Scenario Completion'),
+        ('achievement', 'Achievement'),
+        ('adjustment', 'Manual Adjustment'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='points_transactions')
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    source_key = models.CharField(max_length=100, null=True, blank=True)
+    points = models.IntegerField(default=0)
+    coins = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'source', 'source_key'],
+                name='unique_points_transaction_source',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.source}:{self.source_key} ({self.points:+d})"
+
+
 class ParentProfile(models.Model):
     """Separate profile for parent users to monitor their children"""
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='parent_profile')
@@ -102,10 +216,54 @@ def create_user_profile(sender, instance, created, **kwargs):
 
 @receiver(post_save, sender=User)
 def save_user_profile(sender, instance, **kwargs):
-    if hasattr(instance, 'profile'):
+    # Only a profile already loaded alongside the user can have changes
+    if User.profile.is_cached(instance) and hasattr(instance, 'profile'):
         instance.profile.save()
 
 
+# Fields the header shows, by model
+HEADER_FIELDS = {
+    User: {'username', 'first_name', 'last_name'},
+    Profile: {'avatar', 'level'},
+}
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Profile)
+def header_fields_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields and not HEADER_FIELDS[sender] & set(update_fields)):
+        return
+    bump_header_version(instance.pk if sender is User else instance.user_id)
+
+
+@receiver(post_save, sender=ParentProfile)
+@receiver(post_delete, sender=ParentProfile)
+def parent_profile_changed(sender, instance, **kwargs):
+    # The header links parents to their own dashboard; post_delete has no 'created'
+    if kwargs.get('created', True):
+        bump_header_version(instance.user_id)
+
+
+# The site statistics count students: users who are neither staff nor parents
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def student_count_changed(sender, instance, **kwargs):
+    if instance.is_staff or not kwargs.get('created', True):
+        return
+    from pages.models import SiteStatistics
+    SiteStatistics.increment('total_students', 1 if 'created' in kwargs else -1)
+
+
+@receiver(post_save, sender=ParentProfile)
+@receiver(post_delete, sender=ParentProfile)
+def parent_count_changed(sender, instance, **kwargs):
+    if not kwargs.get('created', True):
+        return
+    from pages.models import SiteStatistics
+    SiteStatistics.increment('total_students', -1 if 'created' in kwargs else 1)
+
+
 class Achievement(models.Model):
     ACHIEVEMENT_TYPES = [
         ('lesson', 'Lesson Completion'),
@@ -122,7 +280,10 @@ class Achievement(models.Model):
     description_ar = models.TextField()
     icon = models.CharField(max_length=10)
     achievement_type = models.CharField(max_length=20, choices=ACHIEVEMENT_TYPES)
-    points_required = models.IntegerField(default=0)
+    points_required = models.IntegerField(
+        default=0,
+        help_text='Lessons/scenarios completed, streak days, total points or quiz percentage needed',
+    )
     points_reward = models.IntegerField(default=10)
     coins_reward = models.IntegerField(default=5)
     is_active = models.BooleanField(default=True)
@@ -135,6 +296,15 @@ class Achievement(models.Model):
         return self.name
 
 
+@receiver(post_save, sender=Achievement)
+@receiver(post_delete, sender=Achievement)
+def achievement_changed(sender, instance, **kwargs):
+    from .achievements import invalidate_rules
+    from .fragments import invalidate_content
+    invalidate_rules()
+    invalidate_content()
+
+
 class UserAchievement(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='achievements')
     achievement = models.ForeignKey(Achievement, on_delete=models.CASCADE)
@@ -148,6 +318,35 @@ class UserAchievement(models.Model):
         return f"{self.user.username} - {self.achievement.name}"
 
 
+class UserStats(models.Model):
+    """Denormalized per-user counters for the dashboard and profile pages.
+
+    Kept up to date incrementally by the lesson, quiz, scenario and
+    certificate write paths (see accounts.stats); rebuild_user_stats
+    recomputes them from scratch.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='stats')
+    completed_lessons = models.IntegerField(default=0)
+    in_progress_lessons = models.IntegerField(default=0)
+    completed_scenarios = models.IntegerField(default=0)
+    certificates = models.IntegerField(default=0)
+    quiz_attempts = models.IntegerField(default=0)
+    quiz_percentage_total = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name_plural = 'User stats'
+    
+    def __str__(self):
+        return f"{self.user.username}'s Stats"
+    
+    @property
+    def quiz_average(self):
+        if not self.quiz_attempts:
+            return 0
+        return int(self.quiz_percentage_total / self.quiz_attempts)
+
+
 class DailyStreak(models.Model):
     """Track user's daily login streak"""
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='streak')
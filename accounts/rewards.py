@@ -0,0 +1,138 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+
+from .models import (
+    PointsTransaction,
+    Profile,
+    header_version_expression,
+    level_expression,
+    level_for_points,
+)
+
+
+def award(user, source, source_key, points=0, coins=0):
+    """Record a reward in the ledger and apply it to the user's profile.
+
+    The ledger row and the profile UPDATE commit together. Totals and level
+    are changed with F() expressions in one statement, so concurrent awards
+    can't lose each other's updates. The profile row is written first, so
+    its lock orders this against apply_rewards_in_bulk(). A repeated
+    (user, source, source_key) is ignored. Returns the new
+    PointsTransaction, or None if the reward had already been applied.
+
+    Applied point rewards fire the points_changed achievement event.
+    """
+    if source_key is not None:
+        source_key = str(source_key)
+    try:
+        with transaction.atomic():
+            apply_to_profile(user.pk, points, coins)
+            entry = PointsTransaction.objects.create(
+                user=user,
+                source=source,
+                source_key=source_key,
+                points=points,
+                coins=coins,
+            )
+    except IntegrityError:
+        return None
+
+    if points:
+        from .achievements import POINTS_CHANGED, dispatch
+
+        dispatch(user, POINTS_CHANGED)
+    return entry
+
+
+def apply_to_profile(user_id, points, coins):
+    new_points = F("total_points") + points
+    Profile.objects.filter(user_id=user_id).update(
+        total_points=new_points,
+        coins=F("coins") + coins,
+        level=level_expression(new_points),
+        header_version=header_version_expression(new_points),
+        progress_generation=F("progress_generation") + 1,
+    )
+
+
+def apply_rewards_in_bulk(user_ids, source, source_key, points=0, coins=0):
+    """Apply the same reward to a chunk of users with set-based statements.
+
+    The users' profile rows are locked, their ledger rows are inserted with
+    one bulk INSERT that skips conflicts, and the (user, source, source_key)
+    rows are selected again to see whose row went in. Only those users are
+    credited, with one F() UPDATE, so users who already had the reward,
+    including from a concurrent award(), aren't paid twice. Must run inside
+    write_atomic(). Does not fire achievement events. Returns the ids of
+    the users rewarded.
+    """
+    source_key = str(source_key)
+    # award() updates the profile before inserting, so it waits for these
+    # locks or is already visible to the read below
+    list(Profile.objects.select_for_update().filter(user_id__in=user_ids).values_list("id"))
+    entries = PointsTransaction.objects.filter(
+        user_id__in=user_ids, source=source, source_key=source_key
+    ).values_list("user_id", flat=True).order_by()
+    existing = set(entries)
+    PointsTransaction.objects.bulk_create(
+        [
+            PointsTransaction(
+                user_id=user_id,
+                source=source,
+                source_key=source_key,
+                points=points,
+                coins=coins,
+            )
+            for user_id in user_ids
+            if user_id not in existing
+        ],
+        ignore_conflicts=True,
+    )
+    rewarded = set(entries.all()) - existing
+
+    if rewarded and (points or coins):
+        new_points = F("total_points") + points
+        Profile.objects.filter(user_id__in=rewarded).update(
+            total_points=new_points,
+            coins=F("coins") + coins,
+            level=level_expression(new_points),
+            header_version=header_version_expression(new_points),
+            progress_generation=F("progress_generation") + 1,
+        )
+    return sorted(rewarded)
+
+
+def reconcile_balances(batch_size=1000):
+    """Recompute every profile's points, coins and level from the ledger.
+
+    Returns the number of profiles that were out of sync and got fixed.
+    """
+    balances = {
+        row["user_id"]: (row["points"] or 0, row["coins"] or 0)
+        for row in PointsTransaction.objects.values("user_id")
+        .order_by()
+        .annotate(points=Sum("points"), coins=Sum("coins"))
+    }
+
+    changed = []
+    profiles = Profile.objects.only(
+        "id", "user_id", "total_points", "coins", "level", "header_version", "progress_generation"
+    ).iterator(chunk_size=batch_size)
+    for profile in profiles:
+        points, coins = balances.get(profile.user_id, (0, 0))
+        level = level_for_points(points)
+        if (profile.total_points, profile.coins, profile.level) != (points, coins, level):
+            if profile.level != level:
+                profile.header_version += 1
+            profile.progress_generation += 1
+            profile.total_points = points
+            profile.coins = coins
+            profile.level = level
+            changed.append(profile)
+
+    Profile.objects.bulk_update(
+        changed,
+        ["total_points", "coins", "level", "header_version", "progress_generation"],
+        batch_size=batch_size,
+    )
+    return len(changed)
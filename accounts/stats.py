@@ -0,0 +1,80 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+from .fragments import bump_generation
+from .models import UserStats
+from lessons.models import Certificate, UserLesson, UserQuizAttempt
+from scenarios.models import UserScenario
+
+
+def get_user_stats(user):
+    """Return the user's UserStats in one query, unsaved zeros if none exists"""
+    stats = UserStats.objects.filter(user=user).first()
+    return stats or UserStats(user=user)
+
+
+def bump_stats(user, **deltas):
+    """Atomically add ``deltas`` to the user's counters, e.g. certificates=1.
+
+    Uses a single F() UPDATE; the row is created on first use. Bumps the
+    user's progress generation too.
+    """
+    changes = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if not changes:
+        return
+    if not UserStats.objects.filter(user=user).update(**changes):
+        UserStats.objects.get_or_create(user=user)
+        UserStats.objects.filter(user=user).update(**changes)
+    bump_generation(user.pk)
+
+
+def rebuild_user_stats(batch_size=1000):
+    """Recompute every user's counters with one aggregate query per source.
+
+    Returns the number of UserStats rows written.
+    """
+    counters = {}
+
+    def merge(rows):
+        for row in rows:
+            user_id = row.pop("user_id")
+            counters.setdefault(user_id, {}).update(
+                {field: value or 0 for field, value in row.items()}
+            )
+
+    merge(
+        UserLesson.objects.values("user_id")
+        .order_by()
+        .annotate(
+            completed_lessons=Count("id", filter=Q(is_completed=True)),
+            in_progress_lessons=Count("id", filter=Q(is_completed=False)),
+        )
+    )
+    merge(
+        UserScenario.objects.filter(status="completed")
+        .values("user_id")
+        .order_by()
+        .annotate(completed_scenarios=Count("id"))
+    )
+    merge(
+        Certificate.objects.values("user_id")
+        .order_by()
+        .annotate(certificates=Count("id"))
+    )
+    merge(
+        UserQuizAttempt.objects.values("user_id")
+        .order_by()
+        .annotate(
+            quiz_attempts=Count("id"), quiz_percentage_total=Sum("percentage")
+        )
+    )
+
+    rows = [
+        UserStats(user_id=user_id, **counters.get(user_id, {}))
+        for user_id in User.objects.values_list("id", flat=True).iterator()
+    ]
+    with transaction.atomic():
+        UserStats.objects.all().delete()
+        UserStats.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
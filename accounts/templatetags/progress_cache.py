@@ -0,0 +1,60 @@
+from django import template
+from django.core.cache import cache
+
+from ..fragments import fragment_key, set_fragment
+
+register = template.Library()
+
+
+class ProgressCacheNode(template.Node):
+    def __init__(self, nodelist, fragment_name, vary_on):
+        self.nodelist = nodelist
+        self.fragment_name = fragment_name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        user = context["user"]
+        if not user.is_authenticated:
+            return self.nodelist.render(context)
+        key = fragment_key(
+            self.fragment_name, user, [var.resolve(context) for var in self.vary_on]
+        )
+        fetched = context.get("progress_fragments", {})
+        if self.fragment_name in fetched:
+            value = fetched[self.fragment_name]
+        else:
+            value = cache.get(key)
+        if value is None:
+            value = self.nodelist.render(context)
+            set_fragment(key, value)
+        return value
+
+
+@register.tag
+def progress_cache(parser, token):
+    """Cache a fragment of the signed-in user's progress until it changes.
+
+    Usage::
+
+        {% load progress_cache %}
+        {% progress_cache "fragment_name" [var1] [var2] ... %}
+            ...
+        {% endprogress_cache %}
+
+    The key includes the user's progress generation, so the next progress
+    write misses it. A view that fetched the fragment with get_fragments()
+    passes the result as ``progress_fragments`` and fills in the values the
+    fragment renders only on a miss. Don't put csrf_token inside, it changes
+    per session.
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires a fragment name.")
+    nodelist = parser.parse(("endprogress_cache",))
+    parser.delete_first_token()
+    fragment_name = bits[1]
+    if fragment_name[0] == fragment_name[-1] and fragment_name[0] in "\"'":
+        fragment_name = fragment_name[1:-1]
+    return ProgressCacheNode(
+        nodelist, fragment_name, [parser.compile_filter(bit) for bit in bits[2:]]
+    )
@@ -1,3 +1,477 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .achievements import LESSON_COMPLETED, STREAK_UPDATED, backfill, dispatch
+from .models import (
+    Achievement,
+    DailyStreak,
+    ParentProfile,
+    PointsTransaction,
+    Profile,
+    UserAchievement,
+    UserStats,
+)
+from .rewards import apply_rewards_in_bulk, award, reconcile_balances
+from .stats import bump_stats, rebuild_user_stats
+from .views import update_user_streak
+from bizventure_kids.db import write_atomic
+from lessons.models import UserLesson
+
+
+class PointsLedgerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="kid", password="secret123")
+
+    def test_award_is_idempotent_per_source_key(self):
+        self.assertTrue(award(self.user, "lesson", 1, points=60, coins=5))
+        self.assertFalse(award(self.user, "lesson", 1, points=60, coins=5))
+        self.assertTrue(award(self.user, "lesson", 2, points=60, coins=5))
+
+        profile = Profile.objects.get(user=self.user)
+        self.assertEqual((profile.total_points, profile.coins), (120, 10))
+        self.assertEqual(profile.level, 2)
+        self.assertEqual(PointsTransaction.objects.filter(user=self.user).count(), 2)
+
+    def test_null_source_key_repeats(self):
+        award(self.user, "scenario", None, points=50)
+        award(self.user, "scenario", None, points=50)
+        self.assertEqual(Profile.objects.get(user=self.user).total_points, 100)
+
+    def test_admin_adjustment_redirects_to_and_logs_the_ledger_row(self):
+        from django.contrib.admin.models import LogEntry
+
+        admin_user = User.objects.create_superuser("admin", password="secret123")
+        self.client.force_login(admin_user)
+
+        response = self.client.post(
+            reverse("admin:accounts_pointstransaction_add"),
+            {
+                "user": self.user.pk,
+                "source": "adjustment",
+                "source_key": "gift",
+                "points": 40,
+                "coins": 3,
+                "_continue": "1",
+            },
+        )
+
+        entry = PointsTransaction.objects.get(user=self.user)
+        self.assertRedirects(
+            response, reverse("admin:accounts_pointstransaction_change", args=[entry.pk])
+        )
+        self.assertEqual(LogEntry.objects.get().object_id, str(entry.pk))
+        self.assertEqual(Profile.objects.get(user=self.user).total_points, 40)
+
+    def test_reconcile_restores_balances_from_ledger(self):
+        award(self.user, "lesson", 1, points=700, coins=20)
+        Profile.objects.filter(user=self.user).update(total_points=0, coins=0, level=1)
+
+        self.assertEqual(reconcile_balances(), 1)
+
+        profile = Profile.objects.get(user=self.user)
+        self.assertEqual((profile.total_points, profile.coins, profile.level), (700, 20, 4))
+
+
+class UserStatsTests(TestCase):
+    def setUp(self):
+        from lessons.tests import create_path
+
+        cache.clear()
+        self.user = User.objects.create_user(username="kid", password="secret123")
+        self.client.force_login(self.user)
+        self.lessons = list(create_path(3).lessons.order_by("order"))
+
+    def test_write_paths_keep_stats_in_sync_with_rebuild(self):
+        self.client.get(reverse("lessons:lesson_detail", args=[self.lessons[0].id]))
+        self.client.post(reverse("lessons:complete_lesson", args=[self.lessons[0].id]))
+        self.client.get(reverse("lessons:lesson_detail", args=[self.lessons[1].id]))
+        self.client.post(reverse("lessons:complete_lesson", args=[self.lessons[2].id]))
+
+        stats = UserStats.objects.get(user=self.user)
+        self.assertEqual((stats.completed_lessons, stats.in_progress_lessons), (2, 1))
+
+        rebuild_user_stats()
+
+        rebuilt = UserStats.objects.get(user=self.user)
+        self.assertEqual((rebuilt.completed_lessons, rebuilt.in_progress_lessons), (2, 1))
+
+    def test_dashboard_reads_counts_from_snapshot(self):
+        bump_stats(self.user, completed_lessons=4, quiz_attempts=2, quiz_percentage_total=150)
+
+        response = self.client.get(reverse("accounts:user_dashboard"))
+
+        self.assertEqual(response.context["total_lessons"], 4)
+        self.assertEqual(response.context["avg_quiz_score"], 75)
+
+
+class ProgressFragmentTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="kid", password="secret123")
+        self.client.force_login(self.user)
+
+    def progress_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        return response, [
+            query["sql"]
+            for query in queries.captured_queries
+            if "accounts_userstats" in query["sql"]
+            or "accounts_dailystreak" in query["sql"]
+            or 'FROM "accounts_achievement"' in query["sql"]
+        ]
+
+    def test_fragments_are_served_from_cache_between_progress_writes(self):
+        for name in ("accounts:user_dashboard", "accounts:progress_rewards", "accounts:profile"):
+            self.client.get(reverse(name))
+            response, queries = self.progress_queries(reverse(name))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(queries, [], name)
+
+        bump_stats(self.user, completed_scenarios=7)
+
+        response, queries = self.progress_queries(reverse("accounts:user_dashboard"))
+        self.assertNotEqual(queries, [])
+        self.assertEqual(response.context["total_scenarios"], 7)
+        self.assertContains(response, '<div class="stat-value">7</div>', html=True)
+
+    @override_settings(CONTENT_CACHE_TIMEOUT=0)
+    def test_fragments_expire(self):
+        url = reverse("accounts:user_dashboard")
+        self.client.get(url)
+        response, queries = self.progress_queries(url)
+        self.assertNotEqual(queries, [])
+        self.assertEqual(response.context["total_scenarios"], 0)
+
+    def test_streaks_rewards_and_achievement_edits_invalidate(self):
+        url = reverse("accounts:progress_rewards")
+        achievement = Achievement.objects.create(
+            name="Saver", name_ar="مدخر", description="", description_ar="",
+            icon="💰", achievement_type="points", points_required=1000,
+        )
+        generation = Profile.objects.get(user=self.user).progress_generation
+
+        award(self.user, "adjustment", "gift", points=5)
+        DailyStreak.objects.create(user=self.user)
+        DailyStreak.objects.filter(user=self.user).update(
+            last_activity_date=timezone.now().date() - timedelta(days=1)
+        )
+        update_user_streak(self.user)
+        self.assertEqual(
+            Profile.objects.get(user=self.user).progress_generation, generation + 2
+        )
+
+        self.client.get(url)
+        achievement.name = "Super Saver"
+        achievement.save()
+        self.assertContains(self.client.get(url), "Super Saver")
+
+
+class ParentDashboardQueryCountTests(TestCase):
+    def setUp(self):
+        from lessons.tests import create_path
+
+        cache.clear()
+        self.parent = User.objects.create_user(username="parent", password="secret123")
+        self.parent_profile = ParentProfile.objects.create(user=self.parent)
+        self.lessons = list(create_path(4).lessons.order_by("order"))
+        self.client.force_login(self.parent)
+
+    def add_children(self, count):
+        for _ in range(count):
+            child = User.objects.create_user(username=f"child{self.parent_profile.children.count()}")
+            for lesson in self.lessons:
+                UserLesson.objects.create(user=child, lesson=lesson, is_completed=True)
+            DailyStreak.objects.create(user=child, current_streak=2)
+            self.parent_profile.children.add(child)
+
+    def count_queries(self):
+        url = reverse("accounts:parent_dashboard")
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_query_count_is_constant_in_number_of_children(self):
+        self.add_children(1)
+        one_child, _ = self.count_queries()
+        self.add_children(9)
+        ten_children, response = self.count_queries()
+
+        self.assertEqual(one_child, ten_children)
+        children_data = response.context["children_data"]
+        self.assertEqual(len(children_data), 10)
+        self.assertTrue(all(len(data["recent_lessons"]) == 3 for data in children_data))
+
+
+class AchievementRulesTests(TestCase):
+    def setUp(self):
+        from lessons.tests import create_path
+
+        cache.clear()
+        self.user = User.objects.create_user(username="kid", password="secret123")
+        self.client.force_login(self.user)
+        self.lessons = list(create_path(3).lessons.order_by("order"))
+        self.first_lesson = Achievement.objects.create(
+            name="First Steps", name_ar="", description="", description_ar="",
+            icon="🎯", achievement_type="lesson", points_required=1,
+            points_reward=90, coins_reward=5,
+        )
+        self.two_lessons = Achievement.objects.create(
+            name="Two", name_ar="", description="", description_ar="",
+            icon="📚", achievement_type="lesson", points_required=2,
+        )
+        self.points = Achievement.objects.create(
+            name="Points Collector", name_ar="", description="", description_ar="",
+            icon="⭐", achievement_type="points", points_required=100,
+            points_reward=0, coins_reward=7,
+        )
+
+    def earned(self):
+        return set(
+            UserAchievement.objects.filter(user=self.user).values_list("achievement_id", flat=True)
+        )
+
+    def test_lesson_and_chained_points_rules(self):
+        # 10 points for the lesson + 90 from First Steps reaches 100 points
+        self.client.post(reverse("lessons:complete_lesson", args=[self.lessons[0].id]))
+
+        self.assertEqual(self.earned(), {self.first_lesson.id, self.points.id})
+        profile = Profile.objects.get(user=self.user)
+        self.assertEqual((profile.total_points, profile.coins), (100, 17))
+
+    def test_rules_fire_once(self):
+        self.client.post(reverse("lessons:complete_lesson", args=[self.lessons[0].id]))
+        self.assertEqual(dispatch(self.user, LESSON_COMPLETED), [])
+        self.assertEqual(
+            PointsTransaction.objects.filter(user=self.user, source="achievement").count(), 2
+        )
+
+    def test_backfill_awards_qualifying_users_once(self):
+        other = User.objects.create_user(username="other")
+        bump_stats(self.user, completed_lessons=2)
+        bump_stats(other, completed_lessons=1)
+
+        call_command("backfill_achievements", batch_size=1, stdout=StringIO())
+        call_command("backfill_achievements", stdout=StringIO())
+
+        self.assertEqual(
+            self.earned(), {self.first_lesson.id, self.two_lessons.id, self.points.id}
+        )
+        self.assertEqual(
+            set(UserAchievement.objects.filter(user=other).values_list("achievement_id", flat=True)),
+            {self.first_lesson.id},
+        )
+        # 90 + 10 points from the lesson rules chain into Points Collector
+        profile = Profile.objects.get(user=self.user)
+        self.assertEqual((profile.total_points, profile.coins), (100, 17))
+        self.assertEqual(
+            PointsTransaction.objects.filter(source="achievement").count(), 4
+        )
+
+
+    def test_bulk_rewards_skip_users_paid_concurrently(self):
+        other = User.objects.create_user(username="other")
+        # As if award() had committed between a read of the ledger and the insert
+        award(self.user, "achievement", self.first_lesson.id, points=90)
+
+        with write_atomic():
+            rewarded = apply_rewards_in_bulk(
+                [self.user.pk, other.pk], "achievement", self.first_lesson.id, points=90
+            )
+
+        self.assertEqual(rewarded, [other.pk])
+        self.assertEqual(Profile.objects.get(user=self.user).total_points, 90)
+        self.assertEqual(Profile.objects.get(user=other).total_points, 90)
+
+    def test_bulk_rewards_take_the_same_queries_for_any_number_of_users(self):
+        user_ids = [
+            User.objects.create_user(username=f"kid{i}").pk for i in range(20)
+        ]
+        with write_atomic(), self.assertNumQueries(5):
+            rewarded = apply_rewards_in_bulk(user_ids, "achievement", self.two_lessons.id, points=5)
+        self.assertEqual(rewarded, sorted(user_ids))
+
+    def test_backfill_counts_only_inserted_rows(self):
+        bump_stats(self.user, completed_lessons=1)
+        self.assertEqual(backfill(self.first_lesson), 1)
+
+        # A user who earned it after the qualifying users were read
+        UserAchievement.objects.filter(user=self.user).delete()
+        ids = [self.user.pk]
+        with mock.patch("accounts.achievements.qualifying_user_ids", return_value=ids):
+            UserAchievement.objects.create(user=self.user, achievement=self.first_lesson)
+            self.assertEqual(backfill(self.first_lesson), 0)
+        self.assertEqual(Profile.objects.get(user=self.user).total_points, 90)
+
+    def test_backfill_and_dispatch_agree_on_streaks(self):
+        streak = Achievement.objects.create(
+            name="Streak", name_ar="", description="", description_ar="",
+            icon="🔥", achievement_type="streak", points_required=3,
+        )
+        DailyStreak.objects.create(user=self.user, current_streak=1, longest_streak=5)
+
+        self.assertEqual(dispatch(self.user, STREAK_UPDATED), [])
+        call_command("backfill_achievements", stdout=StringIO())
+        self.assertNotIn(streak.id, self.earned())
+
+
+class HeaderPreloadTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="kid", password="secret123")
+        self.client.login(username="kid", password="secret123")
+
+    def profile_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("accounts:header"))
+        self.assertContains(response, "المستوى 1")
+        return [
+            query["sql"]
+            for query in queries.captured_queries
+            if 'FROM "accounts_profile"' in query["sql"]
+            or 'FROM "accounts_parentprofile"' in query["sql"]
+        ]
+
+    def test_header_profiles_are_joined_into_user_query(self):
+        self.assertEqual(self.profile_queries(), [])
+
+    def test_parent_profile_is_preloaded_too(self):
+        ParentProfile.objects.create(user=self.user)
+        self.assertEqual(self.profile_queries(), [])
+
+
+class LoginWithoutAuthenticateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def assertSignedInAs(self, username):
+        response = self.client.get(reverse("accounts:user_dashboard"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.wsgi_request.user.username, username)
+
+    def test_register_signs_the_new_user_in(self):
+        response = self.client.post(
+            reverse("accounts:register"),
+            {
+                "username": "newkid",
+                "email": "newkid@example.com",
+                "password": "secret123",
+                "password2": "secret123",
+            },
+        )
+        self.assertRedirects(response, reverse("accounts:user_dashboard"))
+        self.assertSignedInAs("newkid")
+
+    def test_password_change_keeps_the_session(self):
+        User.objects.create_user(username="kid", password="secret123")
+        self.client.login(username="kid", password="secret123")
+
+        response = self.client.post(
+            reverse("accounts:profile"),
+            {
+                "action": "change_password",
+                "old_password": "secret123",
+                "new_password": "newsecret456",
+                "confirm_password": "newsecret456",
+            },
+        )
+        self.assertRedirects(response, reverse("accounts:profile"))
+        self.assertSignedInAs("kid")
+        self.assertTrue(User.objects.get(username="kid").check_password("newsecret456"))
+
+
+class HeaderFragmentTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="kid", password="secret123")
+        self.client.login(username="kid", password="secret123")
+        self.url = reverse("accounts:header")
+
+    def etag(self):
+        response = self.client.get(self.url)
+        self.assertIn("private", response["Cache-Control"])
+        return response["ETag"]
+
+    def test_unchanged_fragment_is_revalidated(self):
+        etag = self.etag()
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.client.logout()
+        self.client.login(username="kid", password="secret123")
+        self.assertEqual(self.etag(), etag)
+
+    def test_level_and_profile_changes_bump_the_version(self):
+        etag = self.etag()
+        award(self.user, "lesson", 1, points=50)
+        self.assertEqual(self.etag(), etag)
+
+        award(self.user, "lesson", 2, points=50)
+        self.assertNotEqual(self.etag(), etag)
+        self.assertContains(self.client.get(self.url), "المستوى 2")
+
+        etag = self.etag()
+        self.user.first_name = "Sara"
+        self.user.save()
+        self.assertNotEqual(self.etag(), etag)
+        self.assertContains(self.client.get(self.url), "Sara")
+
+        etag = self.etag()
+        ParentProfile.objects.create(user=self.user)
+        self.assertNotEqual(self.etag(), etag)
+        self.assertContains(self.client.get(self.url), reverse("accounts:parent_dashboard"))
+
+    def test_anonymous_visitors_get_the_sign_in_links(self):
+        self.client.logout()
+        self.assertContains(self.client.get(self.url), reverse("accounts:login"))
+
+
+class ProfileDirtyTrackingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="kid", password="secret123")
+
+    def test_unchanged_save_is_skipped(self):
+        profile = Profile.objects.get(user=self.user)
+        with self.assertNumQueries(0):
+            profile.save()
+
+    def test_save_writes_only_changed_columns(self):
+        profile = Profile.objects.get(user=self.user)
+        award(self.user, "lesson", 1, points=150)
+        profile.city = "Oslo"
+
+        with CaptureQueriesContext(connection) as queries:
+            profile.save()
+
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("total_points", queries[0]["sql"])
+        profile = Profile.objects.get(user=self.user)
+        self.assertEqual((profile.city, profile.total_points, profile.level), ("Oslo", 150, 2))
+
+    def test_login_does_one_profile_update(self):
+        self.client.post(
+            reverse("accounts:login"), {"username": "kid", "password": "secret123"}
+        )
+        self.client.logout()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(
+                reverse("accounts:login"), {"username": "kid", "password": "secret123"}
+            )
+
+        profile_queries = [q["sql"] for q in queries if "accounts_profile" in q["sql"]]
+        self.assertEqual(len(profile_queries), 1)
+        self.assertTrue(profile_queries[0].startswith("UPDATE"))
+        self.assertIsNotNone(Profile.objects.get(user=self.user).last_login_at)
@@ -7,6 +7,7 @@ urlpatterns = [
     path('register/', views.register, name='register'),
     path('login/', views.user_login, name='login'),
     path('logout/', views.user_logout, name='logout'),
+    path('header/', views.header, name='header'),
     path('profile/', views.profile, name='profile'),
     path('dashboard/', views.user_dashboard, name='user_dashboard'),
     path('progress-rewards/', views.progress_rewards, name='progress_rewards'),
@@ -3,13 +3,26 @@ from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.contrib.auth.models import User
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.template.loader import render_to_string
 from django.utils import timezone
-from django.db.models import Avg
-from .models import ParentProfile, Achievement, UserAchievement, DailyStreak
-from lessons.models import UserLesson, UserQuizAttempt, Certificate
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from .models import Profile, ParentProfile, Achievement, UserAchievement, DailyStreak, UserStats
+from .achievements import STREAK_UPDATED, dispatch
+from .fragments import bump_generation, get_fragments
+from .stats import get_user_stats
+from lessons.models import UserLesson
 from scenarios.models import UserScenario
 from datetime import timedelta
 
+# Users created or re-authenticated here are logged in without authenticate()
+PROFILE_BACKEND = "accounts.backends.ProfileBackend"
+
 
 def register(request):
     """User registration view"""
@@ -78,7 +91,7 @@ def register(request):
         DailyStreak.objects.create(user=user, current_streak=1, longest_streak=1)
 
         # Log the user in
-        login(request, user)
+        login(request, user, backend=PROFILE_BACKEND)
         messages.success(request, f"مرحباً {username}! تم إنشاء حسابك بنجاح.")
 
         if is_parent:
@@ -107,9 +120,7 @@ def user_login(request):
             login(request, user)
 
             # Update last login
-            profile = user.profile
-            profile.last_login_at = timezone.now()
-            profile.save()
+            Profile.objects.filter(user=user).update(last_login_at=timezone.now())
 
             # Update streak
             update_user_streak(user)
@@ -155,6 +166,8 @@ def update_user_streak(user):
 
     streak.last_activity_date = today
     streak.save()
+    bump_generation(user.pk)
+    dispatch(user, STREAK_UPDATED)
 
 
 def user_logout(request):
@@ -164,10 +177,36 @@ def user_logout(request):
     return redirect("pages:index")
 
 
+def _header_key(request):
+    if not request.user.is_authenticated:
+        return "header:anonymous"
+    return f"header:{request.user.pk}:{request.user.profile.header_version}"
+
+
+@condition(etag_func=_header_key)
+def header(request):
+    """The user's part of the site header, fetched by every page.
+
+    Keeping the name, avatar, level and dashboard link out of the pages
+    lets them be cached for everyone. The fragment is versioned by the
+    profile's header_version, so browsers revalidate their private copy
+    with a 304 until something in it changes.
+    """
+    key = _header_key(request)
+    html = cache.get(key)
+    if html is None:
+        html = render_to_string("partials/_user_menu.html", request=request)
+        cache.set(key, html, settings.PAGE_CACHE_TIMEOUT)
+    response = HttpResponse(html)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
 @login_required
 def profile(request):
     """User profile view with edit capability"""
-    profile = request.user.profile
+    # request.user.profile has the wide columns deferred; this page edits them
+    profile = Profile.objects.get(user=request.user)
 
     if request.method == "POST":
         action = request.POST.get("action")
@@ -219,7 +258,7 @@ def profile(request):
 
             request.user.set_password(new_password)
             request.user.save()
-            login(request, request.user)
+            login(request, request.user, backend=PROFILE_BACKEND)
 
             messages.success(request, "تم تغيير كلمة المرور بنجاح!")
             return redirect("accounts:profile")
@@ -236,33 +275,26 @@ def profile(request):
         user=request.user
     ).select_related("achievement")
 
-    # Get user stats
-    completed_lessons = UserLesson.objects.filter(
-        user=request.user, is_completed=True
-    ).count()
-    in_progress_lessons = UserLesson.objects.filter(
-        user=request.user, is_completed=False
-    ).count()
-    completed_scenarios = UserScenario.objects.filter(
-        user=request.user, status="completed"
-    ).count()
-    certificates = Certificate.objects.filter(user=request.user).count()
-
-    # Get streak info
-    streak = DailyStreak.objects.filter(user=request.user).first()
-
+    # The template renders no stats or streak, so neither is loaded
     context = {
         "profile": profile,
         "achievements": user_achievements,
-        "completed_lessons": completed_lessons,
-        "in_progress_lessons": in_progress_lessons,
-        "completed_scenarios": completed_scenarios,
-        "certificates": certificates,
-        "streak": streak,
     }
     return render(request, "accounts/profile-ar.html", context)
 
 
+def dashboard_progress(user):
+    """Context for the dashboard's progress fragment"""
+    stats = get_user_stats(user)
+    return {
+        "total_lessons": stats.completed_lessons,
+        "total_scenarios": stats.completed_scenarios,
+        "avg_quiz_score": stats.quiz_average,
+        "certificates": stats.certificates,
+        "streak": DailyStreak.objects.filter(user=user).first(),
+    }
+
+
 @login_required
 def user_dashboard(request):
     """Main user dashboard"""
@@ -289,65 +321,55 @@ def user_dashboard(request):
         .order_by("-earned_at")[:5]
     )
 
-    # Statistics
-    total_lessons = UserLesson.objects.filter(
-        user=request.user, is_completed=True
-    ).count()
-    total_scenarios = UserScenario.objects.filter(
-        user=request.user, status="completed"
-    ).count()
     total_points = profile.total_points
     total_coins = profile.coins
 
-    # Quiz stats
-    quiz_attempts = UserQuizAttempt.objects.filter(user=request.user)
-    avg_quiz_score = quiz_attempts.aggregate(avg=Avg("percentage"))["avg"] or 0
-
-    # Certificates
-    certificates = Certificate.objects.filter(user=request.user).select_related("path")
-
-    # Streak
-    streak = DailyStreak.objects.filter(user=request.user).first()
-
+    fragments = get_fragments(request.user, ["dashboard"])
     context = {
         "profile": profile,
         "recent_lessons": recent_lessons,
         "recent_scenarios": recent_scenarios,
         "recent_achievements": recent_achievements,
-        "total_lessons": total_lessons,
-        "total_scenarios": total_scenarios,
         "total_points": total_points,
         "total_coins": total_coins,
-        "avg_quiz_score": int(avg_quiz_score),
-        "certificates": certificates,
-        "streak": streak,
+        "progress_fragments": fragments,
     }
+    if fragments["dashboard"] is None:
+        context.update(dashboard_progress(request.user))
 
     return render(request, "accounts/dashboard-ar.html", context)
 
 
-@login_required
-def progress_rewards(request):
-    """Progress and rewards page"""
-    profile = request.user.profile
-
-    # All achievements with earned status
+def rewards_progress(user):
+    """Context for the progress and rewards fragment"""
     all_achievements = Achievement.objects.filter(is_active=True).order_by(
         "order", "name"
     )
-    user_achievement_ids = UserAchievement.objects.filter(
-        user=request.user
-    ).values_list("achievement_id", flat=True)
+    user_achievement_ids = set(
+        UserAchievement.objects.filter(user=user).values_list(
+            "achievement_id", flat=True
+        )
+    )
 
+    # All achievements with earned status
     achievements_data = []
     for achievement in all_achievements:
-        is_earned = achievement.id in user_achievement_ids
         achievements_data.append(
             {
                 "achievement": achievement,
-                "is_earned": is_earned,
+                "is_earned": achievement.id in user_achievement_ids,
             }
         )
+    return {
+        "achievements_data": achievements_data,
+        "streak": DailyStreak.objects.filter(user=user).first(),
+    }
+
+
+@login_required
+def progress_rewards(request):
+    """Progress and rewards page"""
+    profile = request.user.profile
 
     # Level progress
     next_level_points = 0
@@ -375,17 +397,16 @@ def progress_rewards(request):
         .order_by("-earned_at")[:10]
     )
 
-    # Streak info
-    streak = DailyStreak.objects.filter(user=request.user).first()
-
+    fragments = get_fragments(request.user, ["progress_rewards"])
     context = {
         "profile": profile,
-        "achievements_data": achievements_data,
         "next_level_points": next_level_points,
         "progress_percentage": progress_percentage,
         "recent_achievements": recent_achievements,
-        "streak": streak,
+        "progress_fragments": fragments,
     }
+    if fragments["progress_rewards"] is None:
+        context.update(rewards_progress(request.user))
 
     return render(request, "accounts/progress-rewards-ar.html", context)
 
@@ -398,44 +419,38 @@ def parent_dashboard(request):
         return redirect("accounts:user_dashboard")
 
     parent_profile = request.user.parent_profile
-    children = parent_profile.children.all()
+    children = list(
+        parent_profile.children.select_related("profile", "stats", "streak")
+    )
+    child_ids = [child.id for child in children]
+
+    # Recent activity, latest 3 per child in one query each
+    recent_lessons = latest_per_user(
+        UserLesson.objects.select_related("lesson"), child_ids, "-started_at", 3
+    )
+    recent_achievements = latest_per_user(
+        UserAchievement.objects.select_related("achievement"),
+        child_ids,
+        "-earned_at",
+        3,
+    )
 
     children_data = []
     for child in children:
         child_profile = child.profile
-
-        # Get child stats
-        completed_lessons = UserLesson.objects.filter(
-            user=child, is_completed=True
-        ).count()
-        completed_scenarios = UserScenario.objects.filter(
-            user=child, status="completed"
-        ).count()
-        total_points = child_profile.total_points
-        certificates = Certificate.objects.filter(user=child).count()
-
-        # Recent activity
-        recent_lessons = UserLesson.objects.filter(user=child).order_by("-started_at")[
-            :3
-        ]
-        recent_achievements = UserAchievement.objects.filter(user=child).order_by(
-            "-earned_at"
-        )[:3]
-
-        # Streak
-        streak = DailyStreak.objects.filter(user=child).first()
+        stats = getattr(child, "stats", None) or UserStats(user=child)
 
         children_data.append(
             {
                 "child": child,
                 "profile": child_profile,
-                "completed_lessons": completed_lessons,
-                "completed_scenarios": completed_scenarios,
-                "total_points": total_points,
-                "certificates": certificates,
-                "recent_lessons": recent_lessons,
-                "recent_achievements": recent_achievements,
-                "streak": streak,
+                "completed_lessons": stats.completed_lessons,
+                "completed_scenarios": stats.completed_scenarios,
+                "total_points": child_profile.total_points,
+                "certificates": stats.certificates,
+                "recent_lessons": recent_lessons.get(child.id, []),
+                "recent_achievements": recent_achievements.get(child.id, []),
+                "streak": getattr(child, "streak", None),
             }
         )
 
@@ -447,6 +462,27 @@ def parent_dashboard(request):
     return render(request, "accounts/parent-dashboard-ar.html", context)
 
 
+def latest_per_user(queryset, user_ids, order_by, limit):
+    """Fetch the latest ``limit`` rows per user for many users in one query.
+
+    Returns a dict mapping user id to a list of rows ordered by ``order_by``.
+    """
+    rows = (
+        queryset.filter(user_id__in=user_ids)
+        .annotate(
+            row_number=Window(
+                RowNumber(), partition_by=F("user_id"), order_by=order_by
+            )
+        )
+        .filter(row_number__lte=limit)
+        .order_by("user_id", "row_number")
+    )
+    rows_by_user = {}
+    for row in rows:
+        rows_by_user.setdefault(row.user_id, []).append(row)
+    return rows_by_user
+
+
 @login_required
 def add_child(request):
     """Add a child to parent's account"""
@@ -0,0 +1,31 @@
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+
+@contextmanager
+def write_atomic(using=DEFAULT_DB_ALIAS):
+    """transaction.atomic() for blocks that read rows and then write them.
+
+    On SQLite an outermost block begins with BEGIN IMMEDIATE, taking the
+    write lock up front. A deferred transaction that has read can't wait
+    for the lock when it comes to write, so concurrent requests would fail
+    with "database is locked" instead of queueing on the busy timeout.
+    Other transactions keep SQLite's deferred default, and other databases
+    get a plain atomic block.
+    """
+    connection = connections[using]
+    if connection.vendor != "sqlite" or connection.in_atomic_block:
+        with transaction.atomic(using=using):
+            yield
+        return
+
+    connection.ensure_connection()
+    mode = connection.transaction_mode
+    connection.transaction_mode = "IMMEDIATE"
+    try:
+        with transaction.atomic(using=using):
+            connection.transaction_mode = mode
+            yield
+    finally:
+        connection.transaction_mode = mode
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -35,6 +36,13 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# ProfileBackend preloads the profiles read by the header. ModelBackend
+# stays listed so sessions created before it was added remain valid.
+AUTHENTICATION_BACKENDS = [
+    "accounts.backends.ProfileBackend",
+    "django.contrib.auth.backends.ModelBackend",
+]
+
 ROOT_URLCONF = "bizventure_kids.urls"
 
 TEMPLATES = [
@@ -62,9 +70,61 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # Writers wait this many seconds for the lock; transactions that
+        # read before writing take it up front, see bizventure_kids.db.
+        "OPTIONS": {
+            "timeout": 20,
+        },
+        # A file-backed test database outside the checkout, so tests can
+        # exercise concurrent requests on separate connections.
+        "TEST": {
+            "NAME": Path(tempfile.gettempdir()) / "bizventure_kids_test.sqlite3",
+        },
     }
 }
 
+# Cache
+# Every process serving the site, and every management command that edits
+# content, must share one cache: invalidations only reach the cache they
+# run against. Production requires REDIS_URL (see README); local memory is
+# only suitable for a single development process.
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "bizventure-kids",
+        }
+    }
+
+# Content cached from the database (quiz answer keys, ...) is invalidated
+# on save, and expires after this long in case an invalidation was missed.
+CONTENT_CACHE_TIMEOUT = 5 * 60
+
+# Scenario results are verified by replaying their action logs on a pool of
+# this many threads per process (0 verifies inline, in the request). At most
+# SCENARIO_VERIFICATION_QUEUE submissions wait in memory; the rest stay
+# pending for the verify_submissions command.
+SCENARIO_VERIFICATION_WORKERS = 2
+SCENARIO_VERIFICATION_QUEUE = 200
+
+# Cached copies of the marketing pages, the games list and users' header
+# fragments are invalidated whenever their content is saved (see
+# pages/cache.py); the timeout only bounds changes made around the ORM,
+# such as bulk updates.
+PAGE_CACHE_TIMEOUT = 60 * 60
+
+# The site statistics counters are summed from their shards at most this
+# often, and the pages showing them are cached no longer than this. The
+# reconcile_site_statistics command recomputes exact counts.
+SITE_STATISTICS_TIMEOUT = 5 * 60
+
 # import pymysql
 
 # pymysql.install_as_MySQLdb()
@@ -108,7 +168,12 @@ TIME_ZONE = "UTC"
 USE_I18N = True
 
 USE_TZ = True
-STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
+# STATICFILES_STORAGE is no longer read by Django 5.1+, which silently
+# served unhashed files; STORAGES restores hashed, long-cacheable URLs.
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "bizventure_kids.storage.StaticFilesStorage"},
+}
 # Static files (CSS, JavaScript, Images)
 STATIC_URL = "/static/"
 STATICFILES_DIRS = [BASE_DIR / "static"]
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from .models import (
     LearningPath, Lesson, UserLesson, Quiz, Question, 
-    Answer, UserQuizAttempt, Certificate
+    Answer, UserQuizAttempt, Certificate, UserPathProgress
 )
 
 @admin.register(LearningPath)
@@ -61,4 +61,12 @@ class CertificateAdmin(admin.ModelAdmin):
     list_display = ['user', 'path', 'certificate_number', 'issued_at']
     list_filter = ['issued_at', 'path']
     search_fields = ['user__username', 'certificate_number']
-    readonly_fields = ['issued_at']
\ No newline at end of file
+    readonly_fields = ['issued_at']
+
+@admin.register(UserPathProgress)
+class UserPathProgressAdmin(admin.ModelAdmin):
+    list_display = ['user', 'path', 'completed_count', 'frontier_order', 'updated_at']
+    list_filter = ['path']
+    search_fields = ['user__username', 'path__title']
+    readonly_fields = ['completed_count', 'frontier_order', 'updated_at']
+    exclude = ['completed_bitmap']
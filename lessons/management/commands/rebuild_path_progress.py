@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from lessons.progress import rebuild_path_progress
+
+
+class Command(BaseCommand):
+    help = "Rebuild per-user learning path progress bitmaps from UserLesson rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows per bulk insert (default: 1000)",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("Rebuilding learning path progress...")
+
+        count = rebuild_path_progress(batch_size=options["batch_size"])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Successfully rebuilt {count} progress records")
+        )
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def build_path_progress(apps, schema_editor):
+    UserLesson = apps.get_model('lessons', 'UserLesson')
+    UserPathProgress = apps.get_model('lessons', 'UserPathProgress')
+
+    bitmaps = {}
+    completed_rows = UserLesson.objects.filter(is_completed=True).values_list(
+        'user_id', 'lesson__path_id', 'lesson__order'
+    ).order_by()
+    for user_id, path_id, order in completed_rows.iterator():
+        key = (user_id, path_id)
+        bitmaps[key] = bitmaps.get(key, 0) | 1 << order
+
+    rows = []
+    for (user_id, path_id), bits in bitmaps.items():
+        frontier = 1
+        while bits >> frontier & 1:
+            frontier += 1
+        rows.append(UserPathProgress(
+            user_id=user_id,
+            path_id=path_id,
+            completed_bitmap=bits.to_bytes((bits.bit_length() + 7) // 8, 'little'),
+            completed_count=bin(bits).count('1'),
+            frontier_order=frontier,
+        ))
+    UserPathProgress.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lessons', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserPathProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('completed_bitmap', models.BinaryField(default=b'')),
+                ('completed_count', models.IntegerField(default=0)),
+                ('frontier_order', models.IntegerField(default=1)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('path', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_progress', to='lessons.learningpath')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='path_progress', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'path')},
+            },
+        ),
+        migrations.RunPython(build_path_progress, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+from django.db import migrations
+
+
+def rebuild_progress_by_lesson_id(apps, schema_editor):
+    """Re-key the progress bitmaps from lesson order to lesson id"""
+    Lesson = apps.get_model('lessons', 'Lesson')
+    UserLesson = apps.get_model('lessons', 'UserLesson')
+    UserPathProgress = apps.get_model('lessons', 'UserPathProgress')
+
+    orders = {}
+    for lesson_id, path_id, order in Lesson.objects.values_list('id', 'path_id', 'order'):
+        orders.setdefault(path_id, {})[lesson_id] = order
+
+    bitmaps = {}
+    completed_rows = UserLesson.objects.filter(is_completed=True).values_list(
+        'user_id', 'lesson__path_id', 'lesson_id'
+    )
+    for user_id, path_id, lesson_id in completed_rows.iterator():
+        key = (user_id, path_id)
+        bitmaps[key] = bitmaps.get(key, 0) | 1 << lesson_id
+
+    rows = []
+    for (user_id, path_id), bits in bitmaps.items():
+        remaining = [
+            order for lesson_id, order in orders[path_id].items()
+            if not bits >> lesson_id & 1
+        ]
+        rows.append(UserPathProgress(
+            user_id=user_id,
+            path_id=path_id,
+            completed_bitmap=bits.to_bytes((bits.bit_length() + 7) // 8, 'little'),
+            completed_count=bin(bits).count('1'),
+            frontier_order=min(remaining) if remaining else max(orders[path_id].values()) + 1,
+        ))
+    UserPathProgress.objects.all().delete()
+    UserPathProgress.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lessons', '0002_userpathprogress'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_progress_by_lesson_id, migrations.RunPython.noop),
+    ]
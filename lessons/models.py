@@ -1,5 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
 
 class LearningPath(models.Model):
     DIFFICULTY_CHOICES = [
@@ -33,11 +35,8 @@ class LearningPath(models.Model):
         total = self.lessons.count()
         if total == 0:
             return 0
-        completed = UserLesson.objects.filter(
-            user=user,
-            lesson__path=self,
-            is_completed=True
-        ).count()
+        progress = UserPathProgress.objects.filter(user=user, path=self).first()
+        completed = progress.completed_count if progress else 0
         return int((completed / total) * 100)
 
 
@@ -74,21 +73,16 @@ class Lesson(models.Model):
         if not self.requires_previous or self.order == 1:
             return False
         
-        # Check if previous lesson is completed
-        previous_lesson = Lesson.objects.filter(
-            path=self.path,
-            order=self.order - 1
-        ).first()
-        
-        if previous_lesson:
-            user_lesson = UserLesson.objects.filter(
-                user=user,
-                lesson=previous_lesson,
-                is_completed=True
-            ).exists()
-            return not user_lesson
+        # Only locked if there actually is a previous lesson
+        previous_id = Lesson.objects.filter(
+            path_id=self.path_id, order=self.order - 1
+        ).values_list('id', flat=True).first()
+        if previous_id is None:
+            return False
         
-        return False
+        # Check if previous lesson is completed
+        progress = UserPathProgress.objects.filter(user=user, path_id=self.path_id).first()
+        return not (progress and progress.is_completed(previous_id))
 
 
 class UserLesson(models.Model):
@@ -108,6 +102,65 @@ class UserLesson(models.Model):
         return f"{self.user.username} - {self.lesson.title}"
 
 
+class UserPathProgress(models.Model):
+    """Denormalized per-user progress through a learning path.
+
+    Bit ``n`` of ``completed_bitmap`` is set once the lesson with ``id == n``
+    is completed, so lock checks and progress bars are a single-row read and
+    reordering lessons doesn't move the bits. ``frontier_order`` is the
+    lowest order of a lesson not completed yet. The row follows UserLesson
+    saves and deletes, see lessons.progress.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='path_progress')
+    path = models.ForeignKey(LearningPath, on_delete=models.CASCADE, related_name='user_progress')
+    completed_bitmap = models.BinaryField(default=b'')
+    completed_count = models.IntegerField(default=0)
+    frontier_order = models.IntegerField(default=1)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['user', 'path']
+        
+    def __str__(self):
+        return f"{self.user.username} - {self.path.title} ({self.completed_count})"
+    
+    @staticmethod
+    def bitmap_to_int(bitmap):
+        return int.from_bytes(bytes(bitmap), 'little')
+    
+    @staticmethod
+    def int_to_bitmap(bits):
+        return bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+    
+    @staticmethod
+    def frontier_for(bits, lesson_orders):
+        """Lowest order among ``lesson_orders`` ({id: order}) whose bit is not set.
+
+        One past the last lesson once every lesson is completed.
+        """
+        remaining = [
+            order for lesson_id, order in lesson_orders.items()
+            if not bits >> lesson_id & 1
+        ]
+        if remaining:
+            return min(remaining)
+        return max(lesson_orders.values(), default=0) + 1
+    
+    def is_completed(self, lesson_id):
+        return bool(self.bitmap_to_int(self.completed_bitmap) >> lesson_id & 1)
+    
+    def set_completed(self, lesson_id, completed, lesson_orders):
+        """Set or clear the bit for ``lesson_id``; returns False if unchanged"""
+        bits = self.bitmap_to_int(self.completed_bitmap)
+        if bool(bits >> lesson_id & 1) == completed:
+            return False
+        bits ^= 1 << lesson_id
+        self.completed_bitmap = self.int_to_bitmap(bits)
+        self.completed_count += 1 if completed else -1
+        self.frontier_order = self.frontier_for(bits, lesson_orders)
+        return True
+
+
 class Quiz(models.Model):
     lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name='quizzes')
     title = models.CharField(max_length=200)
@@ -180,4 +233,104 @@ class Certificate(models.Model):
         ordering = ['-issued_at']
         
     def __str__(self):
-        return f"{self.user.username} - {self.path.title} Certificate"
\ No newline at end of file
+        return f"{self.user.username} - {self.path.title} Certificate"
+
+
+@receiver(post_save, sender=LearningPath)
+@receiver(post_delete, sender=LearningPath)
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def lesson_content_changed(sender, instance, **kwargs):
+    # The learning path page caches each user's copy, see accounts.fragments
+    from accounts.fragments import invalidate_content
+    invalidate_content()
+
+
+@receiver(pre_save, sender=Lesson)
+def lesson_changing(sender, instance, **kwargs):
+    old = None
+    if instance.pk:
+        old = Lesson.objects.filter(pk=instance.pk).values('is_active', 'order').first()
+    instance._was_active = bool(old and old['is_active'])
+    instance._old_order = old and old['order']
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def lesson_order_changed(sender, instance, **kwargs):
+    # Progress bits are keyed by lesson id; only the frontier follows order
+    if 'created' in kwargs and instance._old_order == instance.order:
+        return
+    from .progress import refresh_frontiers
+    refresh_frontiers(instance.path_id)
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def lesson_count_changed(sender, instance, **kwargs):
+    from pages.models import SiteStatistics
+    if 'created' in kwargs:
+        delta = instance.is_active - instance._was_active
+    else:
+        delta = -instance.is_active
+    if delta:
+        SiteStatistics.increment('total_lessons', delta)
+
+
+@receiver(post_save, sender=UserLesson)
+@receiver(post_delete, sender=UserLesson)
+def user_lesson_changed(sender, instance, **kwargs):
+    # Completions made outside complete_lesson, such as in the admin or
+    # the populate commands, reach the progress record too
+    from .progress import record_lesson_completion
+    completed = instance.is_completed and 'created' in kwargs
+    if kwargs.get('created') and not completed:
+        # A lesson being viewed for the first time; nothing to clear
+        return
+    try:
+        lesson = instance.lesson
+    except Lesson.DoesNotExist:
+        return
+    if record_lesson_completion(instance.user_id, lesson, completed):
+        # complete_lesson bumps it through bump_stats; other writers don't
+        from accounts.fragments import bump_generation
+        bump_generation(instance.user_id)
+
+
+@receiver(post_save, sender=Certificate)
+@receiver(post_delete, sender=Certificate)
+def certificate_count_changed(sender, instance, **kwargs):
+    if not kwargs.get('created', True):
+        return
+    from pages.models import SiteStatistics
+    SiteStatistics.increment('certificates_issued', 1 if 'created' in kwargs else -1)
+
+
+@receiver(post_save, sender=Quiz)
+@receiver(post_delete, sender=Quiz)
+def quiz_changed(sender, instance, **kwargs):
+    from .quizzes import invalidate_quiz_cache
+    invalidate_quiz_cache(instance.id)
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def question_changed(sender, instance, **kwargs):
+    from .quizzes import invalidate_quiz_cache
+    invalidate_quiz_cache(instance.quiz_id)
+
+
+@receiver(post_save, sender=Answer)
+@receiver(post_delete, sender=Answer)
+def answer_changed(sender, instance, **kwargs):
+    from .quizzes import invalidate_quiz_cache
+    if Answer.question.is_cached(instance):
+        quiz_id = instance.question.quiz_id
+    else:
+        quiz_id = Question.objects.filter(pk=instance.question_id).values_list(
+            'quiz_id', flat=True
+        ).first()
+    if quiz_id is None:
+        # Cascade from a deleted question, which invalidates on its own
+        return
+    invalidate_quiz_cache(quiz_id)
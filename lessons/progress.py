@@ -0,0 +1,220 @@
+from django.db import transaction
+from django.utils import timezone
+
+from bizventure_kids.db import write_atomic
+from .models import Lesson, UserLesson, UserPathProgress
+from accounts.achievements import LESSON_COMPLETED, dispatch
+from accounts.rewards import award
+from accounts.stats import bump_stats
+
+
+def resolve_lesson_statuses(user, path):
+    """Compute the status of every active lesson in a path for one user.
+
+    Runs a fixed number of queries regardless of how many lessons the path
+    has: one for the path's lessons and one for the user's progress rows.
+    Returns a list of dicts with ``lesson``, ``user_lesson``, ``status`` and
+    ``is_locked`` keys, ordered like ``path.lessons``.
+    """
+    # Inactive lessons still count as "previous" for locking, like
+    # Lesson.is_locked_for_user, so load them all and filter in Python.
+    lessons = list(Lesson.objects.filter(path=path).order_by("order"))
+    user_lessons = {
+        user_lesson.lesson_id: user_lesson
+        for user_lesson in UserLesson.objects.filter(user=user, lesson__path=path)
+    }
+    lesson_ids_by_order = {lesson.order: lesson.id for lesson in lessons}
+
+    lessons_data = []
+    for lesson in lessons:
+        if not lesson.is_active:
+            continue
+
+        user_lesson = user_lessons.get(lesson.id)
+        is_locked = _is_locked(lesson, lesson_ids_by_order, user_lessons)
+
+        if user_lesson and user_lesson.is_completed:
+            status = "completed"
+        elif user_lesson and not user_lesson.is_completed:
+            status = "inprogress"
+        elif is_locked:
+            status = "locked"
+        else:
+            status = "unlocked"
+
+        lessons_data.append(
+            {
+                "lesson": lesson,
+                "user_lesson": user_lesson,
+                "status": status,
+                "is_locked": is_locked,
+            }
+        )
+
+    return lessons_data
+
+
+def resolve_lesson_status(user, lesson):
+    """Return the status dict for a single lesson, see resolve_lesson_statuses
+
+    Reads the user's UserPathProgress row for the lock check instead of
+    loading the whole path.
+    """
+    user_lesson = UserLesson.objects.filter(user=user, lesson=lesson).first()
+    is_locked = lesson.is_locked_for_user(user)
+
+    if user_lesson and user_lesson.is_completed:
+        status = "completed"
+    elif user_lesson and not user_lesson.is_completed:
+        status = "inprogress"
+    elif is_locked:
+        status = "locked"
+    else:
+        status = "unlocked"
+
+    return {
+        "lesson": lesson,
+        "user_lesson": user_lesson,
+        "status": status,
+        "is_locked": is_locked,
+    }
+
+
+def get_path_progress(user, path):
+    """Return the user's UserPathProgress for a path, unsaved if none exists"""
+    progress = UserPathProgress.objects.filter(user=user, path=path).first()
+    return progress or UserPathProgress(user=user, path=path)
+
+
+def lesson_orders(path_id):
+    """Map each lesson id in a path to its order"""
+    return dict(Lesson.objects.filter(path_id=path_id).values_list("id", "order"))
+
+
+def record_lesson_completion(user_id, lesson, completed=True):
+    """Set, or clear, the lesson's bit in the user's path progress record.
+
+    The row is locked for the duration of the update so concurrent
+    completions in the same path can't overwrite each other's bits.
+    Returns True if the record changed.
+    """
+    with write_atomic():
+        rows = UserPathProgress.objects.select_for_update()
+        if completed:
+            progress, created = rows.get_or_create(user_id=user_id, path_id=lesson.path_id)
+        else:
+            progress = rows.filter(user_id=user_id, path_id=lesson.path_id).first()
+        if progress is None or progress.is_completed(lesson.id) == completed:
+            return False
+        progress.set_completed(lesson.id, completed, lesson_orders(lesson.path_id))
+        progress.save(
+            update_fields=[
+                "completed_bitmap",
+                "completed_count",
+                "frontier_order",
+                "updated_at",
+            ]
+        )
+    return True
+
+
+def refresh_frontiers(path_id, batch_size=1000):
+    """Recompute frontier_order for a path's progress rows after its lessons change"""
+    orders = lesson_orders(path_id)
+    changed = []
+    rows = UserPathProgress.objects.filter(path_id=path_id).only(
+        "id", "completed_bitmap", "frontier_order"
+    )
+    for progress in rows.iterator(chunk_size=batch_size):
+        bits = progress.bitmap_to_int(progress.completed_bitmap)
+        frontier = UserPathProgress.frontier_for(bits, orders)
+        if frontier != progress.frontier_order:
+            progress.frontier_order = frontier
+            changed.append(progress)
+    UserPathProgress.objects.bulk_update(changed, ["frontier_order"], batch_size=batch_size)
+    return len(changed)
+
+
+def complete_lesson(user, lesson):
+    """Mark a lesson completed for a user, exactly once.
+
+    The flip is a single conditional write: either the UserLesson row is
+    created already completed, or an UPDATE ... WHERE is_completed = false
+    changes it. Only the request whose write affected the row records the
+    progress, stats and reward, all in one transaction, so double
+    submissions can't award the lesson twice. Returns True if this call
+    completed the lesson.
+    """
+    completed_values = {
+        "is_completed": True,
+        "completed_at": timezone.now(),
+        "progress_percentage": 100,
+    }
+    with write_atomic():
+        user_lesson, created = UserLesson.objects.get_or_create(
+            user=user, lesson=lesson, defaults=completed_values
+        )
+        if not created:
+            flipped = UserLesson.objects.filter(
+                pk=user_lesson.pk, is_completed=False
+            ).update(**completed_values)
+            if flipped != 1:
+                return False
+
+        record_lesson_completion(user.pk, lesson)
+        # A row created here was never counted as in progress
+        bump_stats(user, completed_lessons=1, in_progress_lessons=0 if created else -1)
+        award(user, "lesson", lesson.id, lesson.points, lesson.coins)
+
+    dispatch(user, LESSON_COMPLETED)
+    return True
+
+
+def rebuild_path_progress(batch_size=1000):
+    """Recompute every UserPathProgress row from completed UserLesson rows.
+
+    Streams the completed (user, path, lesson) triples once, folds them into
+    bitmaps in memory and replaces the table with chunked bulk inserts.
+    Returns the number of progress rows written.
+    """
+    orders = {}
+    for lesson_id, path_id, order in Lesson.objects.values_list("id", "path_id", "order"):
+        orders.setdefault(path_id, {})[lesson_id] = order
+
+    bitmaps = {}
+    completed_rows = (
+        UserLesson.objects.filter(is_completed=True)
+        .values_list("user_id", "lesson__path_id", "lesson_id")
+        .order_by()
+        .iterator(chunk_size=batch_size)
+    )
+    for user_id, path_id, lesson_id in completed_rows:
+        key = (user_id, path_id)
+        bitmaps[key] = bitmaps.get(key, 0) | 1 << lesson_id
+
+    rows = [
+        UserPathProgress(
+            user_id=user_id,
+            path_id=path_id,
+            completed_bitmap=UserPathProgress.int_to_bitmap(bits),
+            completed_count=bin(bits).count("1"),
+            frontier_order=UserPathProgress.frontier_for(bits, orders[path_id]),
+        )
+        for (user_id, path_id), bits in bitmaps.items()
+    ]
+    with transaction.atomic():
+        UserPathProgress.objects.all().delete()
+        UserPathProgress.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def _is_locked(lesson, lesson_ids_by_order, user_lessons):
+    if not lesson.requires_previous or lesson.order == 1:
+        return False
+
+    previous_lesson_id = lesson_ids_by_order.get(lesson.order - 1)
+    if previous_lesson_id is None:
+        return False
+
+    previous_user_lesson = user_lessons.get(previous_lesson_id)
+    return not (previous_user_lesson and previous_user_lesson.is_completed)
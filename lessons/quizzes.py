@@ -0,0 +1,139 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Answer, Question, Quiz
+
+
+def answer_key_cache_key(quiz_id):
+    return f"quiz:{quiz_id}:answer-key"
+
+
+def payload_cache_key(quiz_id):
+    return f"quiz:{quiz_id}:payload"
+
+
+def build_answer_key(quiz_id):
+    """Load a quiz's answer key in a single query.
+
+    Maps each question id to ``{"points": int, "correct": frozenset}`` where
+    ``correct`` holds the ids of the question's correct answers.
+    """
+    rows = (
+        Question.objects.filter(quiz_id=quiz_id)
+        .values_list("id", "points", "answers__id", "answers__is_correct")
+        .order_by()
+    )
+    correct_answers = {}
+    points = {}
+    for question_id, question_points, answer_id, is_correct in rows:
+        points[question_id] = question_points
+        correct_answers.setdefault(question_id, set())
+        if is_correct:
+            correct_answers[question_id].add(answer_id)
+
+    return {
+        question_id: {
+            "points": points[question_id],
+            "correct": frozenset(correct_answers[question_id]),
+        }
+        for question_id in points
+    }
+
+
+def get_answer_key(quiz_id):
+    """Return the cached answer key for a quiz, building it on a miss"""
+    key = answer_key_cache_key(quiz_id)
+    answer_key = cache.get(key)
+    if answer_key is None:
+        answer_key = build_answer_key(quiz_id)
+        cache.set(key, answer_key, settings.CONTENT_CACHE_TIMEOUT)
+    return answer_key
+
+
+def grade_quiz(answer_key, data):
+    """Grade submitted answers against an answer key without touching the db.
+
+    ``data`` is a mapping such as ``request.POST`` holding the chosen answer
+    id under ``question_<id>``. Returns ``(score, max_score)``.
+    """
+    score = 0
+    max_score = 0
+    for question_id, entry in answer_key.items():
+        max_score += entry["points"]
+        answer_id = data.get(f"question_{question_id}")
+        try:
+            answer_id = int(answer_id)
+        except (TypeError, ValueError):
+            continue
+        if answer_id in entry["correct"]:
+            score += entry["points"]
+    return score, max_score
+
+
+def build_quiz_payload(quiz):
+    """Compile a quiz into a plain, JSON-serializable bundle for rendering.
+
+    Questions and answers are loaded in two queries and correct flags are
+    left out, so the bundle is safe to send to the browser. ``version`` is a
+    hash of the content and changes whenever a question or answer does.
+    """
+    answers = {}
+    answer_rows = (
+        Answer.objects.filter(question__quiz=quiz)
+        .order_by("order", "id")
+        .values_list("question_id", "id", "answer_text")
+    )
+    for question_id, answer_id, answer_text in answer_rows:
+        answers.setdefault(question_id, []).append(
+            {"id": answer_id, "answer_text": answer_text}
+        )
+
+    questions = [
+        {
+            "id": question_id,
+            "question_text": question_text,
+            "question_type": question_type,
+            "points": points,
+            "answers": answers.get(question_id, []),
+        }
+        for question_id, question_text, question_type, points in (
+            Question.objects.filter(quiz=quiz)
+            .order_by("order", "id")
+            .values_list("id", "question_text", "question_type", "points")
+        )
+    ]
+
+    payload = {
+        "id": quiz.id,
+        "lesson_id": quiz.lesson_id,
+        "title": quiz.title,
+        "description": quiz.description,
+        "pass_percentage": quiz.pass_percentage,
+        "question_count": len(questions),
+        "questions": questions,
+    }
+    content = json.dumps(
+        payload, sort_keys=True, ensure_ascii=False, separators=(",", ":")
+    )
+    payload["version"] = hashlib.sha256(content.encode()).hexdigest()[:16]
+    return payload
+
+
+def get_quiz_payload(quiz_id):
+    """Return the cached compiled payload for an active quiz, or None"""
+    key = payload_cache_key(quiz_id)
+    payload = cache.get(key)
+    if payload is None:
+        quiz = Quiz.objects.filter(id=quiz_id, is_active=True).first()
+        if quiz is None:
+            return None
+        payload = build_quiz_payload(quiz)
+        cache.set(key, payload, settings.CONTENT_CACHE_TIMEOUT)
+    return payload
+
+
+def invalidate_quiz_cache(quiz_id):
+    cache.delete_many([answer_key_cache_key(quiz_id), payload_cache_key(quiz_id)])
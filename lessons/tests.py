@@ -1,3 +1,362 @@
-from django.test import TestCase
+import threading
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.models import PointsTransaction, Profile, UserStats
+from .models import (
+    Answer,
+    LearningPath,
+    Lesson,
+    Question,
+    Quiz,
+    UserLesson,
+    UserPathProgress,
+)
+from .progress import rebuild_path_progress
+from .quizzes import answer_key_cache_key, get_answer_key, get_quiz_payload, grade_quiz
+
+
+def create_path(lesson_count, order=1):
+    path = LearningPath.objects.create(
+        title=f"Path {lesson_count}",
+        description="",
+        total_duration=lesson_count * 10,
+        order=order,
+    )
+    for index in range(1, lesson_count + 1):
+        Lesson.objects.create(
+            path=path,
+            title=f"Lesson {index}",
+            description="",
+            icon="💰",
+            duration=10,
+            order=index,
+        )
+    return path
+
+
+class LearningPathQueryCountTests(TestCase):
+    """learning_path must run a constant number of queries as paths grow"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="kid", password="secret123")
+        self.client.force_login(self.user)
+
+    def count_queries(self, lesson_count):
+        LearningPath.objects.all().delete()
+        path = create_path(lesson_count)
+        lessons = list(path.lessons.order_by("order"))
+        # Half the path completed, plus one lesson in progress
+        for lesson in lessons[: lesson_count // 2]:
+            UserLesson.objects.create(user=self.user, lesson=lesson, is_completed=True)
+        UserLesson.objects.create(user=self.user, lesson=lessons[lesson_count // 2])
+        # Warm up one-off work such as creating the SiteSettings row
+        self.client.get(reverse("lessons:learning_path"))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("lessons:learning_path"))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_is_constant_in_path_length(self):
+        self.assertEqual(self.count_queries(5), self.count_queries(30))
+
+    def test_statuses(self):
+        path = create_path(4)
+        lessons = list(path.lessons.order_by("order"))
+        UserLesson.objects.create(user=self.user, lesson=lessons[0], is_completed=True)
+        UserLesson.objects.create(user=self.user, lesson=lessons[1])
+
+        response = self.client.get(reverse("lessons:learning_path"))
+
+        statuses = [data["status"] for data in response.context["lessons_data"]]
+        self.assertEqual(statuses, ["completed", "inprogress", "locked", "locked"])
+        self.assertEqual(response.context["completed_lessons"], 1)
+        self.assertEqual(response.context["progress_percentage"], 25)
+
+    def test_page_is_cached_until_the_user_makes_progress(self):
+        path = create_path(3)
+        lesson = path.lessons.get(order=1)
+        url = reverse("lessons:learning_path")
+        self.client.get(url)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertContains(response, "0/3")
+        self.assertFalse(
+            [q for q in queries.captured_queries if "lessons_userlesson" in q["sql"]]
+        )
+
+        self.client.post(reverse("lessons:complete_lesson", args=[lesson.id]))
+        self.assertContains(self.client.get(url), "1/3")
+
+        lesson.title = "Renamed lesson"
+        lesson.save()
+        self.assertContains(self.client.get(url), "Renamed lesson")
+
+    def test_completions_outside_complete_lesson_refresh_the_page(self):
+        path = create_path(3)
+        url = reverse("lessons:learning_path")
+        self.assertContains(self.client.get(url), "0/3")
+
+        UserLesson.objects.create(
+            user=self.user, lesson=path.lessons.get(order=1), is_completed=True
+        )
+        self.assertContains(self.client.get(url), "1/3")
+
+    def test_locked_lesson_detail_redirects(self):
+        path = create_path(3)
+        locked = path.lessons.get(order=3)
+
+        response = self.client.get(reverse("lessons:lesson_detail", args=[locked.id]))
+
+        self.assertRedirects(
+            response, reverse("lessons:learning_path"), fetch_redirect_response=False
+        )
+        self.assertFalse(UserLesson.objects.filter(lesson=locked).exists())
+
+
+class PathProgressTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="kid", password="secret123")
+        self.client.force_login(self.user)
+        self.path = create_path(3)
+        self.lessons = list(self.path.lessons.order_by("order"))
+
+    def test_completion_updates_progress_record(self):
+        self.client.post(reverse("lessons:complete_lesson", args=[self.lessons[0].id]))
+        self.client.post(reverse("lessons:complete_lesson", args=[self.lessons[0].id]))
+
+        progress = UserPathProgress.objects.get(user=self.user, path=self.path)
+        self.assertEqual(progress.completed_count, 1)
+        self.assertEqual(progress.frontier_order, 2)
+        self.assertFalse(self.lessons[1].is_locked_for_user(self.user))
+        self.assertTrue(self.lessons[2].is_locked_for_user(self.user))
+        self.assertEqual(self.path.get_completion_percentage(self.user), 33)
+
+    def test_rebuild_matches_incremental_updates(self):
+        for lesson in self.lessons[:2]:
+            self.client.post(reverse("lessons:complete_lesson", args=[lesson.id]))
+        before = UserPathProgress.objects.get(user=self.user, path=self.path)
+
+        rebuild_path_progress()
+
+        after = UserPathProgress.objects.get(user=self.user, path=self.path)
+        self.assertEqual(bytes(after.completed_bitmap), bytes(before.completed_bitmap))
+        self.assertEqual(after.completed_count, 2)
+        self.assertEqual(after.frontier_order, 3)
+
+    def test_rows_written_outside_complete_lesson_are_tracked(self):
+        user_lesson = UserLesson.objects.create(
+            user=self.user, lesson=self.lessons[0], is_completed=True
+        )
+        self.assertFalse(self.lessons[1].is_locked_for_user(self.user))
+
+        user_lesson.delete()
+        progress = UserPathProgress.objects.get(user=self.user, path=self.path)
+        self.assertEqual(progress.completed_count, 0)
+        self.assertEqual(progress.frontier_order, 1)
+        self.assertTrue(self.lessons[1].is_locked_for_user(self.user))
+
+    def test_viewing_a_lesson_takes_no_progress_lock(self):
+        with CaptureQueriesContext(connection) as queries:
+            UserLesson.objects.create(user=self.user, lesson=self.lessons[0])
+        self.assertFalse(
+            [q for q in queries.captured_queries if "lessons_userpathprogress" in q["sql"]]
+        )
+
+    def test_reordering_lessons_keeps_completions(self):
+        first, second, third = self.lessons
+        self.client.post(reverse("lessons:complete_lesson", args=[first.id]))
+
+        # Swap the first and last lesson, through a free order
+        first.order = -1
+        first.save()
+        third.order = 1
+        third.save()
+        first.order = 3
+        first.save()
+
+        progress = UserPathProgress.objects.get(user=self.user, path=self.path)
+        self.assertEqual(progress.completed_count, 1)
+        self.assertEqual(progress.frontier_order, 1)
+        self.assertTrue(second.is_locked_for_user(self.user))
+        self.assertTrue(progress.is_completed(first.id))
+
+
+def create_quiz(lesson, question_count):
+    quiz = Quiz.objects.create(lesson=lesson, title="Quiz", pass_percentage=70)
+    for index in range(1, question_count + 1):
+        question = Question.objects.create(
+            quiz=quiz, question_text=f"Q{index}", points=2, order=index
+        )
+        Answer.objects.create(question=question, answer_text="yes", is_correct=True)
+        Answer.objects.create(question=question, answer_text="no", is_correct=False)
+    return quiz
+
+
+def correct_answers(quiz):
+    return {
+        f"question_{answer.question_id}": str(answer.id)
+        for answer in Answer.objects.filter(question__quiz=quiz, is_correct=True)
+    }
+
+
+class QuizGradingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="kid", password="secret123")
+        self.client.force_login(self.user)
+        self.lesson = create_path(1).lessons.get()
+
+    def count_submit_queries(self, question_count):
+        quiz = create_quiz(self.lesson, question_count)
+        data = correct_answers(quiz)
+        url = reverse("lessons:quiz_submit", args=[quiz.id])
+        # Warm the answer key cache
+        self.client.post(url, data)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(url, data)
+        return len(queries)
+
+    def test_grading_queries_do_not_scale_with_questions(self):
+        self.assertEqual(self.count_submit_queries(3), self.count_submit_queries(30))
+
+    def test_answer_key_is_built_in_one_query(self):
+        quiz = create_quiz(self.lesson, 10)
+        with self.assertNumQueries(1):
+            get_answer_key(quiz.id)
+        with self.assertNumQueries(0):
+            get_answer_key(quiz.id)
+
+    def test_grading_and_invalidation(self):
+        quiz = create_quiz(self.lesson, 4)
+        data = correct_answers(quiz)
+        self.assertEqual(grade_quiz(get_answer_key(quiz.id), data), (8, 8))
+
+        # Answers for another question's correct answer don't count
+        first, second = sorted(data)[:2]
+        data[first] = data[second]
+        self.assertEqual(grade_quiz(get_answer_key(quiz.id), data), (6, 8))
+
+        # Editing an answer drops the cached key
+        Answer.objects.filter(question__quiz=quiz, is_correct=False).first().delete()
+        Question.objects.create(quiz=quiz, question_text="Q5", points=2, order=5)
+        self.assertEqual(grade_quiz(get_answer_key(quiz.id), data), (6, 10))
+
+    def test_answer_save_invalidates_with_at_most_one_lookup(self):
+        quiz = create_quiz(self.lesson, 1)
+        get_answer_key(quiz.id)
+        answer = Answer.objects.get(question__quiz=quiz, is_correct=False)
+
+        # The UPDATE plus the question's quiz_id
+        with self.assertNumQueries(2):
+            answer.save()
+        self.assertIsNone(cache.get(answer_key_cache_key(quiz.id)))
+
+
+class QuizPayloadTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="kid", password="secret123")
+        self.client.force_login(self.user)
+        self.lesson = create_path(1).lessons.get()
+        self.quiz = create_quiz(self.lesson, 3)
+        self.url = reverse("lessons:quiz_payload", args=[self.quiz.id])
+
+    def test_payload_strips_correct_flags_and_supports_etag(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertEqual(payload["question_count"], 3)
+        self.assertNotIn("is_correct", response.content.decode())
+
+        etag = response["ETag"]
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        Answer.objects.filter(question__quiz=self.quiz).update(answer_text="x")
+        Answer.objects.filter(question__quiz=self.quiz).first().save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_payload_of_a_locked_lesson_is_forbidden(self):
+        path = create_path(2, order=2)
+        locked = path.lessons.get(order=2)
+        quiz = create_quiz(locked, 1)
+        url = reverse("lessons:quiz_payload", args=[quiz.id])
+
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.client.post(reverse("lessons:complete_lesson", args=[path.lessons.get(order=1).id]))
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_lesson_renders_quiz_from_payload(self):
+        get_quiz_payload(self.quiz.id)
+        response = self.client.get(reverse("lessons:lesson_detail", args=[self.lesson.id]))
+        self.assertEqual(response.context["quiz_payload"]["question_count"], 3)
+        self.assertContains(response, "السؤال 3 من 3")
+
+
+class ConcurrentCompletionTests(TransactionTestCase):
+    """Simultaneous completions of one lesson must award it exactly once"""
+
+    threads = 8
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="kid", password="secret123")
+        self.lesson = create_path(1).lessons.get()
+
+    def hammer(self, url, data=None):
+        barrier = threading.Barrier(self.threads)
+        errors = []
+
+        def post():
+            client = Client()
+            client.force_login(self.user)
+            barrier.wait()
+            try:
+                client.post(url, data or {})
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=post) for _ in range(self.threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(errors, [])
+
+    def assert_awarded_once(self):
+        self.assertEqual(
+            PointsTransaction.objects.filter(user=self.user, source="lesson").count(), 1
+        )
+        profile = Profile.objects.get(user=self.user)
+        self.assertEqual(profile.total_points, self.lesson.points)
+        stats = UserStats.objects.get(user=self.user)
+        self.assertEqual((stats.completed_lessons, stats.in_progress_lessons), (1, 0))
+        self.assertEqual(UserPathProgress.objects.get(user=self.user).completed_count, 1)
+
+    def test_complete_lesson_awards_once(self):
+        self.hammer(reverse("lessons:complete_lesson", args=[self.lesson.id]))
+        self.assert_awarded_once()
+
+    def test_complete_after_start_awards_once(self):
+        client = Client()
+        client.force_login(self.user)
+        client.get(reverse("lessons:lesson_detail", args=[self.lesson.id]))
+
+        self.hammer(reverse("lessons:complete_lesson", args=[self.lesson.id]))
+        self.assert_awarded_once()
@@ -12,6 +12,7 @@ urlpatterns = [
         name="complete_lesson",
     ),
     path("quiz/<int:quiz_id>/submit/", views.quiz_submit, name="quiz_submit"),
+    path("quiz/<int:quiz_id>/payload/", views.quiz_payload, name="quiz_payload"),
     path(
         "certificate/<int:path_id>/",
         views.generate_certificate,
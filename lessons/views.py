@@ -1,23 +1,56 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.http import Http404, HttpResponseForbidden, JsonResponse
 from django.utils import timezone
+from django.views.decorators.cache import cache_control
+from django.views.decorators.csrf import ensure_csrf_cookie
+from django.views.decorators.http import condition
 from .models import (
     LearningPath,
     Lesson,
     UserLesson,
     Quiz,
-    Question,
-    Answer,
     UserQuizAttempt,
     Certificate,
 )
-from accounts.models import UserAchievement, Achievement
+from .progress import (
+    complete_lesson as complete_lesson_for_user,
+    get_path_progress,
+    resolve_lesson_status,
+    resolve_lesson_statuses,
+)
+from .quizzes import get_answer_key, get_quiz_payload, grade_quiz
+from accounts.achievements import QUIZ_PASSED, dispatch
+from accounts.fragments import get_fragments
+from accounts.stats import bump_stats
 import random
 import string
 
 
+def learning_path_progress(user, path):
+    """Context for the learning path's progress fragments"""
+    # Get user progress for each lesson
+    lessons_data = resolve_lesson_statuses(user, path)
+
+    # Calculate overall progress
+    total_lessons = len(lessons_data)
+    completed_lessons = sum(
+        1 for lesson_data in lessons_data if lesson_data["status"] == "completed"
+    )
+    progress_percentage = (
+        int((completed_lessons / total_lessons) * 100) if total_lessons else 0
+    )
+    return {
+        "lessons_data": lessons_data,
+        "total_lessons": total_lessons,
+        "completed_lessons": completed_lessons,
+        "progress_percentage": progress_percentage,
+    }
+
+
 @login_required
+@ensure_csrf_cookie
 def learning_path(request):
     """Display the main learning path with all lessons"""
     path = LearningPath.objects.filter(is_active=True).first()
@@ -26,53 +59,15 @@ def learning_path(request):
         messages.error(request, "لا توجد مسارات تعليمية متاحة حالياً.")
         return redirect("pages:index")
 
-    # Get all lessons for this path
-    lessons = path.lessons.filter(is_active=True)
-
-    # Get user progress for each lesson
-    lessons_data = []
-    for lesson in lessons:
-        user_lesson = UserLesson.objects.filter(
-            user=request.user, lesson=lesson
-        ).first()
-
-        is_locked = lesson.is_locked_for_user(request.user)
-
-        if user_lesson and user_lesson.is_completed:
-            status = "completed"
-        elif user_lesson and not user_lesson.is_completed:
-            status = "inprogress"
-        elif is_locked:
-            status = "locked"
-        else:
-            status = "unlocked"
-
-        lessons_data.append(
-            {
-                "lesson": lesson,
-                "user_lesson": user_lesson,
-                "status": status,
-                "is_locked": is_locked,
-            }
-        )
-
-    # Calculate overall progress
-    total_lessons = lessons.count()
-    completed_lessons = UserLesson.objects.filter(
-        user=request.user, lesson__path=path, is_completed=True
-    ).count()
-
-    progress_percentage = 0
-    if total_lessons > 0:
-        progress_percentage = int((completed_lessons / total_lessons) * 100)
-
+    fragments = get_fragments(
+        request.user, ["learning_path", "learning_path_data"], [path.pk]
+    )
     context = {
         "path": path,
-        "lessons_data": lessons_data,
-        "total_lessons": total_lessons,
-        "completed_lessons": completed_lessons,
-        "progress_percentage": progress_percentage,
+        "progress_fragments": fragments,
     }
+    if None in fragments.values():
+        context.update(learning_path_progress(request.user, path))
 
     return render(request, "lessons/learning-path-ar.html", context)
 
@@ -80,25 +75,34 @@ def learning_path(request):
 @login_required
 def lesson_detail(request, lesson_id):
     """Display individual lesson with content and quiz"""
-    lesson = get_object_or_404(Lesson, id=lesson_id, is_active=True)
+    lesson = get_object_or_404(
+        Lesson.objects.select_related("path"), id=lesson_id, is_active=True
+    )
+    lesson_data = resolve_lesson_status(request.user, lesson)
 
     # Check if lesson is locked
-    if lesson.is_locked_for_user(request.user):
+    if lesson_data["is_locked"]:
         messages.error(request, "هذا الدرس مقفل. أكمل الدروس السابقة أولاً!")
         return redirect("lessons:learning_path")
 
     # Get or create user lesson progress
-    user_lesson, created = UserLesson.objects.get_or_create(
-        user=request.user, lesson=lesson
-    )
+    user_lesson = lesson_data["user_lesson"]
+    if user_lesson is None:
+        user_lesson, created = UserLesson.objects.get_or_create(
+            user=request.user, lesson=lesson
+        )
+        if created:
+            bump_stats(request.user, in_progress_lessons=1)
 
     # Get quiz if available
     quiz = lesson.quizzes.filter(is_active=True).first()
+    quiz_payload = get_quiz_payload(quiz.id) if quiz else None
 
     context = {
         "lesson": lesson,
         "user_lesson": user_lesson,
         "quiz": quiz,
+        "quiz_payload": quiz_payload,
     }
 
     return render(request, "lessons/lesson-ar.html", context)
@@ -112,25 +116,7 @@ def complete_lesson(request, lesson_id):
 
     lesson = get_object_or_404(Lesson, id=lesson_id)
 
-    user_lesson, created = UserLesson.objects.get_or_create(
-        user=request.user, lesson=lesson
-    )
-
-    if not user_lesson.is_completed:
-        user_lesson.is_completed = True
-        user_lesson.completed_at = timezone.now()
-        user_lesson.progress_percentage = 100
-        user_lesson.save()
-
-        # Award points and coins
-        profile = request.user.profile
-        profile.total_points += lesson.points
-        profile.coins += lesson.coins
-        profile.save()
-
-        # Check for achievements
-        check_lesson_achievements(request.user)
-
+    if complete_lesson_for_user(request.user, lesson):
         messages.success(
             request,
             f'تهانينا! لقد أكملت درس "{lesson.title}" وحصلت على {lesson.points} نقطة و {lesson.coins} عملة!',
@@ -145,22 +131,14 @@ def quiz_submit(request, quiz_id):
     if request.method != "POST":
         return redirect("lessons:learning_path")
 
-    quiz = get_object_or_404(Quiz, id=quiz_id)
-    questions = quiz.questions.all()
-
-    score = 0
-    total_questions = questions.count()
+    quiz = get_object_or_404(Quiz.objects.select_related("lesson"), id=quiz_id)
 
-    # Check answers
-    for question in questions:
-        answer_id = request.POST.get(f"question_{question.id}")
-        if answer_id:
-            answer = Answer.objects.filter(id=answer_id, is_correct=True).first()
-            if answer:
-                score += question.points
+    # Check answers against the cached answer key
+    answer_key = get_answer_key(quiz.id)
+    score, max_score = grade_quiz(answer_key, request.POST)
+    total_questions = len(answer_key)
 
     # Calculate percentage
-    max_score = sum(q.points for q in questions)
     percentage = int((score / max_score) * 100) if max_score > 0 else 0
     passed = percentage >= quiz.pass_percentage
 
@@ -173,28 +151,14 @@ def quiz_submit(request, quiz_id):
         percentage=percentage,
         passed=passed,
     )
+    bump_stats(request.user, quiz_attempts=1, quiz_percentage_total=percentage)
 
     # If passed, complete the lesson
     if passed:
-        user_lesson, created = UserLesson.objects.get_or_create(
-            user=request.user, lesson=quiz.lesson
-        )
-
-        if not user_lesson.is_completed:
-            user_lesson.is_completed = True
-            user_lesson.completed_at = timezone.now()
-            user_lesson.progress_percentage = 100
-            user_lesson.save()
+        complete_lesson_for_user(request.user, quiz.lesson)
 
-            # Award points
-            profile = request.user.profile
-            profile.total_points += quiz.lesson.points
-            profile.coins += quiz.lesson.coins
-            profile.save()
-
-            # Perfect score achievement
-            if percentage == 100:
-                check_perfect_score_achievement(request.user)
+        # Check for quiz score achievements
+        dispatch(request.user, QUIZ_PASSED, percentage=percentage)
 
         messages.success(request, f"ممتاز! لقد نجحت في الاختبار بنسبة {percentage}%!")
     else:
@@ -206,6 +170,28 @@ def quiz_submit(request, quiz_id):
     return redirect("lessons:lesson_detail", lesson_id=quiz.lesson.id)
 
 
+def quiz_payload_etag(request, payload):
+    return payload["version"]
+
+
+@condition(etag_func=quiz_payload_etag)
+def quiz_payload_response(request, payload):
+    return JsonResponse(payload, json_dumps_params={"ensure_ascii": False})
+
+
+@login_required
+@cache_control(private=True, no_cache=True)
+def quiz_payload(request, quiz_id):
+    """Serve the compiled quiz (without correct answers) as JSON"""
+    payload = get_quiz_payload(quiz_id)
+    if payload is None:
+        raise Http404("Quiz not found")
+    lesson = get_object_or_404(Lesson, id=payload["lesson_id"], is_active=True)
+    if lesson.is_locked_for_user(request.user):
+        return HttpResponseForbidden("هذا الدرس مقفل. أكمل الدروس السابقة أولاً!")
+    return quiz_payload_response(request, payload)
+
+
 @login_required
 def generate_certificate(request, path_id):
     """Generate certificate for completed path"""
@@ -213,9 +199,7 @@ def generate_certificate(request, path_id):
 
     # Check if all lessons are completed
     total_lessons = path.lessons.count()
-    completed_lessons = UserLesson.objects.filter(
-        user=request.user, lesson__path=path, is_completed=True
-    ).count()
+    completed_lessons = get_path_progress(request.user, path).completed_count
 
     if completed_lessons < total_lessons:
         messages.error(request, "يجب إكمال جميع الدروس للحصول على الشهادة!")
@@ -231,6 +215,7 @@ def generate_certificate(request, path_id):
         certificate = Certificate.objects.create(
             user=request.user, path=path, certificate_number=certificate_number
         )
+        bump_stats(request.user, certificates=1)
 
         messages.success(request, "تهانينا! تم إصدار شهادتك بنجاح!")
 
@@ -239,39 +224,3 @@ def generate_certificate(request, path_id):
     }
 
     return render(request, "lessons/certificate.html", context)
-
-
-def check_lesson_achievements(user):
-    """Check and award lesson-related achievements"""
-    completed_count = UserLesson.objects.filter(user=user, is_completed=True).count()
-
-    # First lesson achievement
-    if completed_count == 1:
-        achievement = Achievement.objects.filter(
-            achievement_type="lesson", points_required=1
-        ).first()
-        if achievement:
-            UserAchievement.objects.get_or_create(user=user, achievement=achievement)
-
-    # 5 lessons achievement
-    elif completed_count == 5:
-        achievement = Achievement.objects.filter(
-            achievement_type="lesson", points_required=5
-        ).first()
-        if achievement:
-            UserAchievement.objects.get_or_create(user=user, achievement=achievement)
-
-    # 10 lessons achievement
-    elif completed_count == 10:
-        achievement = Achievement.objects.filter(
-            achievement_type="lesson", points_required=10
-        ).first()
-        if achievement:
-            UserAchievement.objects.get_or_create(user=user, achievement=achievement)
-
-
-def check_perfect_score_achievement(user):
-    """Award achievement for perfect quiz score"""
-    achievement = Achievement.objects.filter(achievement_type="quiz").first()
-    if achievement:
-        UserAchievement.objects.get_or_create(user=user, achievement=achievement)
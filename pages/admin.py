@@ -72,11 +72,14 @@ class TestimonialAdmin(admin.ModelAdmin):
 
 @admin.register(SiteStatistics)
 class SiteStatisticsAdmin(admin.ModelAdmin):
-    list_display = ['total_students', 'total_lessons', 'total_scenarios', 'certificates_issued', 'updated_at']
-    readonly_fields = ['updated_at']
+    # Counted by the write paths and reconcile_site_statistics, not edited
+    list_display = ['shard', 'total_students', 'total_lessons', 'total_scenarios', 'certificates_issued', 'updated_at']
     
     def has_add_permission(self, request):
-        return not SiteStatistics.objects.exists()
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
     
     def has_delete_permission(self, request, obj=None):
         return False
\ No newline at end of file
@@ -0,0 +1,153 @@
+"""Whole-page cache for the pages that look the same to every visitor.
+
+The pages listed in PAGE_DEPENDENCIES are cached under a version per page;
+the user's part of the header is fetched separately (accounts.views.header).
+Saving or deleting a model a page shows bumps that page's version and no
+other. Pages are keyed on the path and the query parameters the view
+reads, so tracking parameters and cache busters share one copy. Requests
+with pending messages and anything but GET or HEAD always reach the view.
+"""
+
+from functools import wraps
+from hashlib import sha256
+from uuid import uuid4
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.http import HttpResponse
+
+# URL name -> labels of the models each page renders
+PAGE_DEPENDENCIES = {
+    "pages:index": ("pages.Testimonial", "pages.Offer", "pages.SiteStatistics"),
+    "pages:about": ("pages.TeamMember", "pages.SiteStatistics"),
+    "pages:contact": ("pages.FAQ",),
+    "scenarios:scenario_list": ("scenarios.Scenario",),
+}
+
+# Rendered into every page by the header, footer and context processor
+SHARED_DEPENDENCIES = ("pages.SiteSettings",)
+
+
+def _version_key(page):
+    return f"page-cache:{page}:version"
+
+
+def _counter_key(page, outcome):
+    return f"page-cache:{page}:{outcome}"
+
+
+def _count(page, outcome):
+    key = _counter_key(page, outcome)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def _page_key(request, query_params):
+    """The path and the allowed query parameters, in a fixed order"""
+    query = "&".join(
+        f"{name}={value}"
+        for name in sorted(query_params)
+        for value in request.GET.getlist(name)
+    )
+    return sha256(f"{request.path}?{query}".encode()).hexdigest()[:32]
+
+
+def _cacheable(request):
+    return (
+        request.method in ("GET", "HEAD")
+        and not len(messages.get_messages(request))
+    )
+
+
+def cache_shared_page(page, timeout=None, query_params=()):
+    """Serve a view's response from the cache, to every visitor.
+
+    ``page`` is the view's URL name, which must be in PAGE_DEPENDENCIES.
+    Only successful responses that set no cookies of their own are stored;
+    a view that needs the CSRF cookie should be wrapped in
+    ensure_csrf_cookie outside this decorator and read the token from the
+    cookie, since a rendered token belongs to one visitor. ``timeout``
+    defaults to PAGE_CACHE_TIMEOUT.
+
+    ``query_params`` names the query parameters that change the page; the
+    view must not read any other, since every value of those is served the
+    same copy.
+    """
+    if page not in PAGE_DEPENDENCIES:
+        raise ValueError(f"{page} has no entry in PAGE_DEPENDENCIES")
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not _cacheable(request):
+                return view(request, *args, **kwargs)
+
+            version = cache.get(_version_key(page))
+            if version is None:
+                cache.add(_version_key(page), uuid4().hex, None)
+                version = cache.get(_version_key(page))
+            key = f"page-cache:{page}:{version}:{_page_key(request, query_params)}"
+
+            cached = cache.get(key)
+            if cached is not None:
+                _count(page, "hits")
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+
+            _count(page, "misses")
+            response = view(request, *args, **kwargs)
+            if (
+                request.method == "GET"
+                and response.status_code == 200
+                and not response.streaming
+                and not response.cookies
+            ):
+                cache.set(
+                    key,
+                    (response.content, response["Content-Type"]),
+                    settings.PAGE_CACHE_TIMEOUT if timeout is None else timeout,
+                )
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def invalidate_pages(model):
+    """Drop the cached copies of every page that renders ``model``"""
+    label = model._meta.label
+    for page, labels in PAGE_DEPENDENCIES.items():
+        if label in labels or label in SHARED_DEPENDENCIES:
+            cache.set(_version_key(page), uuid4().hex, None)
+
+
+def page_cache_stats():
+    """Hit and miss counts of each cached page since the counters were reset"""
+    keys = [
+        _counter_key(page, outcome)
+        for page in PAGE_DEPENDENCIES
+        for outcome in ("hits", "misses")
+    ]
+    counts = cache.get_many(keys)
+    return {
+        page: {
+            outcome: counts.get(_counter_key(page, outcome), 0)
+            for outcome in ("hits", "misses")
+        }
+        for page in PAGE_DEPENDENCIES
+    }
+
+
+def reset_page_cache_stats():
+    cache.delete_many(
+        [
+            _counter_key(page, outcome)
+            for page in PAGE_DEPENDENCIES
+            for outcome in ("hits", "misses")
+        ]
+    )
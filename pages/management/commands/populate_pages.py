@@ -111,17 +111,9 @@ class Command(BaseCommand):
         self.stdout.write(self.style.SUCCESS(f"{action} Site Settings"))
 
     def create_statistics(self):
-        """Create or update site statistics"""
-        stats, created = SiteStatistics.objects.get_or_create(pk=1)
-
-        stats.total_students = 12000
-        stats.total_lessons = 45
-        stats.total_scenarios = 28
-        stats.certificates_issued = 8500
-        stats.save()
-
-        action = "Created" if created else "Updated"
-        self.stdout.write(self.style.SUCCESS(f"{action} Site Statistics"))
+        """Count site statistics from the database"""
+        counts = SiteStatistics.reconcile()
+        self.stdout.write(self.style.SUCCESS(f"Counted Site Statistics: {counts}"))
 
     def create_faqs(self):
         """Create FAQ entries"""
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from pages.models import SiteStatistics
+
+
+class Command(BaseCommand):
+    help = "Recount the site statistics and replace their counter shards"
+
+    def handle(self, *args, **options):
+        before = SiteStatistics.get_stats()
+        counts = SiteStatistics.reconcile()
+        for counter, count in counts.items():
+            self.stdout.write(f"  {counter}: {getattr(before, counter)} -> {count}")
+        self.stdout.write(self.style.SUCCESS("Site statistics reconciled"))
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='sitestatistics',
+            options={'ordering': ['shard'], 'verbose_name': 'Site Statistics', 'verbose_name_plural': 'Site Statistics'},
+        ),
+        migrations.AddField(
+            model_name='sitestatistics',
+            name='shard',
+            field=models.PositiveSmallIntegerField(default=0, unique=True),
+        ),
+    ]
@@ -0,0 +1,40 @@
+from django.db import migrations
+
+
+def count_site_statistics(apps, schema_editor):
+    """Set the statistics to counts of the source tables.
+
+    The rows seeded before sharding, if any, are replaced too; shard 0
+    holds the counts and the other shards start from zero.
+    """
+    User = apps.get_model('auth', 'User')
+    ParentProfile = apps.get_model('accounts', 'ParentProfile')
+    Lesson = apps.get_model('lessons', 'Lesson')
+    Certificate = apps.get_model('lessons', 'Certificate')
+    Scenario = apps.get_model('scenarios', 'Scenario')
+    SiteStatistics = apps.get_model('pages', 'SiteStatistics')
+
+    counts = {
+        'total_students': User.objects.filter(is_staff=False)
+        .exclude(id__in=ParentProfile.objects.values('user_id'))
+        .count(),
+        'total_lessons': Lesson.objects.filter(is_active=True).count(),
+        'total_scenarios': Scenario.objects.filter(is_active=True).count(),
+        'certificates_issued': Certificate.objects.count(),
+    }
+    SiteStatistics.objects.exclude(shard=0).update(**{counter: 0 for counter in counts})
+    SiteStatistics.objects.update_or_create(shard=0, defaults=counts)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0002_site_statistics_shards'),
+        ('accounts', '0006_profile_progress_generation'),
+        ('lessons', '0003_progress_keyed_by_lesson_id'),
+        ('scenarios', '0006_scenario_config'),
+    ]
+
+    operations = [
+        migrations.RunPython(count_site_statistics, migrations.RunPython.noop),
+    ]
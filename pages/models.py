@@ -1,8 +1,80 @@
+import random
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
 from django.db import models
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.contrib.auth.models import User
 
+from bizventure_kids.db import write_atomic
+
+
+class SingletonModel(models.Model):
+    """Abstract base for single-row models read on every request.
+
+    load() keeps the row in the shared cache under a version key, and each
+    process keeps its own copy of the version it last loaded, so a request
+    costs one read of the version. Saving or deleting the row bumps the
+    version, so every process reloads. The version also expires after
+    CONTENT_CACHE_TIMEOUT, which bounds how long a copy is used after a
+    missed invalidation.
+    """
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        # Ensure only one instance exists
+        self.pk = 1
+        super().save(*args, **kwargs)
+        type(self).invalidate()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        type(self).invalidate()
+        return result
+
+    @classmethod
+    def version_cache_key(cls):
+        return f"singleton:{cls._meta.label_lower}:version"
+
+    @classmethod
+    def instance_cache_key(cls):
+        version = cache.get(cls.version_cache_key())
+        if version is None:
+            cache.add(cls.version_cache_key(), uuid4().hex, settings.CONTENT_CACHE_TIMEOUT)
+            version = cache.get(cls.version_cache_key())
+        return f"singleton:{cls._meta.label_lower}:{version}"
+
+    @classmethod
+    def load(cls):
+        key = cls.instance_cache_key()
+        local = _local_singletons.get(cls)
+        if local is not None and local[0] == key:
+            return local[1]
+        obj = cache.get(key)
+        if obj is None:
+            obj, created = cls.objects.get_or_create(pk=1)
+            if created:
+                # Saving the new row bumped the version
+                key = cls.instance_cache_key()
+            cache.set(key, obj, settings.CONTENT_CACHE_TIMEOUT)
+        _local_singletons[cls] = (key, obj)
+        return obj
+
+    @classmethod
+    def invalidate(cls):
+        cache.set(cls.version_cache_key(), uuid4().hex, settings.CONTENT_CACHE_TIMEOUT)
+
+
+# This process's copy of each singleton, as (instance cache key, object)
+_local_singletons = {}
+
 
-class SiteSettings(models.Model):
+class SiteSettings(SingletonModel):
     """Singleton model for site-wide settings"""
 
     site_name = models.CharField(max_length=100, default="BizVenture Kids")
@@ -34,15 +106,9 @@ class SiteSettings(models.Model):
     def __str__(self):
         return self.site_name
 
-    def save(self, *args, **kwargs):
-        # Ensure only one instance exists
-        self.pk = 1
-        super().save(*args, **kwargs)
-
     @classmethod
     def get_settings(cls):
-        obj, created = cls.objects.get_or_create(pk=1)
-        return obj
+        return cls.load()
 
 
 class TeamMember(models.Model):
@@ -128,8 +194,22 @@ class Testimonial(models.Model):
 
 
 class SiteStatistics(models.Model):
-    """Site statistics shown on homepage"""
-
+    """Site statistics shown on the home and about pages.
+
+    Each counter is spread over SHARDS rows so concurrent writers, such as
+    certificates being issued, update different rows. The write paths call
+    increment(); get_stats() sums the shards and caches the result, and
+    reconcile() recomputes exact counts from the source tables. Bulk updates
+    skip the receivers that increment, so the reconcile_site_statistics
+    command is meant to run on a schedule. Increments don't invalidate the
+    cached pages; they expire with the totals instead.
+    """
+
+    SHARDS = 8
+    COUNTERS = ["total_students", "total_lessons", "total_scenarios", "certificates_issued"]
+    CACHE_KEY = "site-statistics"
+
+    shard = models.PositiveSmallIntegerField(unique=True, default=0)
     total_students = models.IntegerField(default=0)
     total_lessons = models.IntegerField(default=0)
     total_scenarios = models.IntegerField(default=0)
@@ -137,20 +217,57 @@ class SiteStatistics(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
+        ordering = ["shard"]
         verbose_name = "Site Statistics"
         verbose_name_plural = "Site Statistics"
 
     def __str__(self):
-        return f"Statistics - Updated {self.updated_at}"
-
-    def save(self, *args, **kwargs):
-        self.pk = 1
-        super().save(*args, **kwargs)
+        return f"Statistics shard {self.shard}"
 
     @classmethod
     def get_stats(cls):
-        obj, created = cls.objects.get_or_create(pk=1)
-        return obj
+        """An unsaved instance holding the totals of all shards"""
+        totals = cache.get(cls.CACHE_KEY)
+        if totals is None:
+            sums = cls.objects.aggregate(
+                **{counter: models.Sum(counter) for counter in cls.COUNTERS}
+            )
+            totals = {counter: sums[counter] or 0 for counter in cls.COUNTERS}
+            cache.set(cls.CACHE_KEY, totals, settings.SITE_STATISTICS_TIMEOUT)
+        return cls(**totals)
+
+    @classmethod
+    def increment(cls, counter, delta=1):
+        """Atomically add ``delta`` to a counter on a random shard"""
+        shard = random.randrange(cls.SHARDS)
+        change = {counter: F(counter) + delta}
+        if not cls.objects.filter(shard=shard).update(**change):
+            cls.objects.get_or_create(shard=shard)
+            cls.objects.filter(shard=shard).update(**change)
+
+    @classmethod
+    def reconcile(cls):
+        """Replace the shards with exact counts. Returns the counts."""
+        from accounts.models import ParentProfile
+        from lessons.models import Certificate, Lesson
+        from scenarios.models import Scenario
+
+        with write_atomic():
+            counts = {
+                "total_students": User.objects.filter(is_staff=False)
+                .exclude(id__in=ParentProfile.objects.values("user_id"))
+                .count(),
+                "total_lessons": Lesson.objects.filter(is_active=True).count(),
+                "total_scenarios": Scenario.objects.filter(is_active=True).count(),
+                "certificates_issued": Certificate.objects.count(),
+            }
+            cls.objects.exclude(shard=0).update(**{counter: 0 for counter in cls.COUNTERS})
+            cls.objects.update_or_create(shard=0, defaults=counts)
+
+        cache.delete(cls.CACHE_KEY)
+        from .cache import invalidate_pages
+        invalidate_pages(cls)
+        return counts
 
 
 class Offer(models.Model):
@@ -174,3 +291,49 @@ class Offer(models.Model):
 
     def __str__(self):
         return self.name
+
+
+@receiver(post_save, sender=SiteSettings)
+@receiver(post_delete, sender=SiteSettings)
+@receiver(post_save, sender=TeamMember)
+@receiver(post_delete, sender=TeamMember)
+@receiver(post_save, sender=FAQ)
+@receiver(post_delete, sender=FAQ)
+@receiver(post_save, sender=Testimonial)
+@receiver(post_delete, sender=Testimonial)
+@receiver(post_save, sender=Offer)
+@receiver(post_delete, sender=Offer)
+def page_content_changed(sender, **kwargs):
+    from .cache import invalidate_pages
+    invalidate_pages(sender)
+
+
+# User fields the about page shows for team members
+TEAM_MEMBER_USER_FIELDS = {"first_name", "last_name"}
+TEAM_MEMBER_USERS_CACHE_KEY = "pages:team-member-users"
+
+
+def team_member_user_ids():
+    """Ids of the users with a TeamMember profile, cached"""
+    user_ids = cache.get(TEAM_MEMBER_USERS_CACHE_KEY)
+    if user_ids is None:
+        user_ids = frozenset(TeamMember.objects.values_list("user_id", flat=True))
+        cache.set(TEAM_MEMBER_USERS_CACHE_KEY, user_ids, settings.CONTENT_CACHE_TIMEOUT)
+    return user_ids
+
+
+@receiver(post_save, sender=TeamMember)
+@receiver(post_delete, sender=TeamMember)
+def team_member_changed(sender, **kwargs):
+    cache.delete(TEAM_MEMBER_USERS_CACHE_KEY)
+
+
+@receiver(post_save, sender=User)
+def team_member_user_changed(sender, instance, created, update_fields=None, **kwargs):
+    # Logins and password changes save other fields, and a new user
+    # can't be a team member yet
+    if created or (update_fields and not TEAM_MEMBER_USER_FIELDS & set(update_fields)):
+        return
+    if instance.pk in team_member_user_ids():
+        from .cache import invalidate_pages
+        invalidate_pages(TeamMember)
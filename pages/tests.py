@@ -1,3 +1,225 @@
-from django.test import TestCase
+from importlib import import_module
+from io import StringIO
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .cache import cache_shared_page, page_cache_stats, reset_page_cache_stats
+from .models import FAQ, ContactMessage, SiteSettings, SiteStatistics, TeamMember
+
+
+class SingletonCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_settings_are_served_without_queries_once_loaded(self):
+        SiteSettings.get_settings()
+        with self.assertNumQueries(0):
+            SiteSettings.get_settings()
+
+        self.client.get(reverse("pages:about"))
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("pages:about"))
+        self.assertFalse(
+            [q for q in queries.captured_queries if "pages_sitesettings" in q["sql"]]
+        )
+
+    def test_processes_keep_their_copy_while_the_version_holds(self):
+        loaded = SiteSettings.get_settings()
+        # Only the version is read from the shared cache
+        cache.delete(SiteSettings.instance_cache_key())
+        with self.assertNumQueries(0):
+            self.assertIs(SiteSettings.get_settings(), loaded)
+
+        SiteSettings.invalidate()
+        self.assertIsNot(SiteSettings.get_settings(), loaded)
+
+    def test_save_invalidates_cached_instance(self):
+        settings = SiteSettings.get_settings()
+
+        settings.site_name = "Renamed"
+        settings.save()
+
+        self.assertEqual(SiteSettings.get_settings().site_name, "Renamed")
+
+
+class SiteStatisticsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def counts(self):
+        cache.delete(SiteStatistics.CACHE_KEY)
+        stats = SiteStatistics.get_stats()
+        return [getattr(stats, counter) for counter in SiteStatistics.COUNTERS]
+
+    def test_shards_are_summed_and_cached(self):
+        # Shard 0 is created by the migrations
+        SiteStatistics.objects.filter(shard=0).update(total_students=3, certificates_issued=1)
+        SiteStatistics.objects.create(shard=5, total_students=4, total_lessons=2)
+
+        self.assertEqual(SiteStatistics.get_stats().total_students, 7)
+        SiteStatistics.objects.filter(shard=5).update(total_students=10)
+        with self.assertNumQueries(0):
+            self.assertEqual(SiteStatistics.get_stats().total_students, 7)
+        self.assertEqual(self.counts(), [13, 2, 0, 1])
+
+    def test_write_paths_keep_the_counts(self):
+        from accounts.models import ParentProfile
+        from lessons.models import Certificate, LearningPath, Lesson
+
+        student = User.objects.create_user("student", password="x")
+        parent = User.objects.create_user("parent", password="x")
+        User.objects.create_user("staff", password="x", is_staff=True)
+        ParentProfile.objects.create(user=parent)
+        path = LearningPath.objects.create(title="Path", description="", total_duration=10)
+        lesson = Lesson.objects.create(
+            path=path, title="Lesson", description="", icon="💰", duration=10,
+            is_active=False,
+        )
+        Certificate.objects.create(user=student, path=path, certificate_number="C-1")
+        self.assertEqual(self.counts(), [1, 0, 0, 1])
+
+        lesson.is_active = True
+        lesson.save()
+        lesson.save()
+        self.assertEqual(self.counts(), [1, 1, 0, 1])
+
+        lesson.delete()
+        parent.parent_profile.delete()
+        self.assertEqual(self.counts(), [2, 0, 0, 1])
+        self.assertEqual(SiteStatistics.reconcile(), dict(zip(SiteStatistics.COUNTERS, [2, 0, 0, 1])))
+
+    def test_migration_counts_without_seeded_rows(self):
+        seed = import_module("pages.migrations.0003_seed_site_statistics")
+        User.objects.create_user("student", password="x")
+        User.objects.create_user("staff", password="x", is_staff=True)
+        SiteStatistics.objects.all().delete()
+
+        seed.count_site_statistics(apps, None)
+
+        self.assertEqual(
+            list(SiteStatistics.objects.values_list("shard", *SiteStatistics.COUNTERS)),
+            [(0, 1, 0, 0, 0)],
+        )
+
+    def test_reconcile_replaces_drifted_shards(self):
+        User.objects.create_user("student", password="x")
+        SiteStatistics.objects.update_or_create(shard=3, defaults={"total_students": 500})
+        SiteStatistics.get_stats()
+
+        call_command("reconcile_site_statistics", stdout=StringIO())
+
+        self.assertEqual(SiteStatistics.get_stats().total_students, 1)
+        self.assertEqual(SiteStatistics.objects.get(shard=0).total_students, 1)
+        self.assertFalse(
+            SiteStatistics.objects.exclude(shard=0).exclude(total_students=0).exists()
+        )
+
+
+class SharedPageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        # Created on first use, which would invalidate the first render
+        SiteSettings.get_settings()
+        SiteStatistics.get_stats()
+        reset_page_cache_stats()
+
+    def test_repeat_visits_are_served_without_queries(self):
+        for name in ("pages:index", "pages:about", "pages:contact"):
+            self.client.get(reverse(name))
+            with self.assertNumQueries(0):
+                response = self.client.get(reverse(name))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(page_cache_stats()[name], {"hits": 1, "misses": 1})
+
+    def test_unknown_query_parameters_share_the_cached_page(self):
+        self.client.get(reverse("pages:index"))
+        for query in ("?utm_source=ad", "?utm_source=mail&_=1", "?page=2"):
+            with self.assertNumQueries(0):
+                self.client.get(reverse("pages:index") + query)
+        self.assertEqual(page_cache_stats()["pages:index"], {"hits": 3, "misses": 1})
+
+    def test_allowed_query_parameters_get_their_own_copy(self):
+        view = cache_shared_page("pages:contact", query_params=("page",))(
+            lambda request: HttpResponse(request.GET.get("page", "1"))
+        )
+        factory = RequestFactory()
+
+        self.assertEqual(view(factory.get("/contact/?page=2")).content, b"2")
+        self.assertEqual(view(factory.get("/contact/?utm_source=ad&page=2")).content, b"2")
+        self.assertEqual(view(factory.get("/contact/?page=3")).content, b"3")
+        self.assertEqual(view(factory.get("/contact/")).content, b"1")
+        self.assertEqual(page_cache_stats()["pages:contact"], {"hits": 1, "misses": 3})
+
+    def test_saving_content_invalidates_only_pages_showing_it(self):
+        self.client.get(reverse("pages:index"))
+        self.client.get(reverse("pages:contact"))
+
+        FAQ.objects.create(
+            question="Q", question_ar="سؤال جديد", answer="A", answer_ar="جواب"
+        )
+
+        self.assertContains(self.client.get(reverse("pages:contact")), "سؤال جديد")
+        with self.assertNumQueries(0):
+            self.client.get(reverse("pages:index"))
+
+    def test_user_saves_invalidate_about_page_only_for_team_member_names(self):
+        member = User.objects.create_user("mona", first_name="Mona")
+        TeamMember.objects.create(user=member, position="Coach", position_ar="مدربة")
+        other = User.objects.create_user("omar", first_name="Omar")
+        self.client.get(reverse("pages:about"))
+
+        # A login saves last_login only
+        with self.assertNumQueries(1):
+            member.save(update_fields=["last_login"])
+        other.first_name = "Omer"
+        other.save()
+        with self.assertNumQueries(0):
+            self.client.get(reverse("pages:about"))
+
+        member.first_name = "Muna"
+        member.save(update_fields=["first_name"])
+        self.assertContains(self.client.get(reverse("pages:about")), "Muna")
+
+    def test_contact_page_does_not_cache_a_csrf_token(self):
+        response = self.client.get(reverse("pages:contact"))
+        self.assertIn("csrftoken", response.cookies)
+        self.assertNotContains(response, response.cookies["csrftoken"].value)
+
+        client = Client(enforce_csrf_checks=True)
+        client.get(reverse("pages:contact"))
+        response = client.post(
+            reverse("pages:contact"),
+            {
+                "name": "Sara",
+                "email": "sara@example.com",
+                "subject": "Hi",
+                "message": "Hello",
+                "csrfmiddlewaretoken": client.cookies["csrftoken"].value,
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(ContactMessage.objects.exists())
+
+    def test_pending_messages_bypass_the_cache(self):
+        self.client.get(reverse("pages:contact"))
+        response = self.client.post(reverse("pages:contact"), {}, follow=True)
+        self.assertContains(response, "جميع الحقول مطلوبة!")
+        self.assertEqual(page_cache_stats()["pages:contact"], {"hits": 0, "misses": 1})
+
+    def test_signed_in_users_share_the_cached_page(self):
+        self.client.get(reverse("pages:index"))
+        self.client.force_login(User.objects.create_user("sara_k", password="pass"))
+
+        response = self.client.get(reverse("pages:index"))
+
+        self.assertNotContains(response, "sara_k")
+        self.assertContains(response, reverse("accounts:header"))
+        self.assertEqual(page_cache_stats()["pages:index"], {"hits": 1, "misses": 1})
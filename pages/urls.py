@@ -7,4 +7,5 @@ urlpatterns = [
     path('', views.index, name='index'),
     path('about/', views.about, name='about'),
     path('contact/', views.contact, name='contact'),
+    path('page-cache-stats/', views.page_cache_statistics, name='page_cache_stats'),
 ]
\ No newline at end of file
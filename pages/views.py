@@ -1,5 +1,11 @@
+from django.conf import settings
 from django.shortcuts import render, redirect
 from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+from django.views.decorators.cache import never_cache
+from django.views.decorators.csrf import ensure_csrf_cookie
+from .cache import cache_shared_page, page_cache_stats, reset_page_cache_stats
 from .models import (
     ContactMessage,
     FAQ,
@@ -10,6 +16,7 @@ from .models import (
 )
 
 
+@cache_shared_page("pages:index", timeout=settings.SITE_STATISTICS_TIMEOUT)
 def index(request):
     """Home page view"""
     statistics = SiteStatistics.get_stats()
@@ -24,6 +31,7 @@ def index(request):
     return render(request, "pages/home-ar.html", context)
 
 
+@cache_shared_page("pages:about", timeout=settings.SITE_STATISTICS_TIMEOUT)
 def about(request):
     """About page view"""
     team_members = TeamMember.objects.filter(is_active=True).select_related("user")
@@ -36,8 +44,14 @@ def about(request):
     return render(request, "pages/about-ar.html", context)
 
 
+@ensure_csrf_cookie
+@cache_shared_page("pages:contact")
 def contact(request):
-    """Contact page view"""
+    """Contact page view.
+
+    The form takes its CSRF token from the cookie when submitted, so the
+    page can be cached for every visitor.
+    """
     if request.method == "POST":
         name = request.POST.get("name", "").strip()
         email = request.POST.get("email", "").strip()
@@ -61,3 +75,17 @@ def contact(request):
         "faqs": faqs,
     }
     return render(request, "pages/contact-ar.html", context)
+
+
+@never_cache
+@staff_member_required
+def page_cache_statistics(request):
+    """Hit and miss counts of the shared page cache, for staff.
+
+    The counters live in the cache, so with a per-process backend they
+    cover the process that answers. POST resets them.
+    """
+    stats = page_cache_stats()
+    if request.method == "POST":
+        reset_page_cache_stats()
+    return JsonResponse(stats)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Scenario, UserScenario
+from .models import Scenario, ScenarioSubmission, UserScenario
 
 
 @admin.register(Scenario)
@@ -27,6 +27,7 @@ class ScenarioAdmin(admin.ModelAdmin):
         ),
         ("الإحصائيات", {"fields": ("capital", "duration", "age_range")}),
         ("المكافآت", {"fields": ("points_reward", "coins_reward")}),
+        ("اللعبة", {"fields": ("config",)}),
         ("الإعدادات", {"fields": ("is_active", "order")}),
     )
 
@@ -43,3 +44,20 @@ class UserScenarioAdmin(admin.ModelAdmin):
         ("المعلومات", {"fields": ("user", "scenario", "status", "score")}),
         ("التواريخ", {"fields": ("started_at", "completed_at")}),
     )
+
+
+@admin.register(ScenarioSubmission)
+class ScenarioSubmissionAdmin(admin.ModelAdmin):
+    list_display = [
+        "user",
+        "scenario",
+        "status",
+        "claimed_score",
+        "score",
+        "rejection_reason",
+        "created_at",
+    ]
+    list_filter = ["status", "scenario", "created_at"]
+    search_fields = ["user__username", "scenario__title"]
+    readonly_fields = ["created_at", "verified_at"]
+    date_hierarchy = "created_at"
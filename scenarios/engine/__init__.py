@@ -0,0 +1,40 @@
+"""Server-side simulation of the scenario games.
+
+Each game's day loop is described by a ScenarioModel (see catalog.py) and
+run by simulate(), which plays many seeded runs at once with NumPy.
+"""
+
+from .catalog import MODELS, default_config, get_model
+from .config import InvalidConfig, model_from_config, model_to_config
+from .model import (
+    Condition,
+    Option,
+    OptionGroup,
+    PriceBand,
+    Product,
+    QualityBand,
+    Reputation,
+    ScenarioModel,
+)
+from .simulate import Decisions, SimulationResult, simulate, uniforms
+
+__all__ = [
+    "MODELS",
+    "Condition",
+    "Decisions",
+    "InvalidConfig",
+    "Option",
+    "OptionGroup",
+    "PriceBand",
+    "Product",
+    "QualityBand",
+    "Reputation",
+    "ScenarioModel",
+    "SimulationResult",
+    "default_config",
+    "get_model",
+    "model_from_config",
+    "model_to_config",
+    "simulate",
+    "uniforms",
+]
@@ -0,0 +1,105 @@
+"""Monte Carlo balancing: play scenarios with scripted strategies.
+
+A sweep runs every strategy against every combination of parameter
+scales, each over many seeds, and summarizes the distribution of results.
+"""
+
+from dataclasses import replace
+
+import numpy as np
+
+from .simulate import Decisions, simulate
+
+# Per strategy: share of expected demand bought, price as a multiple of
+# the base price, quality setting, and which option of each group is taken.
+STRATEGIES = {
+    "cautious": {"stock": 0.5, "price": 1.0, "quality": 0.5, "option": "first"},
+    "balanced": {"stock": 1.0, "price": 1.1, "quality": 0.5, "option": "middle"},
+    "aggressive": {"stock": 2.0, "price": 1.3, "quality": 0.8, "option": "last"},
+    "discount": {"stock": 1.5, "price": 0.8, "quality": 0.5, "option": "first"},
+    "random": None,
+}
+
+PERCENTILES = [10, 50, 90]
+
+
+def scale_model(model, capital=1.0, cost=1.0, demand=1.0):
+    """A copy of a model with starting cash, unit costs and demand scaled"""
+    low, high = model.customers
+    return replace(
+        model,
+        starting_cash=model.starting_cash * capital,
+        products=tuple(
+            replace(product, unit_cost=product.unit_cost * cost) for product in model.products
+        ),
+        customers=(low * demand, high * demand),
+        stock_sell_rate=model.stock_sell_rate * demand,
+    )
+
+
+def strategy_decisions(model, strategy, runs, seed=0):
+    """Decisions for ``runs`` plays of a model with a named strategy.
+
+    'random' draws purchases, prices and quality independently per run and
+    day, and options once per run, from a generator seeded with ``seed``.
+    """
+    days, groups = model.days, len(model.option_groups)
+    base_price = np.array([product.base_price for product in model.products])
+    weight = np.array([product.demand_weight for product in model.products])
+    low, high = model.customers
+    # Units a day of average customers would ask for, or a shelf's worth
+    # for games where stock itself draws customers.
+    expected = np.ceil(((low + high) / 2 or 10) * weight)
+
+    profile = STRATEGIES[strategy]
+    if profile is None:
+        rng = np.random.default_rng(seed)
+        return Decisions(
+            purchases=rng.integers(0, 2 * expected + 1, (runs, days, len(weight))),
+            prices=base_price * rng.uniform(0.7, 1.5, (runs, days, len(weight))),
+            quality=rng.uniform(0, 1, (runs, days)),
+            options=np.stack(
+                [
+                    np.broadcast_to(rng.integers(len(group.options), size=(runs, 1)), (runs, days))
+                    for group in model.option_groups
+                ],
+                axis=-1,
+            )
+            if groups
+            else 0,
+        )
+
+    option = {
+        "first": lambda count: 0,
+        "middle": lambda count: count // 2,
+        "last": lambda count: count - 1,
+    }[profile["option"]]
+    return Decisions(
+        purchases=np.ceil(expected * profile["stock"]),
+        prices=np.round(base_price * profile["price"], 2),
+        quality=profile["quality"],
+        options=[option(len(group.options)) for group in model.option_groups] if groups else 0,
+    )
+
+
+def summarize(result):
+    """Distribution statistics of a SimulationResult"""
+    profit = np.percentile(result.total_profit, PERCENTILES)
+    score = np.percentile(result.score, PERCENTILES)
+    return {
+        "runs": len(result.total_profit),
+        "profit_mean": float(result.total_profit.mean()),
+        "profit_std": float(result.total_profit.std()),
+        "profit_percentiles": dict(zip(PERCENTILES, profit.tolist())),
+        "bankruptcy_rate": float(result.bankrupt.mean()),
+        "score_mean": float(result.score.mean()),
+        "score_percentiles": dict(zip(PERCENTILES, score.tolist())),
+    }
+
+
+def run_sweep_cell(model, strategy, scales, runs, seed):
+    """Play one (model, strategy, scales) cell of a sweep and summarize it"""
+    scaled = scale_model(model, **scales)
+    seeds = np.arange(seed, seed + runs, dtype=np.int64)
+    result = simulate(scaled, strategy_decisions(scaled, strategy, runs, seed), seeds)
+    return summarize(result)
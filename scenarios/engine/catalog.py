@@ -0,0 +1,526 @@
+"""Scenario models, with parameters taken from the games' templates.
+
+Games whose loop doesn't fit the shared day model exactly (the multi-week
+farm and the one-shot service planners) are approximated day by day with
+the same costs, prices and multipliers.
+"""
+
+from math import inf
+
+from .config import model_to_config
+from .model import (
+    Condition,
+    Option,
+    OptionGroup,
+    PriceBand,
+    Product,
+    QualityBand,
+    Reputation,
+    ScenarioModel,
+)
+
+# Arabic display names for the model's products, conditions and options
+LABELS = {
+    "adjacent": "الحي المجاور",
+    "area": "منطقة العمل",
+    "art_sets": "أدوات الرسم",
+    "back_to_school": "العودة للمدارس",
+    "backpacks": "حقائب الظهر",
+    "balanced": "متوازن",
+    "ball": "كرة",
+    "basic": "أساسي",
+    "binders": "ملفات",
+    "birthdays": "أعياد الميلاد",
+    "bracelets": "أساور",
+    "buyget": "اشترِ واحدة واحصل على أخرى",
+    "calculators": "آلات حاسبة",
+    "candles": "شموع",
+    "chocolate": "شوكولاتة",
+    "cloudy": "غائم",
+    "conventional": "تقليدية",
+    "cream": "كريمة",
+    "cupcake": "كب كيك",
+    "decoration": "الزينة",
+    "deluxe": "فاخر",
+    "discount10": "خصم 10%",
+    "doll": "دمية",
+    "drawing_board": "لوح رسم",
+    "driveway": "تنظيف ممر",
+    "dry": "جاف",
+    "equipment": "المعدات",
+    "erasers": "ممحاة",
+    "extended": "منطقة واسعة",
+    "featured": "منتج مميز",
+    "flavor": "النكهة",
+    "flyers": "منشورات",
+    "fruits": "فواكه",
+    "full": "شامل",
+    "good": "جيد",
+    "graduations": "حفلات التخرج",
+    "grooming": "تنظيف وتجميل",
+    "heavy": "ثلوج كثيفة",
+    "heavy_rain": "أمطار غزيرة",
+    "holiday": "موسم الأعياد",
+    "holidays": "العطلات",
+    "home": "من المنزل",
+    "hydroponic": "زراعة مائية",
+    "insurance": "التأمين",
+    "keychains": "ميداليات مفاتيح",
+    "lego": "مكعبات ليغو",
+    "lemon": "ليمون",
+    "lemonade": "ليموناضة",
+    "lettuce": "خس",
+    "light": "ثلوج خفيفة",
+    "location": "الموقع",
+    "mall": "المول",
+    "mall_kiosk": "كشك في المول",
+    "marketing": "التسويق",
+    "marketplace": "متجر إلكتروني عام",
+    "method": "طريقة الزراعة",
+    "mild": "معتدل",
+    "moderate": "ثلوج متوسطة",
+    "near_school": "قرب المدرسة",
+    "neighborhood": "الحي",
+    "no_snow": "بدون ثلوج",
+    "none": "بدون",
+    "normal": "عادي",
+    "notebooks": "دفاتر",
+    "offer": "العرض",
+    "online": "أونلاين",
+    "organic": "عضوية",
+    "overnight": "مبيت",
+    "own": "شارعي",
+    "own_site": "موقعي الخاص",
+    "packed": "مزدحم",
+    "paintings": "لوحات",
+    "parties": "الحفلات",
+    "partly_cloudy": "غائم جزئياً",
+    "partnership": "شراكة",
+    "pencils": "أقلام رصاص",
+    "perfect": "مثالي",
+    "pests": "آفات",
+    "platform": "منصة البيع",
+    "premium": "ممتاز",
+    "professional": "احترافي",
+    "pumpkins": "يقطين",
+    "quiet": "هادئ",
+    "rain": "ممطر",
+    "rainy": "ممطر",
+    "relaxed": "مريح",
+    "robot": "روبوت",
+    "rush": "ذروة",
+    "schedule": "جدول العمل",
+    "shopping_center": "مركز تسوق",
+    "slow": "بطيء",
+    "slowing": "يتباطأ",
+    "social": "وسائل التواصل",
+    "social_shop": "متجر على وسائل التواصل",
+    "sprinkles": "حلوى ملونة",
+    "standard": "قياسي",
+    "steady": "مستقر",
+    "strawberries": "فراولة",
+    "strawberry": "فراولة",
+    "street": "الشارع",
+    "summer": "الصيف",
+    "sunny": "مشمس",
+    "tomatoes": "طماطم",
+    "toy_car": "سيارة لعبة",
+    "ultimate": "الشامل",
+    "vanilla": "فانيليا",
+    "visits": "زيارات",
+    "walking": "تمشية",
+    "wealthy": "حي راقٍ",
+    "weddings": "الأعراس",
+}
+
+SUNNY_LEMONADE_WEATHER = (
+    Condition("sunny", 1.5),
+    Condition("partly_cloudy", 1.0),
+    Condition("rainy", 0.5),
+    Condition("mild", 1.2),
+)
+
+MODELS = {
+    model.slug: model
+    for model in [
+        ScenarioModel(
+            slug="summer-lemonade-stand",
+            starting_cash=50,
+            days=10,
+            # One lemon, sugar, cup and ice per cup
+            products=(Product("lemonade", unit_cost=1.10, base_price=1.00),),
+            conditions=SUNNY_LEMONADE_WEATHER,
+            customers=(20, 30),
+            price_bands=(PriceBand(0.75, 1.3), PriceBand(1.25, 1.0), PriceBand(inf, 0.7)),
+            quality_bands=(
+                QualityBand(0.45, 0.55, demand=1.2, reputation=0.1),
+                QualityBand(0.30, 0.70),
+                QualityBand(0.0, 1.0, demand=0.8, reputation=-0.1),
+            ),
+            reputation=Reputation(demand_elasticity=1.0),
+            target_profit=30,
+        ),
+        ScenarioModel(
+            slug="lemon-tycoon",
+            starting_cash=50,
+            days=10,
+            # 2 lemons, 2 sugar, 1 cup and 3 ice per cup
+            products=(Product("lemonade", unit_cost=0.21, base_price=1.00),),
+            conditions=(
+                Condition("sunny", 1.5),
+                Condition("partly_cloudy", 1.2),
+                Condition("cloudy", 0.9),
+                Condition("rainy", 0.5),
+            ),
+            customers=(30, 80),
+            price_bands=(PriceBand(0.75, 1.3), PriceBand(1.25, 1.0), PriceBand(inf, 0.6)),
+            quality_bands=(
+                QualityBand(0.45, 0.55, demand=1.2, reputation=0.1),
+                QualityBand(0.25, 0.75),
+                QualityBand(0.0, 1.0, demand=0.7, reputation=-0.1),
+            ),
+            reputation=Reputation(fair_price_ratio=1.25, gouge_price_ratio=1.5),
+            target_profit=200,
+        ),
+        ScenarioModel(
+            slug="toy-store-tycoon",
+            starting_cash=100,
+            days=10,
+            products=(
+                Product("doll", unit_cost=5, base_price=12, demand_weight=1.5),
+                Product("toy_car", unit_cost=8, base_price=18, demand_weight=1.0),
+                Product("lego", unit_cost=15, base_price=35, demand_weight=1.5),
+                Product("ball", unit_cost=3, base_price=8, demand_weight=1.0),
+                Product("drawing_board", unit_cost=6, base_price=15, demand_weight=0.7),
+                Product("robot", unit_cost=20, base_price=45, demand_weight=1.0),
+            ),
+            conditions=(
+                Condition("holidays", 1.5),
+                Condition("summer", 1.2),
+                Condition("back_to_school", 1.0),
+                Condition("birthdays", 1.3),
+            ),
+            stock_sell_rate=0.6,
+            option_groups=(
+                OptionGroup(
+                    "location",
+                    (
+                        Option("mall", daily_cost=20, demand=1.3),
+                        Option("street", daily_cost=10),
+                        Option("online", daily_cost=5, demand=0.8),
+                    ),
+                ),
+                OptionGroup(
+                    "marketing",
+                    (
+                        Option("none"),
+                        Option("flyers", daily_cost=15, demand=1.2),
+                        Option("social", daily_cost=30, demand=1.4),
+                    ),
+                ),
+                OptionGroup(
+                    "offer",
+                    (
+                        Option("none"),
+                        Option("discount10", demand=1.25, price_factor=0.9),
+                        Option("buyget", demand=1.4),
+                    ),
+                ),
+            ),
+            reputation=Reputation(
+                initial=100, minimum=50, maximum=100, good_sales=16, poor_sales=5, sales_step=5
+            ),
+            target_profit=300,
+        ),
+        ScenarioModel(
+            slug="busy-bakery-boss",
+            starting_cash=75,
+            days=10,
+            # A dozen cupcakes use one each of flour, eggs, butter and sugar
+            products=(Product("cupcake", unit_cost=0.30, base_price=3.50),),
+            conditions=(
+                Condition("parties", 1.5),
+                Condition("weddings", 1.3),
+                Condition("birthdays", 1.2),
+                Condition("graduations", 1.4),
+            ),
+            stock_sell_rate=0.6,
+            spoilage=1.0,
+            price_bands=(PriceBand(0.6, 1.3), PriceBand(1.0, 1.0), PriceBand(inf, 0.8)),
+            quality_bands=(
+                QualityBand(0.0, 0.3, demand=0.9, reputation=-0.2),
+                QualityBand(0.3, 0.7),
+                QualityBand(0.7, 1.0, demand=1.1, reputation=0.2),
+            ),
+            option_groups=(
+                OptionGroup(
+                    "flavor",
+                    (
+                        Option("vanilla", demand=1.2),
+                        Option("chocolate", demand=1.3),
+                        Option("strawberry", demand=1.1),
+                        Option("lemon", demand=0.9),
+                    ),
+                ),
+                OptionGroup(
+                    "decoration",
+                    (
+                        Option("sprinkles"),
+                        Option("cream", demand=1.2),
+                        Option("fruits", demand=1.3),
+                        Option("chocolate", demand=1.1),
+                    ),
+                ),
+            ),
+            reputation=Reputation(minimum=3.0, step=0.2, demand_elasticity=1.0),
+            target_profit=250,
+        ),
+        ScenarioModel(
+            slug="farm-fresh-stand",
+            starting_cash=100,
+            days=8,
+            # Seed cost per plot divided by the plot's yield
+            products=(
+                Product("lettuce", unit_cost=0.50, base_price=3.25, demand_weight=1.0),
+                Product("tomatoes", unit_cost=0.40, base_price=2.50, demand_weight=1.2),
+                Product("pumpkins", unit_cost=3.00, base_price=13.50, demand_weight=0.3),
+                Product("strawberries", unit_cost=0.40, base_price=6.00, demand_weight=1.0),
+            ),
+            conditions=(
+                Condition("perfect", 1.2, weight=0.10),
+                Condition("good", 1.1, weight=0.15),
+                Condition("heavy_rain", 0.9, weight=0.15),
+                Condition("pests", 0.8, weight=0.10),
+                Condition("normal", 1.0, weight=0.50),
+            ),
+            customers=(20, 40),
+            spoilage=0.5,
+            option_groups=(
+                OptionGroup(
+                    "method",
+                    (
+                        Option("conventional"),
+                        Option("organic", cost_factor=1.3, price_factor=1.4, demand=0.9),
+                        Option("hydroponic", cost_factor=1.6, price_factor=1.3, demand=1.2),
+                    ),
+                ),
+                OptionGroup(
+                    "insurance",
+                    (
+                        Option("none"),
+                        Option("basic", setup_cost=15),
+                        Option("full", setup_cost=30),
+                    ),
+                ),
+            ),
+            price_bands=(PriceBand(0.9, 1.2), PriceBand(1.1, 1.0), PriceBand(inf, 0.7)),
+            target_profit=250,
+        ),
+        ScenarioModel(
+            slug="mobile-car-wash",
+            starting_cash=80,
+            days=28,
+            products=(
+                Product("basic", unit_cost=1.5, base_price=13.5, demand_weight=0.3, stocked=False),
+                Product("deluxe", unit_cost=3.0, base_price=30.0, demand_weight=0.5, stocked=False),
+                Product("ultimate", unit_cost=5.0, base_price=57.5, demand_weight=0.2, stocked=False),
+            ),
+            conditions=(Condition("dry", 1.0, weight=0.7), Condition("rain", 0.3, weight=0.3)),
+            customers=(3, 8),
+            capacity=6,
+            price_bands=(PriceBand(1.15, 1.0), PriceBand(1.3, 0.7), PriceBand(inf, 0.3)),
+            option_groups=(
+                OptionGroup(
+                    "equipment",
+                    (
+                        Option("basic", setup_cost=20, capacity=0.67),
+                        Option("professional", setup_cost=45),
+                        Option("premium", setup_cost=75, capacity=1.33, demand=1.1),
+                    ),
+                ),
+                OptionGroup(
+                    "area",
+                    (
+                        Option("own", demand=0.6),
+                        Option("adjacent", daily_cost=10 / 7, demand=1.3),
+                        Option("wealthy", daily_cost=25 / 7, demand=1.0, price_factor=1.15),
+                    ),
+                ),
+            ),
+            quality_bands=(
+                QualityBand(0.0, 0.3, demand=0.9, reputation=-0.1),
+                QualityBand(0.3, 0.7),
+                QualityBand(0.7, 1.0, demand=1.1, reputation=0.1),
+            ),
+            reputation=Reputation(initial=3.0, demand_elasticity=1.0),
+            target_profit=400,
+        ),
+        ScenarioModel(
+            slug="pet-sitting-service",
+            starting_cash=40,
+            days=7,
+            products=(
+                Product("walking", unit_cost=0.5, base_price=12, demand_weight=1.5, stocked=False),
+                Product("visits", unit_cost=0.5, base_price=17, demand_weight=1.3, stocked=False),
+                Product("overnight", unit_cost=2.0, base_price=50, demand_weight=0.8, stocked=False),
+                Product("grooming", unit_cost=3.0, base_price=35, demand_weight=0.6, stocked=False),
+            ),
+            conditions=(Condition("normal", 1.0),),
+            customers=(1, 2),
+            capacity=6,
+            price_bands=(PriceBand(0.85, 1.2), PriceBand(1.0, 1.0), PriceBand(inf, 0.67)),
+            option_groups=(
+                OptionGroup(
+                    "flyers",
+                    (Option("none"), Option("flyers", setup_cost=10, demand=2.5)),
+                ),
+                OptionGroup(
+                    "schedule",
+                    (
+                        Option("packed"),
+                        Option("balanced", capacity=0.85),
+                        Option("relaxed", capacity=0.65),
+                    ),
+                ),
+            ),
+            reputation=Reputation(initial=3.0, demand_elasticity=1.0, good_sales=4, sales_step=0.1),
+            target_profit=150,
+        ),
+        ScenarioModel(
+            slug="school-supplies-store",
+            starting_cash=300,
+            days=4,
+            # Bulk prices per unit
+            products=(
+                Product("pencils", unit_cost=0.40, base_price=1.00, demand_weight=1.5),
+                Product("notebooks", unit_cost=0.80, base_price=2.00, demand_weight=1.5),
+                Product("backpacks", unit_cost=10.00, base_price=25.00, demand_weight=0.6),
+                Product("calculators", unit_cost=12.00, base_price=25.00, demand_weight=0.4),
+                Product("art_sets", unit_cost=2.50, base_price=6.00, demand_weight=0.8),
+                Product("binders", unit_cost=3.20, base_price=7.00, demand_weight=0.8),
+                Product("erasers", unit_cost=0.60, base_price=1.50, demand_weight=0.7),
+            ),
+            # Demand through the back-to-school month, drawn as a season mix
+            conditions=(
+                Condition("rush", 1.5),
+                Condition("steady", 1.0),
+                Condition("slowing", 0.6),
+                Condition("quiet", 0.25),
+            ),
+            customers=(40, 80),
+            option_groups=(
+                OptionGroup(
+                    "location",
+                    (
+                        Option("home"),
+                        Option("mall_kiosk", setup_cost=60, demand=1.5),
+                        Option("near_school", setup_cost=80, demand=1.8),
+                        Option("shopping_center", setup_cost=200, demand=2.5),
+                    ),
+                ),
+                OptionGroup(
+                    "marketing",
+                    (
+                        Option("none"),
+                        Option("flyers", setup_cost=20, demand=1.2),
+                        Option("social", setup_cost=30, demand=1.3),
+                    ),
+                ),
+            ),
+            price_bands=(PriceBand(0.9, 1.2), PriceBand(1.2, 1.0), PriceBand(inf, 0.6)),
+            target_profit=300,
+        ),
+        ScenarioModel(
+            slug="handmade-crafts-online-store",
+            starting_cash=100,
+            days=28,
+            products=(
+                Product("bracelets", unit_cost=2.0, base_price=12, demand_weight=1.4),
+                Product("keychains", unit_cost=1.0, base_price=6, demand_weight=1.2),
+                Product("paintings", unit_cost=6.0, base_price=30, demand_weight=0.5),
+                Product("candles", unit_cost=3.0, base_price=15, demand_weight=0.9),
+            ),
+            conditions=(
+                Condition("normal", 1.0, weight=0.6),
+                Condition("featured", 1.5, weight=0.1),
+                Condition("holiday", 1.3, weight=0.15),
+                Condition("slow", 0.6, weight=0.15),
+            ),
+            customers=(1, 5),
+            option_groups=(
+                OptionGroup(
+                    "platform",
+                    (
+                        Option("marketplace", price_factor=0.9),
+                        Option("own_site", setup_cost=20, demand=0.7),
+                        Option("social_shop", demand=1.1, price_factor=0.95),
+                    ),
+                ),
+            ),
+            price_bands=(PriceBand(0.8, 1.2), PriceBand(1.2, 1.0), PriceBand(inf, 0.6)),
+            quality_bands=(
+                QualityBand(0.0, 0.3, demand=0.8, reputation=-0.1),
+                QualityBand(0.3, 0.7),
+                QualityBand(0.7, 1.0, demand=1.2, reputation=0.1),
+            ),
+            reputation=Reputation(initial=4.0, demand_elasticity=1.5),
+            target_profit=300,
+        ),
+        ScenarioModel(
+            slug="snow-removal-service",
+            starting_cash=120,
+            days=14,
+            products=(
+                Product("driveway", unit_cost=1.0, base_price=25, stocked=False),
+            ),
+            conditions=(
+                Condition("no_snow", 0.0, weight=0.4),
+                Condition("light", 0.8, weight=0.24),
+                Condition("moderate", 1.0, weight=0.24),
+                Condition("heavy", 1.5, weight=0.12),
+            ),
+            customers=(3, 6),
+            capacity=5,
+            fixed_daily_cost=0.5,
+            option_groups=(
+                OptionGroup(
+                    "equipment",
+                    (
+                        Option("basic", setup_cost=20, capacity=0.6),
+                        Option("standard", setup_cost=60, daily_cost=2),
+                        Option("professional", setup_cost=110, daily_cost=3.7, capacity=2.0),
+                        Option("partnership", setup_cost=40, capacity=1.5, price_factor=0.5),
+                    ),
+                ),
+                OptionGroup(
+                    "area",
+                    (
+                        Option("street", demand=0.5),
+                        Option("neighborhood", daily_cost=1, demand=1.2),
+                        Option("extended", daily_cost=2.5, demand=2.0),
+                    ),
+                ),
+            ),
+            price_bands=(PriceBand(1.0, 1.0), PriceBand(1.3, 0.8), PriceBand(inf, 0.4)),
+            target_profit=200,
+        ),
+    ]
+}
+
+
+def get_model(slug):
+    """The ScenarioModel for a scenario slug, or None if it isn't modelled"""
+    return MODELS.get(slug)
+
+
+def default_config(slug):
+    """Scenario.config for a modelled scenario, None if it isn't modelled"""
+    model = MODELS.get(slug)
+    if model is None:
+        return None
+    names = {product.name for product in model.products}
+    names.update(condition.name for condition in model.conditions)
+    for group in model.option_groups:
+        names.add(group.name)
+        names.update(option.name for option in group.options)
+    return model_to_config(model, {name: LABELS[name] for name in sorted(names) if name in LABELS})
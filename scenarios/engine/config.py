@@ -0,0 +1,125 @@
+"""Conversion between ScenarioModel and its JSON config.
+
+The config is what Scenario.config stores and the game runtime plays, so
+both the browser and the replay verifier simulate from the same numbers.
+Infinite bounds are written as null.
+"""
+
+from dataclasses import asdict, fields
+from math import inf, isinf
+
+from .model import (
+    Condition,
+    Option,
+    OptionGroup,
+    PriceBand,
+    Product,
+    QualityBand,
+    Reputation,
+    ScenarioModel,
+)
+
+
+class InvalidConfig(ValueError):
+    pass
+
+
+def _json_safe(value):
+    if isinstance(value, dict):
+        return {key: _json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(item) for item in value]
+    if isinstance(value, float) and isinf(value):
+        return None
+    return value
+
+
+def model_to_config(model, labels=None):
+    """JSON-serializable config for a model, with optional display labels"""
+    config = _json_safe(asdict(model))
+    del config["slug"]
+    if labels:
+        config["labels"] = labels
+    return config
+
+
+def _build(cls, data, infinite=()):
+    """An instance of a model dataclass from a config dict.
+
+    Missing keys take the dataclass default; null in a field listed in
+    ``infinite`` becomes +inf (or -inf for a ``poor_`` bound).
+    """
+    if not isinstance(data, dict):
+        raise InvalidConfig(f"{cls.__name__} must be an object")
+    names = {field.name for field in fields(cls)}
+    unknown = set(data) - names
+    if unknown:
+        raise InvalidConfig(f"unknown {cls.__name__} keys: {', '.join(sorted(unknown))}")
+    values = {}
+    for name, value in data.items():
+        if value is None and name in infinite:
+            value = -inf if name.startswith("poor_") else inf
+        values[name] = value
+    try:
+        return cls(**values)
+    except TypeError as error:
+        raise InvalidConfig(str(error))
+
+
+def _list(config, key, required=True):
+    items = config.get(key)
+    if items is None and not required:
+        return None
+    if not isinstance(items, list) or not items:
+        raise InvalidConfig(f"{key} must be a non-empty list")
+    return items
+
+
+def model_from_config(slug, config):
+    """Build the ScenarioModel described by a config. Raises InvalidConfig."""
+    if not isinstance(config, dict):
+        raise InvalidConfig("config must be an object")
+    config = dict(config)
+    config.pop("labels", None)
+
+    values = {
+        "products": tuple(_build(Product, item) for item in _list(config, "products")),
+        "conditions": tuple(_build(Condition, item) for item in _list(config, "conditions")),
+    }
+    price_bands = _list(config, "price_bands", required=False)
+    if price_bands is not None:
+        values["price_bands"] = tuple(
+            _build(PriceBand, item, infinite={"max_ratio"}) for item in price_bands
+        )
+    quality_bands = _list(config, "quality_bands", required=False)
+    if quality_bands is not None:
+        values["quality_bands"] = tuple(_build(QualityBand, item) for item in quality_bands)
+    option_groups = []
+    for group in config.get("option_groups") or []:
+        if not isinstance(group, dict):
+            raise InvalidConfig("option groups must be objects")
+        options = tuple(_build(Option, item) for item in _list(group, "options"))
+        option_groups.append(OptionGroup(name=group.get("name", ""), options=options))
+    values["option_groups"] = tuple(option_groups)
+    if "reputation" in config:
+        values["reputation"] = _build(
+            Reputation,
+            config["reputation"],
+            infinite={"fair_price_ratio", "gouge_price_ratio", "good_sales", "poor_sales"},
+        )
+    if "customers" in config:
+        customers = config["customers"]
+        if not isinstance(customers, list) or len(customers) != 2:
+            raise InvalidConfig("customers must be a [low, high] pair")
+        values["customers"] = tuple(customers)
+
+    for key in config:
+        if key not in values and key not in {"price_bands", "quality_bands", "option_groups"}:
+            values[key] = config[key]
+    model = _build(ScenarioModel, {"slug": slug, **values})
+    if not isinstance(model.days, int) or model.days <= 0:
+        raise InvalidConfig("days must be a positive whole number")
+    for name in ("starting_cash", "target_profit"):
+        if not isinstance(getattr(model, name), (int, float)) or getattr(model, name) <= 0:
+            raise InvalidConfig(f"{name} must be a positive number")
+    return model
@@ -0,0 +1,120 @@
+from dataclasses import dataclass, field
+from math import inf
+
+
+@dataclass(frozen=True)
+class Product:
+    """Something the player sells: a good bought into stock or a service.
+
+    ``unit_cost`` is the cost of one sellable unit (e.g. the ingredients of
+    one cup) and ``base_price`` the market price the price bands are
+    measured against. Services (``stocked=False``) are sold from the
+    day's capacity instead of inventory.
+    """
+
+    name: str
+    unit_cost: float
+    base_price: float
+    demand_weight: float = 1.0
+    stocked: bool = True
+
+
+@dataclass(frozen=True)
+class Condition:
+    """A daily weather/season/event draw and its effect on demand"""
+
+    name: str
+    demand: float
+    weight: float = 1.0
+
+
+@dataclass(frozen=True)
+class PriceBand:
+    """Demand multiplier while price / base_price is at most ``max_ratio``"""
+
+    max_ratio: float
+    demand: float
+
+
+@dataclass(frozen=True)
+class QualityBand:
+    """Effect of the day's quality setting (0-1, e.g. the recipe slider)"""
+
+    low: float
+    high: float
+    demand: float = 1.0
+    reputation: float = 0.0
+
+
+@dataclass(frozen=True)
+class Option:
+    """One choice of an option group such as location or marketing"""
+
+    name: str
+    daily_cost: float = 0.0
+    setup_cost: float = 0.0
+    demand: float = 1.0
+    price_factor: float = 1.0
+    cost_factor: float = 1.0
+    capacity: float = 1.0
+
+
+@dataclass(frozen=True)
+class OptionGroup:
+    name: str
+    options: tuple
+
+    def index(self, name):
+        return [option.name for option in self.options].index(name)
+
+
+@dataclass(frozen=True)
+class Reputation:
+    """Reputation (rating, satisfaction...) bounds and update rules.
+
+    Each day the quality band's ``reputation`` delta applies; gains are
+    withheld when any price is above ``fair_price_ratio`` and prices above
+    ``gouge_price_ratio`` cost ``step``. Selling at least ``good_sales``
+    units adds ``sales_step``, fewer than ``poor_sales`` removes it. Demand
+    is scaled by ``1 + demand_elasticity * (reputation / initial - 1)``.
+    """
+
+    initial: float = 5.0
+    minimum: float = 1.0
+    maximum: float = 5.0
+    step: float = 0.1
+    demand_elasticity: float = 0.0
+    fair_price_ratio: float = inf
+    gouge_price_ratio: float = inf
+    good_sales: float = inf
+    poor_sales: float = -inf
+    sales_step: float = 0.0
+
+
+@dataclass(frozen=True)
+class ScenarioModel:
+    """Data describing one scenario's day loop.
+
+    Each day: a condition is drawn, purchases are paid for (capped by
+    cash), customers arrive in ``customers`` (a uniform range) scaled by
+    condition, options, quality, price and reputation, units sell up to
+    stock or capacity, unsold stock spoils by ``spoilage`` and reputation
+    is updated. ``stock_sell_rate`` adds demand proportional to stock, for
+    games where sales are a share of what's on the shelf.
+    """
+
+    slug: str
+    starting_cash: float
+    days: int
+    products: tuple
+    conditions: tuple
+    customers: tuple = (0.0, 0.0)
+    stock_sell_rate: float = 0.0
+    capacity: float = 0.0
+    spoilage: float = 0.0
+    fixed_daily_cost: float = 0.0
+    price_bands: tuple = (PriceBand(inf, 1.0),)
+    quality_bands: tuple = (QualityBand(0.0, 1.0),)
+    option_groups: tuple = ()
+    reputation: Reputation = field(default_factory=Reputation)
+    target_profit: float = 100.0
@@ -0,0 +1,256 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+# Random streams drawn per simulated day
+CONDITION_STREAM = 0
+CUSTOMER_STREAM = 1
+STREAMS = 2
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _splitmix64(x):
+    z = x + _GOLDEN
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def uniforms(seeds, days, streams=STREAMS):
+    """Uniform [0, 1) draws of shape (runs, days, streams).
+
+    Counter-based (SplitMix64 of seed and day), so a run's draws depend
+    only on its own seed: replaying one run alone gives the same numbers
+    as simulating it in a batch, and the generator is easy to mirror in
+    the games' JavaScript.
+    """
+    keys = _splitmix64(np.asarray(seeds, dtype=np.int64).astype(np.uint64))
+    counters = np.arange(days * streams, dtype=np.uint64).reshape(days, streams)
+    z = _splitmix64(keys[:, None, None] + counters * _GOLDEN)
+    return (z >> np.uint64(11)).astype(np.float64) * 2.0**-53
+
+
+@dataclass
+class Decisions:
+    """The player's choices for every run and day.
+
+    Each field may have any shape that broadcasts to the full one, e.g. a
+    single price per product shared by all runs and days.
+
+    - ``purchases``: (runs, days, products) units bought before opening
+    - ``prices``: (runs, days, products) selling prices
+    - ``quality``: (runs, days) quality setting between 0 and 1
+    - ``options``: (runs, days, option groups) index of the chosen option
+    """
+
+    purchases: np.ndarray
+    prices: np.ndarray
+    quality: np.ndarray = 0.5
+    options: np.ndarray = 0
+
+
+@dataclass
+class SimulationResult:
+    total_profit: np.ndarray
+    items_sold: np.ndarray
+    final_reputation: np.ndarray
+    final_cash: np.ndarray
+    days_played: np.ndarray
+    bankrupt: np.ndarray
+    score: np.ndarray
+    daily_profit: np.ndarray
+
+    def run(self, index):
+        """Summary of one run as plain Python values"""
+        return {
+            "total_profit": round(float(self.total_profit[index]), 2),
+            "items_sold": int(self.items_sold[index]),
+            "final_reputation": round(float(self.final_reputation[index]), 1),
+            "final_cash": round(float(self.final_cash[index]), 2),
+            "days_played": int(self.days_played[index]),
+            "bankrupt": bool(self.bankrupt[index]),
+            "score": int(self.score[index]),
+        }
+
+
+def _option_attribute(model, attribute):
+    """Per-group arrays of an Option attribute, indexed by option"""
+    return [
+        np.array([getattr(option, attribute) for option in group.options], dtype=np.float64)
+        for group in model.option_groups
+    ]
+
+
+def _combine(attributes, choices, runs):
+    """Product over option groups of the chosen options' attribute values"""
+    combined = np.ones(runs)
+    for group, values in enumerate(attributes):
+        combined *= values[choices[:, group]]
+    return combined
+
+
+def _row_sum(matrix):
+    """Sum of each row, added left to right.
+
+    numpy's own reductions may associate differently, which the games'
+    JavaScript port of this loop couldn't reproduce bit for bit.
+    """
+    total = np.zeros(matrix.shape[0])
+    for column in range(matrix.shape[1]):
+        total += matrix[:, column]
+    return total
+
+
+def score_for(model, total_profit, final_reputation):
+    """0-100 score: 70 for reaching the target profit, 30 for reputation"""
+    reputation = model.reputation
+    profit_part = np.clip(total_profit / model.target_profit, 0.0, 1.0)
+    reputation_part = (final_reputation - reputation.minimum) / (
+        reputation.maximum - reputation.minimum
+    )
+    return np.rint(70 * profit_part + 30 * reputation_part).astype(np.int64)
+
+
+def simulate(model, decisions, seeds, days=None):
+    """Simulate ``len(seeds)`` independent plays of a scenario.
+
+    Runs are vectorized: each day is a handful of NumPy operations over all
+    runs at once. A run that ends a day with negative cash is bankrupt and
+    stops trading. Returns a SimulationResult of per-run arrays.
+    """
+    seeds = np.atleast_1d(np.asarray(seeds, dtype=np.int64))
+    runs = len(seeds)
+    days = days or model.days
+    products = len(model.products)
+    groups = len(model.option_groups)
+
+    purchases = np.floor(
+        np.broadcast_to(np.asarray(decisions.purchases, dtype=np.float64), (runs, days, products))
+    ).clip(min=0)
+    prices = np.broadcast_to(
+        np.asarray(decisions.prices, dtype=np.float64), (runs, days, products)
+    )
+    quality = np.broadcast_to(np.asarray(decisions.quality, dtype=np.float64), (runs, days))
+    options = np.broadcast_to(np.asarray(decisions.options, dtype=np.int64), (runs, days, groups))
+
+    unit_cost = np.array([product.unit_cost for product in model.products])
+    base_price = np.array([product.base_price for product in model.products])
+    weight = np.array([product.demand_weight for product in model.products])
+    stocked = np.array([product.stocked for product in model.products])
+    service_share = np.where(stocked, 0.0, weight)
+    share_total = sum(service_share.tolist())
+    if share_total:
+        service_share = service_share / share_total
+
+    condition_demand = np.array([condition.demand for condition in model.conditions])
+    condition_cdf = np.cumsum([condition.weight for condition in model.conditions])
+    condition_cdf /= condition_cdf[-1]
+
+    band_limits = np.array([band.max_ratio for band in model.price_bands])
+    band_demand = np.array([band.demand for band in model.price_bands] + [model.price_bands[-1].demand])
+    quality_low = np.array([band.low for band in model.quality_bands])
+    quality_high = np.array([band.high for band in model.quality_bands])
+    quality_demand = np.array([band.demand for band in model.quality_bands] + [1.0])
+    quality_reputation = np.array([band.reputation for band in model.quality_bands] + [0.0])
+
+    option_demand = _option_attribute(model, "demand")
+    option_daily_cost = _option_attribute(model, "daily_cost")
+    option_setup_cost = _option_attribute(model, "setup_cost")
+    option_price_factor = _option_attribute(model, "price_factor")
+    option_cost_factor = _option_attribute(model, "cost_factor")
+    option_capacity = _option_attribute(model, "capacity")
+
+    draws = uniforms(seeds, days)
+    condition_index = np.searchsorted(condition_cdf, draws[:, :, CONDITION_STREAM], side="right")
+    customer_low, customer_high = model.customers
+    customers_drawn = customer_low + draws[:, :, CUSTOMER_STREAM] * (customer_high - customer_low)
+
+    rep = model.reputation
+    cash = np.full(runs, float(model.starting_cash))
+    cash -= sum(
+        costs[options[:, 0, group]] for group, costs in enumerate(option_setup_cost)
+    ) if groups else 0.0
+    stock = np.zeros((runs, products))
+    reputation = np.full(runs, float(rep.initial))
+    active = cash >= 0
+    total_profit = cash - model.starting_cash
+    items_sold = np.zeros(runs, dtype=np.int64)
+    days_played = np.zeros(runs, dtype=np.int64)
+    daily_profit = np.zeros((runs, days))
+
+    for day in range(days):
+        choices = options[:, day, :]
+        cost_factor = _combine(option_cost_factor, choices, runs)
+        overhead = model.fixed_daily_cost + (
+            sum(costs[choices[:, group]] for group, costs in enumerate(option_daily_cost))
+            if groups
+            else 0.0
+        )
+
+        # Purchases are scaled down to what the cash left after overhead buys
+        buy = purchases[:, day, :] * stocked
+        goods_cost = _row_sum(buy * unit_cost) * cost_factor
+        budget = np.maximum(cash - overhead, 0.0)
+        scale = np.where(goods_cost > budget, budget / np.maximum(goods_cost, 1e-9), 1.0)
+        buy = np.floor(buy * scale[:, None]) * active[:, None]
+        goods_cost = _row_sum(buy * unit_cost) * cost_factor
+        stock += buy
+
+        in_band = (quality[:, day, None] >= quality_low) & (quality[:, day, None] <= quality_high)
+        band = np.where(in_band.any(axis=1), in_band.argmax(axis=1), len(model.quality_bands))
+        day_prices = prices[:, day, :]
+        ratio = day_prices / base_price
+        price_demand = band_demand[np.searchsorted(band_limits, ratio, side="left")]
+
+        appeal = (
+            condition_demand[condition_index[:, day]]
+            * _combine(option_demand, choices, runs)
+            * quality_demand[band]
+            * np.maximum(1.0 + rep.demand_elasticity * (reputation / rep.initial - 1.0), 0.0)
+        )
+        demand = (
+            customers_drawn[:, day, None] * weight + model.stock_sell_rate * stock * weight
+        ) * (appeal[:, None] * price_demand)
+
+        capacity = model.capacity * _combine(option_capacity, choices, runs)
+        available = np.where(stocked, stock, capacity[:, None] * service_share)
+        sold = np.floor(np.minimum(demand, available)) * active[:, None]
+
+        price_factor = _combine(option_price_factor, choices, runs)
+        revenue = _row_sum(sold * day_prices) * price_factor
+        service_cost = _row_sum(sold * unit_cost * ~stocked) * cost_factor
+        expenses = (goods_cost + service_cost + overhead) * active
+
+        stock = np.floor((stock - sold * stocked) * (1.0 - model.spoilage))
+        profit = revenue - expenses
+        cash += profit
+        total_profit += profit
+        daily_profit[:, day] = profit
+        day_sold = sold.sum(axis=1).astype(np.int64)
+        items_sold += day_sold
+        days_played += active
+
+        delta = quality_reputation[band]
+        max_ratio = ratio.max(axis=1)
+        delta = np.where((delta > 0) & (max_ratio > rep.fair_price_ratio), 0.0, delta)
+        delta = np.where(max_ratio > rep.gouge_price_ratio, np.minimum(delta, -rep.step), delta)
+        delta += np.where(day_sold >= rep.good_sales, rep.sales_step, 0.0)
+        delta -= np.where(day_sold < rep.poor_sales, rep.sales_step, 0.0)
+        reputation = np.where(
+            active, np.clip(reputation + delta, rep.minimum, rep.maximum), reputation
+        )
+
+        active &= cash >= 0
+
+    final_reputation = np.round(reputation, 1)
+    return SimulationResult(
+        total_profit=total_profit,
+        items_sold=items_sold,
+        final_reputation=final_reputation,
+        final_cash=cash,
+        days_played=days_played,
+        bankrupt=cash < 0,
+        score=score_for(model, total_profit, final_reputation),
+        daily_profit=daily_profit,
+    )
@@ -0,0 +1,54 @@
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+# Serialized values at least this large are stored zlib-compressed
+COMPRESS_MIN_BYTES = 1024
+
+_PLAIN = b"j"
+_COMPRESSED = b"z"
+
+
+class CompressedJSONField(models.BinaryField):
+    """JSON stored as bytes, zlib-compressed when it's large.
+
+    Values read and written are plain Python objects like JSONField's; the
+    first byte of the stored value says whether the rest is compressed.
+    Text left in the column by an earlier JSONField is still read.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("editable", False)
+        super().__init__(*args, **kwargs)
+
+    def from_db_value(self, value, expression, connection):
+        return self.to_python(value)
+
+    def to_python(self, value):
+        if value is None:
+            return None
+        if isinstance(value, str):
+            return json.loads(value)
+        if isinstance(value, memoryview):
+            value = value.tobytes()
+        if not isinstance(value, bytes):
+            return value
+        marker, payload = value[:1], value[1:]
+        if marker == _COMPRESSED:
+            payload = zlib.decompress(payload)
+        elif marker != _PLAIN:
+            payload = value
+        return json.loads(payload)
+
+    def get_prep_value(self, value):
+        if value is None:
+            return None
+        payload = json.dumps(value, cls=DjangoJSONEncoder, separators=(",", ":")).encode()
+        if len(payload) >= COMPRESS_MIN_BYTES:
+            return _COMPRESSED + zlib.compress(payload)
+        return _PLAIN + payload
+
+    def value_to_string(self, obj):
+        return json.dumps(self.value_from_object(obj), cls=DjangoJSONEncoder)
@@ -0,0 +1,153 @@
+import itertools
+import os
+import time
+from multiprocessing import Pool
+
+from django.core.management.base import BaseCommand, CommandError
+from scenarios.engine import MODELS
+from scenarios.engine.balancing import STRATEGIES, run_sweep_cell
+from scenarios.models import Scenario
+
+# The models being swept, set in each worker process
+_models = {}
+
+
+def _set_models(models):
+    global _models
+    _models = models
+
+
+def _run_cell(job):
+    slug, strategy, scales, runs, seed = job
+    return job, run_sweep_cell(_models[slug], strategy, scales, runs, seed)
+
+
+def simulation_models():
+    """Models by slug, from Scenario.config where a row has one.
+
+    The catalog covers scenarios with no database row, so a config edited
+    in the admin is balanced as it will ship, active or not.
+    """
+    models = dict(MODELS)
+    for scenario in Scenario.objects.all():
+        model = scenario.get_simulation_model()
+        if model is not None:
+            models[scenario.slug] = model
+    return models
+
+
+def _factors(value):
+    try:
+        return [float(factor) for factor in value.split(",")]
+    except ValueError:
+        raise CommandError(f"Expected comma separated numbers, got {value!r}")
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate scenarios with scripted strategies over a grid of capital, cost and"
+        " demand scales and report profit, bankruptcy and score distributions"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("scenarios", nargs="*", help="Scenario slugs (default: all)")
+        parser.add_argument(
+            "--strategy",
+            action="append",
+            choices=list(STRATEGIES),
+            help="Strategy to play, may be repeated (default: all)",
+        )
+        parser.add_argument(
+            "--capital",
+            type=_factors,
+            default=[0.5, 1.0, 2.0],
+            help="Starting cash scales (default: 0.5,1,2)",
+        )
+        parser.add_argument(
+            "--cost",
+            type=_factors,
+            default=[0.8, 1.0, 1.2],
+            help="Unit cost scales (default: 0.8,1,1.2)",
+        )
+        parser.add_argument(
+            "--demand",
+            type=_factors,
+            default=[0.8, 1.0, 1.2],
+            help="Customer demand scales (default: 0.8,1,1.2)",
+        )
+        parser.add_argument(
+            "--runs",
+            type=int,
+            default=2000,
+            help="Seeds per grid cell (default: 2000)",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="First seed (default: 0)")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="Worker processes, 1 runs inline (default: one per core)",
+        )
+
+    def handle(self, *args, **options):
+        models = simulation_models()
+        slugs = options["scenarios"] or list(models)
+        unknown = [slug for slug in slugs if slug not in models]
+        if unknown:
+            raise CommandError(f"No simulation for: {', '.join(unknown)}")
+        strategies = options["strategy"] or list(STRATEGIES)
+
+        jobs = [
+            (
+                slug,
+                strategy,
+                {"capital": capital, "cost": cost, "demand": demand},
+                options["runs"],
+                options["seed"],
+            )
+            for slug in slugs
+            for capital, cost, demand in itertools.product(
+                options["capital"], options["cost"], options["demand"]
+            )
+            for strategy in strategies
+        ]
+        self.stdout.write(
+            f"Simulating {len(jobs)} cells x {options['runs']} runs"
+            f" on {options['workers']} workers..."
+        )
+        started = time.monotonic()
+        models = {slug: models[slug] for slug in slugs}
+        if options["workers"] > 1:
+            with Pool(options["workers"], initializer=_set_models, initargs=(models,)) as pool:
+                chunksize = max(1, len(jobs) // (options["workers"] * 8))
+                results = pool.map(_run_cell, jobs, chunksize=chunksize)
+        else:
+            _set_models(models)
+            results = [_run_cell(job) for job in jobs]
+        elapsed = time.monotonic() - started
+
+        current_slug = None
+        for (slug, strategy, scales, _, _), summary in results:
+            if slug != current_slug:
+                current_slug = slug
+                self.stdout.write(self.style.MIGRATE_HEADING(f"\n{slug}"))
+                self.stdout.write(
+                    f"  {'capital':>7} {'cost':>5} {'demand':>6} {'strategy':<10}"
+                    f" {'profit mean':>11} {'p10':>9} {'p50':>9} {'p90':>9}"
+                    f" {'bankrupt':>8} {'score p10':>9} {'p50':>4} {'p90':>4}"
+                )
+            profit = summary["profit_percentiles"]
+            score = summary["score_percentiles"]
+            self.stdout.write(
+                f"  {scales['capital']:>7g} {scales['cost']:>5g} {scales['demand']:>6g} {strategy:<10}"
+                f" {summary['profit_mean']:>11.2f} {profit[10]:>9.2f} {profit[50]:>9.2f} {profit[90]:>9.2f}"
+                f" {summary['bankruptcy_rate']:>8.1%} {score[10]:>9.0f} {score[50]:>4.0f} {score[90]:>4.0f}"
+            )
+
+        total_runs = len(jobs) * options["runs"]
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\nSimulated {total_runs} games in {elapsed:.1f}s"
+                f" ({total_runs / max(elapsed, 1e-6):.0f} games/s)"
+            )
+        )
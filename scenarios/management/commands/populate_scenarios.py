@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from accounts.models import Achievement
+from scenarios.engine import default_config
 from scenarios.models import Scenario
 
 
@@ -131,6 +132,7 @@ class Command(BaseCommand):
         updated_count = 0
 
         for data in scenarios_data:
+            data["config"] = default_config(data["slug"]) or {}
             scenario, created = Scenario.objects.update_or_create(
                 slug=data["slug"], defaults=data
             )
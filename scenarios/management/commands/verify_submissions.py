@@ -0,0 +1,99 @@
+import os
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from scenarios.engine import MODELS
+from scenarios.models import ScenarioSubmission
+from scenarios.verification import replay, verify_submissions
+
+
+class Command(BaseCommand):
+    help = "Verify pending scenario submissions, or benchmark action log replay"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Submissions replayed together (default: 500)",
+        )
+        parser.add_argument(
+            "--benchmark",
+            type=int,
+            metavar="LOGS",
+            help="Replay this many random logs per scenario and report the rate instead",
+        )
+
+    def handle(self, *args, **options):
+        if options["benchmark"]:
+            self.benchmark(options["benchmark"])
+            return
+
+        pending = list(
+            ScenarioSubmission.objects.filter(status="pending")
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        self.stdout.write(f"Verifying {len(pending)} pending submissions...")
+        batch_size = options["batch_size"]
+        verified = 0
+        for start in range(0, len(pending), batch_size):
+            verified += verify_submissions(pending[start : start + batch_size])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully verified {verified} submissions,"
+                f" rejected {len(pending) - verified}"
+            )
+        )
+
+    def benchmark(self, count):
+        """Time replays on this process, i.e. on one core.
+
+        'single' replays logs one at a time like the worker pool does,
+        'batched' replays them all in one vectorized call like this command.
+        Database writes aren't included.
+        """
+        rng = np.random.default_rng(0)
+        totals = {"single": 0.0, "batched": 0.0}
+        for slug, model in MODELS.items():
+            logs = [random_action_log(model, rng) for _ in range(count)]
+
+            started = time.perf_counter()
+            for log in logs:
+                replay(model, [log])
+            single = time.perf_counter() - started
+
+            started = time.perf_counter()
+            replay(model, logs)
+            batched = time.perf_counter() - started
+
+            totals["single"] += single
+            totals["batched"] += batched
+            self.stdout.write(
+                f"  {slug}: {count / single:.0f}/s single, {count / batched:.0f}/s batched"
+            )
+
+        verifications = count * len(MODELS)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verifications / totals['single']:.0f} verifications/s per core single,"
+                f" {verifications / totals['batched']:.0f} batched"
+                f" ({os.cpu_count()} cores available)"
+            )
+        )
+
+
+def random_action_log(model, rng):
+    """A plausible action log for a model, for benchmarks and tests"""
+    days = model.days
+    base_price = np.array([product.base_price for product in model.products])
+    return {
+        "seed": int(rng.integers(0, 2**63 - 1)),
+        "purchases": rng.integers(0, 40, (days, len(model.products))).tolist(),
+        "prices": np.round(base_price * rng.uniform(0.7, 1.5, (days, len(base_price))), 2).tolist(),
+        "quality": np.round(rng.uniform(0, 1, days), 2).tolist(),
+        "options": [[int(rng.integers(len(group.options))) for group in model.option_groups]]
+        * days,
+    }
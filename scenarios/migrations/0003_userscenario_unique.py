@@ -0,0 +1,85 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:51
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Q
+
+
+def merge_duplicate_user_scenarios(apps, schema_editor):
+    """Collapse duplicate (user, scenario) rows into the most recently played one.
+
+    The kept row gets the best score of the group, and is marked completed
+    if any duplicate was. Completed-scenario counters of affected users
+    are recomputed, since they counted duplicates.
+    """
+    UserScenario = apps.get_model('scenarios', 'UserScenario')
+    UserStats = apps.get_model('accounts', 'UserStats')
+
+    groups = (
+        UserScenario.objects.values('user_id', 'scenario_id')
+        .order_by()
+        .annotate(
+            rows=Count('id'),
+            best_score=Max('score'),
+            completed_rows=Count('id', filter=Q(status='completed')),
+            first_completed_at=Min('completed_at'),
+        )
+        .filter(rows__gt=1)
+    )
+    groups = {(group['user_id'], group['scenario_id']): group for group in groups}
+    if not groups:
+        return
+
+    user_ids = {user_id for user_id, _ in groups}
+    kept, duplicate_ids = [], []
+    rows = UserScenario.objects.filter(user_id__in=user_ids).order_by(
+        'user_id', 'scenario_id', '-last_played', '-id'
+    )
+    seen = set()
+    for row in rows.iterator():
+        key = (row.user_id, row.scenario_id)
+        group = groups.get(key)
+        if group is None:
+            continue
+        if key in seen:
+            duplicate_ids.append(row.id)
+            continue
+        seen.add(key)
+        row.score = group['best_score']
+        if group['completed_rows']:
+            row.status = 'completed'
+            row.completed_at = row.completed_at or group['first_completed_at']
+        kept.append(row)
+
+    UserScenario.objects.bulk_update(kept, ['score', 'status', 'completed_at'], batch_size=1000)
+    for start in range(0, len(duplicate_ids), 1000):
+        UserScenario.objects.filter(id__in=duplicate_ids[start:start + 1000]).delete()
+
+    completed = dict(
+        UserScenario.objects.filter(user_id__in=user_ids, status='completed')
+        .values('user_id')
+        .order_by()
+        .annotate(count=Count('id'))
+        .values_list('user_id', 'count')
+    )
+    stats = list(UserStats.objects.filter(user_id__in=user_ids))
+    for row in stats:
+        row.completed_scenarios = completed.get(row.user_id, 0)
+    UserStats.objects.bulk_update(stats, ['completed_scenarios'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scenarios', '0002_userscenario_days_played_and_more'),
+        ('accounts', '0003_userstats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_user_scenarios, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='userscenario',
+            constraint=models.UniqueConstraint(fields=('user', 'scenario'), name='unique_user_scenario'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scenarios', '0003_userscenario_unique'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='userscenario',
+            name='final_reputation',
+            field=models.DecimalField(decimal_places=1, default=5.0, max_digits=4),
+        ),
+        migrations.CreateModel(
+            name='ScenarioSubmission',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action_log', models.JSONField(verbose_name='سجل القرارات')),
+                ('claimed_score', models.IntegerField(blank=True, null=True, verbose_name='النتيجة المرسلة')),
+                ('status', models.CharField(choices=[('pending', 'قيد التحقق'), ('verified', 'تم التحقق'), ('rejected', 'مرفوض')], default='pending', max_length=20, verbose_name='الحالة')),
+                ('rejection_reason', models.CharField(blank=True, max_length=200, verbose_name='سبب الرفض')),
+                ('score', models.IntegerField(blank=True, null=True, verbose_name='النتيجة')),
+                ('total_profit', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('items_sold', models.IntegerField(blank=True, null=True)),
+                ('final_reputation', models.DecimalField(blank=True, decimal_places=1, max_digits=4, null=True)),
+                ('days_played', models.IntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الإرسال')),
+                ('verified_at', models.DateTimeField(blank=True, null=True, verbose_name='تاريخ التحقق')),
+                ('scenario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='submissions', to='scenarios.scenario', verbose_name='السيناريو')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scenario_submissions', to=settings.AUTH_USER_MODEL, verbose_name='المستخدم')),
+            ],
+            options={
+                'verbose_name': 'نتيجة مرسلة',
+                'verbose_name_plural': 'النتائج المرسلة',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='scenarios_s_status_3b6916_idx')],
+            },
+        ),
+    ]
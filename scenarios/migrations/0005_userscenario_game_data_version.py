@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:03
+
+import scenarios.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scenarios', '0004_scenariosubmission'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userscenario',
+            name='game_data_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='userscenario',
+            name='game_data',
+            field=scenarios.fields.CompressedJSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scenarios', '0005_userscenario_game_data_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scenario',
+            name='config',
+            field=models.JSONField(blank=True, default=dict, verbose_name='إعدادات اللعبة'),
+        ),
+    ]
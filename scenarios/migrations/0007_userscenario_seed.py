@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scenarios', '0006_scenario_config'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userscenario',
+            name='seed',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -1,5 +1,11 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .engine import InvalidConfig, get_model, model_from_config
+from .fields import CompressedJSONField
 
 
 class Scenario(models.Model):
@@ -28,6 +34,10 @@ class Scenario(models.Model):
     points_reward = models.IntegerField(default=50, verbose_name="مكافأة النقاط")
     coins_reward = models.IntegerField(default=25, verbose_name="مكافأة العملات")
 
+    # Game definition played by the shared runtime: products, costs, demand
+    # parameters and daily events, see scenarios.engine.config.
+    config = models.JSONField(default=dict, blank=True, verbose_name="إعدادات اللعبة")
+
     is_active = models.BooleanField(default=True, verbose_name="نشط")
     order = models.IntegerField(default=0, verbose_name="الترتيب")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="تاريخ الإنشاء")
@@ -40,6 +50,19 @@ class Scenario(models.Model):
     def __str__(self):
         return self.title
 
+    def clean(self):
+        if self.config:
+            try:
+                model_from_config(self.slug, self.config)
+            except InvalidConfig as error:
+                raise ValidationError({"config": str(error)})
+
+    def get_simulation_model(self):
+        """The engine model this scenario is played with, or None"""
+        if self.config:
+            return model_from_config(self.slug, self.config)
+        return get_model(self.slug)
+
 
 class UserScenario(models.Model):
     STATUS_CHOICES = [
@@ -76,16 +99,109 @@ class UserScenario(models.Model):
     days_played = models.IntegerField(default=1)
     total_profit = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     items_sold = models.IntegerField(default=0)  # cups, toys, etc.
-    final_reputation = models.DecimalField(max_digits=3, decimal_places=1, default=5.0)
-    game_data = models.JSONField(null=True, blank=True)  # Store full game state
+    final_reputation = models.DecimalField(max_digits=4, decimal_places=1, default=5.0)
+    # Seed of the game being played, issued by start_scenario and used up by
+    # the submission of that game
+    seed = models.BigIntegerField(null=True, blank=True)
+    # Saved game state, merged from the game's autosave deltas
+    game_data = CompressedJSONField(null=True, blank=True)
+    game_data_version = models.PositiveIntegerField(default=0)
 
     # Timestamps
     last_played = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["-started_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "scenario"], name="unique_user_scenario"
+            ),
+        ]
         verbose_name = "سيناريو المستخدم"
         verbose_name_plural = "سيناريوهات المستخدمين"
 
     def __str__(self):
         return f"{self.user.username} - {self.scenario.title}"
+
+
+class ScenarioSubmission(models.Model):
+    """A game's action log, waiting for or verified by a server-side replay"""
+
+    STATUS_CHOICES = [
+        ("pending", "قيد التحقق"),
+        ("verified", "تم التحقق"),
+        ("rejected", "مرفوض"),
+    ]
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="scenario_submissions",
+        verbose_name="المستخدم",
+    )
+    scenario = models.ForeignKey(
+        Scenario,
+        on_delete=models.CASCADE,
+        related_name="submissions",
+        verbose_name="السيناريو",
+    )
+    action_log = models.JSONField(verbose_name="سجل القرارات")
+    claimed_score = models.IntegerField(null=True, blank=True, verbose_name="النتيجة المرسلة")
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default="pending",
+        verbose_name="الحالة",
+    )
+    rejection_reason = models.CharField(max_length=200, blank=True, verbose_name="سبب الرفض")
+
+    # Replayed results
+    score = models.IntegerField(null=True, blank=True, verbose_name="النتيجة")
+    total_profit = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    items_sold = models.IntegerField(null=True, blank=True)
+    final_reputation = models.DecimalField(max_digits=4, decimal_places=1, null=True, blank=True)
+    days_played = models.IntegerField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="تاريخ الإرسال")
+    verified_at = models.DateTimeField(null=True, blank=True, verbose_name="تاريخ التحقق")
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["status", "created_at"])]
+        verbose_name = "نتيجة مرسلة"
+        verbose_name_plural = "النتائج المرسلة"
+
+    def __str__(self):
+        return f"{self.user.username} - {self.scenario.title} ({self.status})"
+
+
+@receiver(pre_save, sender=Scenario)
+def scenario_changing(sender, instance, **kwargs):
+    from .runtime import invalidate_runtime
+    old = None
+    if instance.pk:
+        old = Scenario.objects.filter(pk=instance.pk).values("slug", "is_active").first()
+        if old and old["slug"] != instance.slug:
+            invalidate_runtime(old["slug"])
+    instance._was_active = bool(old and old["is_active"])
+
+
+@receiver(post_save, sender=Scenario)
+@receiver(post_delete, sender=Scenario)
+def scenario_changed(sender, instance, **kwargs):
+    from pages.cache import invalidate_pages
+    from .runtime import invalidate_runtime
+    invalidate_runtime(instance.slug)
+    invalidate_pages(Scenario)
+
+
+@receiver(post_save, sender=Scenario)
+@receiver(post_delete, sender=Scenario)
+def scenario_count_changed(sender, instance, **kwargs):
+    from pages.models import SiteStatistics
+    if "created" in kwargs:
+        delta = instance.is_active - instance._was_active
+    else:
+        delta = -instance.is_active
+    if delta:
+        SiteStatistics.increment("total_scenarios", delta)
@@ -0,0 +1,200 @@
+import json
+import secrets
+
+from django.db.models import Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from bizventure_kids.db import write_atomic
+from .models import UserScenario
+from accounts.achievements import SCENARIO_COMPLETED, dispatch
+from accounts.models import PointsTransaction
+from accounts.rewards import award
+from accounts.stats import bump_stats
+
+# Largest saved game state, in bytes of uncompressed JSON
+MAX_GAME_STATE_BYTES = 256 * 1024
+# Seeds stay below 2**53 so the browser's numbers hold them exactly
+SEED_BITS = 53
+
+# Best-score brackets (scores are out of 100) that each pay a one-off bonus
+# of half the scenario's completion reward.
+SCORE_TIERS = [50, 75, 90]
+
+
+def record_start(user, scenario):
+    """Create the user's in-progress row for a scenario and issue a seed.
+
+    An existing row only has last_played bumped. The seed is drawn here
+    rather than by the game, and stays the same until a submission uses it
+    up, so starting over replays the same market instead of drawing a new
+    one. Returns ``(created, seed)``.
+    """
+    rows = UserScenario.objects.filter(user=user, scenario=scenario)
+    created = False
+    if not rows.update(last_played=timezone.now()):
+        user_scenario, created = UserScenario.objects.get_or_create(
+            user=user, scenario=scenario, defaults={"status": "in_progress"}
+        )
+    rows.filter(seed__isnull=True).update(seed=secrets.randbits(SEED_BITS))
+    return created, rows.values_list("seed", flat=True).get()
+
+
+def use_seed(user, scenario, seed):
+    """Use up the seed issued to the user. Returns False if it wasn't issued."""
+    if type(seed) is not int:
+        return False
+    return bool(
+        UserScenario.objects.filter(user=user, scenario=scenario, seed=seed).update(seed=None)
+    )
+
+
+def record_completion(user, scenario, score):
+    """Upsert the user's result for a scenario, keeping the best score.
+
+    The (user, scenario) unique constraint makes the insert race-free, and
+    an existing row is changed with conditional UPDATEs rather than a
+    read-modify-write. The status flip to 'completed' is counted in the
+    user's stats only by the request whose UPDATE performed it. Returns
+    True if this call completed the scenario for the first time.
+    """
+    now = timezone.now()
+    with write_atomic():
+        user_scenario, created = UserScenario.objects.get_or_create(
+            user=user,
+            scenario=scenario,
+            defaults={"status": "completed", "score": score, "completed_at": now},
+        )
+        newly_completed = created
+        if not created:
+            rows = UserScenario.objects.filter(pk=user_scenario.pk)
+            best_score = Greatest("score", Value(score))
+            newly_completed = bool(
+                rows.exclude(status="completed").update(
+                    status="completed",
+                    completed_at=now,
+                    score=best_score,
+                    last_played=now,
+                )
+            )
+            if not newly_completed:
+                rows.update(score=best_score, last_played=now)
+
+        if newly_completed:
+            bump_stats(user, completed_scenarios=1)
+
+    if newly_completed:
+        dispatch(user, SCENARIO_COMPLETED)
+    return newly_completed
+
+
+class GameStateTooLarge(ValueError):
+    pass
+
+
+def merge_patch(target, patch):
+    """Apply a JSON merge patch (RFC 7386) to a decoded JSON value.
+
+    Objects are merged key by key, a null value removes the key and any
+    other value replaces what was there.
+    """
+    if not isinstance(patch, dict):
+        return patch
+    merged = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            merged.pop(key, None)
+        else:
+            merged[key] = merge_patch(merged.get(key), value)
+    return merged
+
+
+def load_game_state(user, scenario):
+    """(version, state) of the user's saved game, (0, None) if nothing is saved"""
+    row = (
+        UserScenario.objects.filter(user=user, scenario=scenario)
+        .values_list("game_data_version", "game_data")
+        .first()
+    )
+    return row or (0, None)
+
+
+def save_game_state(user, scenario, version, delta):
+    """Merge an autosave delta into the user's saved game.
+
+    ``version`` is the version the client's state is based on. The delta is
+    applied with a conditional UPDATE of just the game_data columns that
+    only matches while the stored version is still ``version``, so a stale
+    tab can't overwrite newer progress. Returns (saved, current version).
+    Raises GameStateTooLarge if the merged state exceeds
+    MAX_GAME_STATE_BYTES.
+    """
+    rows = UserScenario.objects.filter(user=user, scenario=scenario)
+    current = rows.values_list("pk", "game_data_version", "game_data").first()
+    if current is None:
+        if version != 0:
+            return False, 0
+        user_scenario, created = UserScenario.objects.get_or_create(
+            user=user,
+            scenario=scenario,
+            defaults={"game_data": _checked_state({}, delta), "game_data_version": 1},
+        )
+        if created:
+            return True, 1
+        current = (user_scenario.pk, user_scenario.game_data_version, user_scenario.game_data)
+
+    pk, current_version, state = current
+    if current_version != version:
+        return False, current_version
+    saved = UserScenario.objects.filter(pk=pk, game_data_version=version).update(
+        game_data=_checked_state(state, delta),
+        game_data_version=version + 1,
+        last_played=timezone.now(),
+    )
+    if not saved:
+        return False, rows.values_list("game_data_version", flat=True).first()
+    return True, version + 1
+
+
+def _checked_state(state, delta):
+    merged = merge_patch(state, delta)
+    if len(json.dumps(merged, separators=(",", ":"))) > MAX_GAME_STATE_BYTES:
+        raise GameStateTooLarge
+    return merged
+
+
+def reward_tiers(scenario, score):
+    """(tier, points, coins) for every reward tier a score qualifies for"""
+    tiers = [("completed", scenario.points_reward, scenario.coins_reward)]
+    tiers.extend(
+        (f"score-{threshold}", scenario.points_reward // 2, scenario.coins_reward // 2)
+        for threshold in SCORE_TIERS
+        if score >= threshold
+    )
+    return tiers
+
+
+def award_completion(user, scenario, score):
+    """Pay the reward tiers a completion reached that weren't paid before.
+
+    Each tier is a ledger row keyed by (scenario, tier), so replaying a
+    scenario pays nothing until a new best-score bracket is reached, and
+    concurrent submissions can't pay a tier twice. Returns the
+    (points, coins) awarded by this call.
+    """
+    tiers = {
+        f"{scenario.id}:{tier}": (points, coins)
+        for tier, points, coins in reward_tiers(scenario, score)
+    }
+    already_paid = PointsTransaction.objects.filter(
+        user=user, source="scenario", source_key__in=list(tiers)
+    ).values_list("source_key", flat=True)
+    for source_key in already_paid:
+        del tiers[source_key]
+
+    total_points = total_coins = 0
+    for source_key, (points, coins) in tiers.items():
+        if award(user, "scenario", source_key, points=points, coins=coins):
+            total_points += points
+            total_coins += coins
+    return total_points, total_coins
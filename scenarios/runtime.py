@@ -0,0 +1,52 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .engine import default_config, model_from_config, model_to_config
+from .models import Scenario
+
+
+def runtime_cache_key(slug):
+    return f"scenario:runtime:{slug}"
+
+
+def get_runtime(slug):
+    """What the runtime shell needs to play an active scenario, cached.
+
+    A dict with the scenario's ``slug``, ``title`` and ``icon``, its
+    normalized config as ``config_json`` and a ``version`` hash of it.
+    ``config_json`` is None for scenarios still played by their own
+    template. Returns None if there is no such active scenario. Cached
+    until the scenario is saved, and at most CONTENT_CACHE_TIMEOUT.
+    """
+    key = runtime_cache_key(slug)
+    runtime = cache.get(key)
+    if runtime is None:
+        scenario = Scenario.objects.filter(slug=slug, is_active=True).first()
+        if scenario is None:
+            return None
+        runtime = {
+            "slug": scenario.slug,
+            "title": scenario.title,
+            "icon": scenario.icon,
+            "config_json": None,
+            "version": None,
+        }
+        config = scenario.config or default_config(scenario.slug)
+        if config:
+            # Written back from the model so every default is spelled out
+            # and the runtime reads exactly what the verifier replays.
+            normalized = model_to_config(
+                model_from_config(scenario.slug, config), config.get("labels")
+            )
+            config_json = json.dumps(normalized, ensure_ascii=False, separators=(",", ":"))
+            runtime["config_json"] = config_json
+            runtime["version"] = hashlib.sha256(config_json.encode()).hexdigest()[:16]
+        cache.set(key, runtime, settings.CONTENT_CACHE_TIMEOUT)
+    return runtime
+
+
+def invalidate_runtime(slug):
+    cache.delete(runtime_cache_key(slug))
@@ -1,3 +1,452 @@
-from django.test import TestCase
+import json
+from dataclasses import replace
+from io import StringIO
 
-# Create your tests here.
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from .engine import MODELS, Decisions, default_config, model_from_config, simulate
+from .engine.balancing import run_sweep_cell
+from .models import Scenario, ScenarioSubmission, UserScenario
+from .progress import award_completion, record_completion, reward_tiers, save_game_state
+from .runtime import get_runtime
+from .verification import InvalidActionLog, replay, verify_submissions
+from accounts.models import PointsTransaction, Profile, UserStats
+from pages.models import SiteSettings
+
+
+def create_scenario(slug="lemon-tycoon", **kwargs):
+    return Scenario.objects.create(
+        title=slug, slug=slug, description="", icon="🍋", difficulty="easy", **kwargs
+    )
+
+
+class ScenarioCompletionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="kid", password="secret123")
+        self.scenario = create_scenario()
+
+    def complete(self, score):
+        record_completion(self.user, self.scenario, score)
+        award_completion(self.user, self.scenario, score)
+
+    def test_repeat_completions_keep_one_row_with_best_score(self):
+        for score in (40, 90, 70):
+            self.complete(score)
+
+        user_scenario = UserScenario.objects.get(user=self.user, scenario=self.scenario)
+        self.assertEqual((user_scenario.status, user_scenario.score), ("completed", 90))
+        self.assertIsNotNone(user_scenario.completed_at)
+        self.assertEqual(UserStats.objects.get(user=self.user).completed_scenarios, 1)
+
+    def test_started_scenario_is_completed_in_place(self):
+        UserScenario.objects.create(user=self.user, scenario=self.scenario, score=10)
+
+        self.complete(5)
+
+        user_scenario = UserScenario.objects.get(user=self.user, scenario=self.scenario)
+        self.assertEqual((user_scenario.status, user_scenario.score), ("completed", 10))
+        self.assertEqual(UserStats.objects.get(user=self.user).completed_scenarios, 1)
+
+    def test_rewards_are_paid_once_per_tier(self):
+        # completion pays 50/25, each score bracket 25/12
+        for score in (60, 60, 40, 95, 100):
+            self.complete(score)
+
+        profile = Profile.objects.get(user=self.user)
+        self.assertEqual((profile.total_points, profile.coins), (50 + 3 * 25, 25 + 3 * 12))
+        self.assertEqual(
+            PointsTransaction.objects.filter(user=self.user, source="scenario").count(), 4
+        )
+
+
+@override_settings(SCENARIO_VERIFICATION_WORKERS=0)
+class ScenarioSubmissionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="kid", password="secret123")
+        self.client.force_login(self.user)
+        self.scenario = create_scenario()
+        self.url = reverse("scenarios:complete_scenario", args=[self.scenario.slug])
+        self.log = {
+            "seed": 7,
+            "purchases": [[40]] * 10,
+            "prices": [[1.0]] * 10,
+            "quality": [0.5] * 10,
+        }
+        self.expected = replay(MODELS["lemon-tycoon"], [self.log])[0]
+
+    def submit(self, log, issue_seed=True):
+        if issue_seed:
+            # As if start_scenario had issued the log's seed
+            UserScenario.objects.update_or_create(
+                user=self.user, scenario=self.scenario, defaults={"seed": log["seed"]}
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.url, {"action_log": json.dumps(log)})
+        return ScenarioSubmission.objects.latest("id")
+
+    def assertNotRecorded(self):
+        self.assertFalse(UserScenario.objects.filter(status="completed").exists())
+
+    def test_verified_log_records_replayed_results(self):
+        submission = self.submit({**self.log, "score": self.expected["score"]})
+
+        self.assertEqual(submission.status, "verified")
+        user_scenario = UserScenario.objects.get(user=self.user, scenario=self.scenario)
+        self.assertEqual(user_scenario.status, "completed")
+        self.assertEqual(
+            (
+                user_scenario.score,
+                float(user_scenario.total_profit),
+                user_scenario.items_sold,
+                float(user_scenario.final_reputation),
+                user_scenario.days_played,
+            ),
+            (
+                self.expected["score"],
+                self.expected["total_profit"],
+                self.expected["items_sold"],
+                self.expected["final_reputation"],
+                self.expected["days_played"],
+            ),
+        )
+        self.assertTrue(PointsTransaction.objects.filter(user=self.user, source="scenario").exists())
+
+    def test_inflated_score_is_rejected(self):
+        submission = self.submit({**self.log, "score": self.expected["score"] + 1})
+
+        self.assertEqual(submission.status, "rejected")
+        self.assertIn("claimed score", submission.rejection_reason)
+        self.assertNotRecorded()
+        self.assertFalse(PointsTransaction.objects.filter(source="scenario").exists())
+
+    def test_log_outside_the_rules_is_rejected(self):
+        submission = self.submit({**self.log, "prices": [[1000.0]] * 10})
+
+        self.assertEqual(
+            (submission.status, submission.rejection_reason), ("rejected", "price out of range")
+        )
+        self.assertNotRecorded()
+
+    def test_truncated_log_is_rejected_unless_the_run_went_bankrupt(self):
+        short = {key: value[:1] for key, value in self.log.items() if key != "seed"}
+        submission = self.submit({**self.log, **short})
+
+        self.assertEqual(
+            (submission.status, submission.rejection_reason), ("rejected", "expected 10 days")
+        )
+        self.assertNotRecorded()
+        self.assertFalse(PointsTransaction.objects.filter(source="scenario").exists())
+
+        # 50 a day in location and marketing costs, and nothing sold at
+        # these prices, bankrupts 100 starting cash at the end of day 3
+        model = MODELS["toy-store-tycoon"]
+        prices = [product.base_price * 5 for product in model.products]
+        logs = [
+            {
+                "seed": 7,
+                "purchases": [[0] * len(prices)] * days,
+                "prices": [prices] * days,
+                "options": [[0, 2, 0]] * days,
+            }
+            for days in (2, 3)
+        ]
+        before, on_the_day = replay(model, logs)
+        self.assertIsInstance(before, InvalidActionLog)
+        self.assertEqual((on_the_day["bankrupt"], on_the_day["days_played"]), (True, 3))
+
+    def test_log_must_use_the_issued_seed(self):
+        submission = self.submit(self.log, issue_seed=False)
+        self.assertEqual(
+            (submission.status, submission.rejection_reason), ("rejected", "seed not issued")
+        )
+
+        # The seed is used up by the first submission of its game
+        self.assertEqual(self.submit(self.log).status, "verified")
+        self.assertEqual(self.submit(self.log, issue_seed=False).status, "rejected")
+        self.assertEqual(
+            PointsTransaction.objects.filter(user=self.user, source="scenario").count(),
+            len(reward_tiers(self.scenario, self.expected["score"])),
+        )
+
+    def test_submission_is_verified_once(self):
+        submission = self.submit(self.log)
+
+        self.assertEqual(verify_submissions([submission.id]), 0)
+        self.assertEqual(
+            PointsTransaction.objects.filter(user=self.user, source="scenario").count(),
+            len(reward_tiers(self.scenario, self.expected["score"])),
+        )
+
+
+class ScenarioStartTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="kid", password="secret123")
+        self.client.force_login(self.user)
+        self.scenario = create_scenario()
+
+    def test_viewing_a_scenario_writes_nothing(self):
+        response = self.client.get(
+            reverse("scenarios:scenario_detail", args=[self.scenario.slug])
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("max-age=300", response["Cache-Control"])
+        self.assertIn("private", response["Cache-Control"])
+        self.assertContains(
+            response, reverse("scenarios:start_scenario", args=[self.scenario.slug])
+        )
+        self.assertFalse(UserScenario.objects.exists())
+
+    def test_start_creates_row_once(self):
+        url = reverse("scenarios:start_scenario", args=[self.scenario.slug])
+
+        first = self.client.post(url).json()
+        self.assertTrue(first["created"])
+        # Starting again replays the same game until it is submitted
+        self.assertEqual(self.client.post(url).json(), {"created": False, "seed": first["seed"]})
+        self.assertEqual(self.client.get(url).status_code, 405)
+
+        user_scenario = UserScenario.objects.get(user=self.user, scenario=self.scenario)
+        self.assertEqual(user_scenario.status, "in_progress")
+        self.assertEqual(user_scenario.seed, first["seed"])
+        self.assertLess(first["seed"], 2**53)
+
+
+class ScenarioRuntimeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.scenario = create_scenario()
+        self.detail_url = reverse("scenarios:scenario_detail", args=[self.scenario.slug])
+        self.config_url = reverse("scenarios:scenario_config", args=[self.scenario.slug])
+
+    def test_detail_is_a_shell_around_the_runtime(self):
+        response = self.client.get(self.detail_url)
+        version = get_runtime(self.scenario.slug)["version"]
+
+        self.assertTemplateUsed(response, "scenarios/play.html")
+        self.assertContains(response, "js/scenarios/runtime.js")
+        self.assertContains(response, f"{self.config_url}?v={version}")
+        self.assertLess(len(response.content), 3000)
+
+    def test_config_defaults_to_the_catalog_and_is_cached(self):
+        self.client.get(self.config_url)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                self.config_url, {"v": get_runtime(self.scenario.slug)["version"]}
+            )
+
+        config = response.json()
+        self.assertEqual(model_from_config(self.scenario.slug, config), MODELS["lemon-tycoon"])
+        self.assertEqual(config["labels"]["lemonade"], "ليموناضة")
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertEqual(
+            self.client.get(self.config_url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304
+        )
+
+    def test_saving_a_config_changes_the_version_and_the_replay(self):
+        old_version = get_runtime(self.scenario.slug)["version"]
+        config = default_config("lemon-tycoon")
+        config["starting_cash"] = 500
+        self.scenario.config = config
+        self.scenario.save()
+
+        self.assertNotEqual(get_runtime(self.scenario.slug)["version"], old_version)
+        self.assertEqual(self.client.get(self.config_url).json()["starting_cash"], 500)
+        response = self.client.get(self.config_url, {"v": old_version})
+        self.assertNotIn("immutable", response["Cache-Control"])
+        self.assertIn("no-cache", response["Cache-Control"])
+        self.assertEqual(self.scenario.get_simulation_model().starting_cash, 500)
+
+    def test_invalid_config_is_rejected(self):
+        self.scenario.config = {"products": []}
+
+        with self.assertRaises(ValidationError):
+            self.scenario.full_clean()
+
+    def test_scenarios_without_a_config_keep_their_template(self):
+        create_scenario("cupcake-cafe")
+
+        response = self.client.get(reverse("scenarios:scenario_detail", args=["cupcake-cafe"]))
+
+        self.assertTemplateUsed(response, "scenarios/cupcake-cafe.html")
+        self.assertEqual(
+            self.client.get(reverse("scenarios:scenario_config", args=["cupcake-cafe"])).status_code,
+            404,
+        )
+
+
+    def test_games_list_is_cached_until_a_scenario_changes(self):
+        url = reverse("scenarios:scenario_list")
+        SiteSettings.get_settings()
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+        self.scenario.title = "Lemon Empire"
+        self.scenario.save()
+
+        self.assertContains(self.client.get(url), "Lemon Empire")
+
+
+class GameStateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="kid", password="secret123")
+        self.client.force_login(self.user)
+        self.scenario = create_scenario()
+        self.url = reverse("scenarios:game_state", args=[self.scenario.slug])
+
+    def save(self, version, delta):
+        return self.client.post(
+            self.url, {"version": version, "delta": delta}, content_type="application/json"
+        )
+
+    def test_deltas_are_merged_into_the_saved_state(self):
+        self.assertEqual(self.client.get(self.url).json(), {"version": 0, "state": None})
+
+        first = self.save(0, {"day": 1, "cash": 50, "stock": {"cups": 10}})
+        second = self.save(1, {"day": 2, "stock": {"lemons": 4}, "cash": None})
+
+        self.assertEqual((first.json(), second.json()), ({"version": 1}, {"version": 2}))
+
+        self.assertEqual(
+            self.client.get(self.url).json(),
+            {"version": 2, "state": {"day": 2, "stock": {"cups": 10, "lemons": 4}}},
+        )
+
+    def test_stale_version_is_refused(self):
+        self.save(0, {"day": 3})
+
+        response = self.save(0, {"day": 1})
+
+        self.assertEqual((response.status_code, response.json()), (409, {"version": 1}))
+        self.assertEqual(self.client.get(self.url).json()["state"], {"day": 3})
+
+    def test_autosave_is_one_read_and_one_update(self):
+        save_game_state(self.user, self.scenario, 0, {"day": 1})
+
+        with self.assertNumQueries(2) as queries:
+            saved, version = save_game_state(self.user, self.scenario, 1, {"day": 2})
+
+        self.assertEqual((saved, version), (True, 2))
+        update = queries.captured_queries[1]["sql"]
+        self.assertTrue(update.startswith("UPDATE"))
+        self.assertNotIn('"score"', update)
+
+    def test_large_states_are_stored_compressed(self):
+        state = {"history": [{"day": day, "sold": 20, "weather": "sunny"} for day in range(200)]}
+        self.save(0, state)
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT game_data FROM scenarios_userscenario")
+            stored = bytes(cursor.fetchone()[0])
+        self.assertTrue(stored.startswith(b"z"))
+        self.assertLess(len(stored), len(json.dumps(state)) // 4)
+        self.assertEqual(self.client.get(self.url).json()["state"], state)
+
+
+class SimulationEngineTests(SimpleTestCase):
+    def test_a_run_gives_the_same_result_alone_and_in_a_batch(self):
+        model = MODELS["lemon-tycoon"]
+        decisions = Decisions(purchases=[40], prices=[1.0], quality=0.5)
+
+        alone = simulate(model, decisions, [7])
+        batch = simulate(model, decisions, [3, 7, 11])
+
+        self.assertEqual(alone.run(0), batch.run(1))
+        self.assertNotEqual(batch.run(0)["items_sold"], 0)
+
+    def test_purchases_are_capped_by_cash(self):
+        model = MODELS["summer-lemonade-stand"]
+        result = simulate(model, Decisions(purchases=[1000], prices=[1.0]), [1], days=1)
+
+        # 50 cash buys 45 cups at 1.10
+        self.assertLessEqual(result.items_sold[0], 45)
+        self.assertGreaterEqual(result.final_cash[0], 0)
+
+    def test_setup_costs_beyond_starting_cash_bankrupt_the_run(self):
+        model = MODELS["school-supplies-store"]
+        # Shopping centre plus social ads cost 230 of the 300 starting cash
+        affordable = Decisions(purchases=[0], prices=[1.0], options=[3, 2])
+        result = simulate(model, affordable, [1])
+        self.assertEqual(result.run(0)["total_profit"], -230)
+        self.assertFalse(result.bankrupt[0])
+
+        overspent = simulate(replace(model, starting_cash=100), affordable, [1])
+        self.assertTrue(overspent.bankrupt[0])
+        self.assertEqual(overspent.days_played[0], 0)
+
+    def test_decisions_vary_per_run(self):
+        model = MODELS["toy-store-tycoon"]
+        purchases = np.zeros((2, 1, len(model.products)))
+        purchases[1, 0, 0] = 5
+        prices = [product.base_price for product in model.products]
+        result = simulate(model, Decisions(purchases=purchases, prices=prices), [5, 5])
+
+        self.assertEqual(result.items_sold[0], 0)
+        self.assertGreater(result.items_sold[1], 0)
+
+
+class BalanceScenariosTests(TestCase):
+    def test_reports_each_grid_cell(self):
+        out = StringIO()
+        call_command(
+            "balance_scenarios",
+            "lemon-tycoon",
+            "--strategy=balanced",
+            "--strategy=random",
+            "--capital=1",
+            "--cost=1,2",
+            "--demand=1",
+            "--runs=50",
+            "--workers=1",
+            stdout=out,
+        )
+
+        output = out.getvalue()
+        self.assertIn("Simulating 4 cells x 50 runs", output)
+        self.assertEqual(output.count(" balanced "), 2)
+        self.assertIn("Simulated 200 games", output)
+
+    def test_sweeps_the_config_saved_in_the_database(self):
+        def sweep():
+            out = StringIO()
+            call_command(
+                "balance_scenarios",
+                "lemon-tycoon",
+                "--strategy=balanced",
+                "--capital=1",
+                "--cost=1",
+                "--demand=1",
+                "--runs=50",
+                "--workers=1",
+                stdout=out,
+            )
+            return [line for line in out.getvalue().splitlines() if " balanced " in line]
+
+        from_catalog = sweep()
+        config = default_config("lemon-tycoon")
+        config["starting_cash"] = 1
+        create_scenario(config=config)
+
+        self.assertNotEqual(sweep(), from_catalog)
+
+    def test_summary_of_a_sweep_cell(self):
+        summary = run_sweep_cell(
+            MODELS["toy-store-tycoon"], "aggressive", {"capital": 0.5}, runs=100, seed=1
+        )
+
+        self.assertEqual(summary["runs"], 100)
+        self.assertTrue(0 <= summary["bankruptcy_rate"] <= 1)
+        self.assertLessEqual(summary["score_percentiles"][10], summary["score_percentiles"][90])
@@ -6,5 +6,8 @@ app_name = "scenarios"
 urlpatterns = [
     path("", views.scenario_list, name="scenario_list"),
     path("<slug:slug>/", views.scenario_detail, name="scenario_detail"),
+    path("<slug:slug>/config.json", views.scenario_config, name="scenario_config"),
+    path("<slug:slug>/start/", views.start_scenario, name="start_scenario"),
+    path("<slug:slug>/state/", views.game_state, name="game_state"),
     path("<slug:slug>/complete/", views.complete_scenario, name="complete_scenario"),
 ]
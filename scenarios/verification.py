@@ -0,0 +1,278 @@
+"""Verify submitted scenario results by replaying their action logs.
+
+A game submits a compact action log instead of a score::
+
+    {
+        "seed": 123456,
+        "purchases": [[30], [25], ...],   # per day, per product
+        "prices": [[1.0], [1.1], ...],    # per day, per product
+        "quality": [0.5, 0.5, ...],       # per day, optional
+        "options": [[0, 1], ...],         # per day, per option group, optional
+        "score": 85                       # the score the game showed
+    }
+
+The log is replayed through the scenario's engine model, built from the
+same config the game runtime played. A log that doesn't
+fit the model, or whose claimed score differs from the replay, is rejected;
+otherwise the replayed results are written to the user's UserScenario and
+the completion rewards are paid.
+"""
+
+import logging
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .engine import Decisions, InvalidConfig, simulate
+from .models import ScenarioSubmission, UserScenario
+from .progress import award_completion, record_completion
+
+logger = logging.getLogger(__name__)
+
+MAX_UNITS_PER_DAY = 10000
+# Highest allowed price as a multiple of a product's base price
+MAX_PRICE_RATIO = 10
+MAX_SEED = 2**63 - 1
+
+
+class InvalidActionLog(ValueError):
+    pass
+
+
+def parse_action_log(model, log):
+    """Validate an action log against a model.
+
+    Returns ``(seed, days, purchases, prices, quality, options)`` with the
+    arrays shaped (days, ...) for one run. Raises InvalidActionLog.
+    """
+    if not isinstance(log, dict):
+        raise InvalidActionLog("log must be an object")
+
+    seed = log.get("seed")
+    if not isinstance(seed, int) or isinstance(seed, bool) or not 0 <= seed <= MAX_SEED:
+        raise InvalidActionLog("invalid seed")
+
+    products = len(model.products)
+    groups = len(model.option_groups)
+    purchases = _matrix(log.get("purchases"), products, "purchases")
+    days = len(purchases)
+    if not 1 <= days <= model.days:
+        raise InvalidActionLog(f"expected 1 to {model.days} days")
+    prices = _matrix(log.get("prices"), products, "prices")
+    quality = log.get("quality", [0.5] * days)
+    if not isinstance(quality, list):
+        raise InvalidActionLog("quality must have 1 value per day")
+    quality = _matrix([[value] for value in quality], 1, "quality")[:, 0]
+    options = _matrix(log.get("options", [[0] * groups] * days), groups, "options")
+    if len(prices) != days or len(quality) != days or len(options) != days:
+        raise InvalidActionLog("every decision needs one entry per day")
+
+    base_price = np.array([product.base_price for product in model.products])
+    if not (np.all(purchases == np.floor(purchases)) and np.all(purchases >= 0)):
+        raise InvalidActionLog("purchases must be whole numbers of units")
+    if np.any(purchases > MAX_UNITS_PER_DAY):
+        raise InvalidActionLog("purchases too large")
+    if not (np.all(prices > 0) and np.all(prices <= base_price * MAX_PRICE_RATIO)):
+        raise InvalidActionLog("price out of range")
+    if not np.all((quality >= 0) & (quality <= 1)):
+        raise InvalidActionLog("quality out of range")
+    option_counts = np.array([len(group.options) for group in model.option_groups])
+    if not (
+        np.all(options == np.floor(options))
+        and np.all(options >= 0)
+        and np.all(options < option_counts)
+    ):
+        raise InvalidActionLog("unknown option")
+    # Setup costs are only paid for the first day's choice
+    for group, option_group in enumerate(model.option_groups):
+        if any(option.setup_cost for option in option_group.options) and np.any(
+            options[:, group] != options[0, group]
+        ):
+            raise InvalidActionLog(f"{option_group.name} can't change after the first day")
+
+    return seed, days, purchases, prices, quality, options.astype(np.int64)
+
+
+def _matrix(rows, width, name):
+    """A (days, width) float array of finite numbers from a list of lists"""
+    if not isinstance(rows, list) or not all(
+        isinstance(row, list) and len(row) == width for row in rows
+    ):
+        raise InvalidActionLog(f"{name} must have {width} values per day")
+    values = [value for row in rows for value in row]
+    if not all(
+        isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+        for value in values
+    ):
+        raise InvalidActionLog(f"{name} must be numbers")
+    return np.array(values, dtype=np.float64).reshape(len(rows), width)
+
+
+def replay(model, logs):
+    """Replay action logs for one model, as few vectorized batches as possible.
+
+    Logs of the same length are stacked and simulated together. Returns a
+    list with, for each log, either a result dict (see
+    SimulationResult.run) or the InvalidActionLog it raised. Logs shorter
+    than the scenario are only valid if the run went bankrupt on the last
+    day.
+    """
+    results = [None] * len(logs)
+    by_days = {}
+    for index, log in enumerate(logs):
+        try:
+            parsed = parse_action_log(model, log)
+        except InvalidActionLog as error:
+            results[index] = error
+            continue
+        by_days.setdefault(parsed[1], []).append((index, parsed))
+
+    for days, batch in by_days.items():
+        indexes = [index for index, _ in batch]
+        seeds, _, purchases, prices, quality, options = zip(*(parsed for _, parsed in batch))
+        decisions = Decisions(
+            purchases=np.stack(purchases),
+            prices=np.stack(prices),
+            quality=np.stack(quality),
+            options=np.stack(options),
+        )
+        simulated = simulate(model, decisions, np.array(seeds, dtype=np.int64), days=days)
+        for run, index in enumerate(indexes):
+            results[index] = _check_length(model, days, simulated.run(run))
+    return results
+
+
+def _check_length(model, days, result):
+    """A replayed run, or InvalidActionLog if its log stops early.
+
+    A log may only be shorter than the scenario if the run went bankrupt
+    on its last day. Setup costs can bankrupt a run before its first day,
+    which is still a one-day log.
+    """
+    if days == model.days or (result["bankrupt"] and max(result["days_played"], 1) == days):
+        return result
+    return InvalidActionLog(f"expected {model.days} days")
+
+
+def verify_submissions(submission_ids):
+    """Replay pending submissions and record their outcome.
+
+    Each submission is claimed with a conditional UPDATE on its status, so
+    one replayed by two workers is only recorded and rewarded once.
+    Returns the number of submissions verified.
+    """
+    submissions = list(
+        ScenarioSubmission.objects.filter(id__in=submission_ids, status="pending")
+        .select_related("user", "scenario")
+        .order_by("id")
+    )
+    by_scenario = {}
+    for submission in submissions:
+        by_scenario.setdefault(submission.scenario_id, []).append(submission)
+
+    verified = 0
+    for batch in by_scenario.values():
+        try:
+            model = batch[0].scenario.get_simulation_model()
+        except InvalidConfig:
+            model = None
+        if model is None:
+            for submission in batch:
+                _reject(submission, "scenario has no simulation")
+            continue
+        results = replay(model, [submission.action_log for submission in batch])
+        for submission, result in zip(batch, results):
+            if isinstance(result, InvalidActionLog):
+                _reject(submission, str(result))
+            elif submission.claimed_score is not None and submission.claimed_score != result["score"]:
+                _reject(
+                    submission,
+                    f"claimed score {submission.claimed_score}, replay scored {result['score']}",
+                )
+            elif _accept(submission, result):
+                verified += 1
+    return verified
+
+
+def _reject(submission, reason):
+    ScenarioSubmission.objects.filter(pk=submission.pk, status="pending").update(
+        status="rejected", rejection_reason=reason[:200], verified_at=timezone.now()
+    )
+
+
+def _accept(submission, result):
+    results = {
+        "total_profit": result["total_profit"],
+        "items_sold": result["items_sold"],
+        "final_reputation": result["final_reputation"],
+        "days_played": result["days_played"],
+    }
+    user, scenario, score = submission.user, submission.scenario, result["score"]
+    with transaction.atomic():
+        claimed = ScenarioSubmission.objects.filter(pk=submission.pk, status="pending").update(
+            status="verified", score=score, verified_at=timezone.now(), **results
+        )
+        if not claimed:
+            return False
+        record_completion(user, scenario, score)
+        # The row's statistics describe its best run
+        UserScenario.objects.filter(user=user, scenario=scenario, score__lte=score).update(
+            **results
+        )
+        award_completion(user, scenario, score)
+    return True
+
+
+_executor = None
+_slots = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor, _slots
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.SCENARIO_VERIFICATION_WORKERS,
+                thread_name_prefix="scenario-verification",
+            )
+            _slots = threading.BoundedSemaphore(settings.SCENARIO_VERIFICATION_QUEUE)
+    return _executor
+
+
+def enqueue(submission_id):
+    """Verify a submission on the worker pool, off the request thread.
+
+    With SCENARIO_VERIFICATION_WORKERS = 0 it is verified inline. When
+    SCENARIO_VERIFICATION_QUEUE submissions are already waiting it is left
+    pending for the verify_submissions command. Returns True if queued or
+    verified.
+    """
+    if not settings.SCENARIO_VERIFICATION_WORKERS:
+        verify_submissions([submission_id])
+        return True
+
+    executor = _get_executor()
+    if not _slots.acquire(blocking=False):
+        return False
+    try:
+        future = executor.submit(_verify_in_worker, submission_id)
+    except RuntimeError:
+        _slots.release()
+        return False
+    future.add_done_callback(lambda future: _slots.release())
+    return True
+
+
+def _verify_in_worker(submission_id):
+    try:
+        verify_submissions([submission_id])
+    except Exception:
+        logger.exception("Verifying scenario submission %s failed", submission_id)
+    finally:
+        connection.close()
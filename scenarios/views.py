@@ -1,9 +1,34 @@
+import json
+
+from django.db import transaction
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from .models import Scenario, UserScenario
-
-
+from django.http import Http404, HttpResponse, JsonResponse
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.cache import cache_control, never_cache
+from django.views.decorators.csrf import ensure_csrf_cookie
+from django.views.decorators.http import condition, require_http_methods, require_POST
+from pages.cache import cache_shared_page
+from .models import Scenario, ScenarioSubmission
+from .progress import (
+    GameStateTooLarge,
+    load_game_state,
+    record_start,
+    save_game_state,
+    use_seed,
+)
+from .runtime import get_runtime
+from .verification import enqueue
+
+# Largest accepted action log, in characters of JSON
+MAX_ACTION_LOG_LENGTH = 64 * 1024
+# Largest accepted autosave request body, in bytes
+MAX_GAME_STATE_DELTA_LENGTH = 16 * 1024
+
+
+@cache_shared_page("scenarios:scenario_list")
 def scenario_list(request):
     """Display all available scenarios (games.html)"""
     scenarios = Scenario.objects.filter(is_active=True)
@@ -15,20 +40,29 @@ def scenario_list(request):
     return render(request, "scenarios/games.html", context)
 
 
+@ensure_csrf_cookie
+@cache_control(private=True, max_age=300)
 def scenario_detail(request, slug):
-    """Display and play a specific scenario"""
-    scenario = get_object_or_404(Scenario, slug=slug, is_active=True)
+    """Display and play a specific scenario.
 
-    # Get or create user scenario if authenticated
-    user_scenario = None
-    if request.user.is_authenticated:
-        user_scenario, created = UserScenario.objects.get_or_create(
-            user=request.user, scenario=scenario, defaults={"status": "in_progress"}
-        )
+    Scenarios with a config, which includes every scenario in the engine
+    catalog, are a small shell around the shared runtime that fetches the
+    config from scenario_config. Scenarios without one, such as
+    cupcake-cafe, still render their own ``scenarios/<slug>.html``.
 
+    Read-only: the user's UserScenario row is created by start_scenario when
+    the game reports that play has started.
+    """
+    runtime = get_runtime(slug)
+    if runtime is None:
+        raise Http404("No Scenario matches the given query.")
+
+    if runtime["config_json"] is not None:
+        return render(request, "scenarios/play.html", {"scenario": runtime})
+
+    scenario = get_object_or_404(Scenario, slug=slug, is_active=True)
     context = {
         "scenario": scenario,
-        "user_scenario": user_scenario,
     }
 
     # Render the specific scenario template
@@ -36,36 +70,120 @@ def scenario_detail(request, slug):
     return render(request, template_name, context)
 
 
+def _config_etag(request, slug):
+    runtime = get_runtime(slug)
+    return runtime and runtime["version"]
+
+
+@condition(etag_func=_config_etag)
+def scenario_config(request, slug):
+    """The scenario's runtime config as JSON.
+
+    The shell links it with ``?v=<version>``, so a request for the current
+    version can be cached for good; a new config gets a new URL. The
+    version is a hash of the config, so only a matching ``v`` is marked
+    immutable; any other ``v`` may come from a page rendered by a process
+    that has already seen a newer config, and isn't cached.
+    """
+    runtime = get_runtime(slug)
+    if runtime is None or runtime["config_json"] is None:
+        raise Http404("No Scenario matches the given query.")
+
+    response = HttpResponse(runtime["config_json"], content_type="application/json")
+    if request.GET.get("v") == runtime["version"]:
+        patch_cache_control(response, public=True, max_age=365 * 24 * 60 * 60, immutable=True)
+    elif "v" in request.GET:
+        patch_cache_control(response, no_cache=True)
+    else:
+        patch_cache_control(response, public=True, max_age=300)
+    return response
+
+
+@login_required
+@require_POST
+def start_scenario(request, slug):
+    """Record that the user started playing a scenario and issue its seed"""
+    scenario = get_object_or_404(Scenario, slug=slug, is_active=True)
+    created, seed = record_start(request.user, scenario)
+    return JsonResponse({"created": created, "seed": seed})
+
+
+@login_required
+@never_cache
+@require_http_methods(["GET", "POST"])
+def game_state(request, slug):
+    """Load (GET) or autosave (POST) the user's saved game for a scenario.
+
+    A save posts ``{"version": n, "delta": {...}}``: a JSON merge patch
+    against version n of the state. It answers 409 with the stored version
+    when the client is behind, e.g. after playing in another tab.
+    """
+    scenario = get_object_or_404(Scenario, slug=slug, is_active=True)
+    if request.method == "GET":
+        version, state = load_game_state(request.user, scenario)
+        return JsonResponse({"version": version, "state": state})
+
+    if len(request.body) > MAX_GAME_STATE_DELTA_LENGTH:
+        return JsonResponse({"error": "delta too large"}, status=413)
+    try:
+        payload = json.loads(request.body)
+        version, delta = payload["version"], payload["delta"]
+    except (ValueError, TypeError, KeyError):
+        return JsonResponse({"error": "invalid save"}, status=400)
+    if type(version) is not int or not isinstance(delta, dict):
+        return JsonResponse({"error": "invalid save"}, status=400)
+
+    try:
+        saved, version = save_game_state(request.user, scenario, version, delta)
+    except GameStateTooLarge:
+        return JsonResponse({"error": "state too large"}, status=413)
+    return JsonResponse({"version": version}, status=200 if saved else 409)
+
+
 @login_required
 def complete_scenario(request, slug):
-    """Mark scenario as completed"""
+    """Submit a finished game's action log for verification.
+
+    The score shown by the game isn't trusted: the log is replayed on the
+    verification pool after this request commits, and the replayed result
+    is what gets recorded and rewarded. A log must be played with the seed
+    start_scenario issued, which it uses up.
+    """
     if request.method != "POST":
         return redirect("scenarios:scenario_list")
 
     scenario = get_object_or_404(Scenario, slug=slug)
-    score = int(request.POST.get("score", 0))
+    raw_log = request.POST.get("action_log", "")
+    try:
+        action_log = json.loads(raw_log) if len(raw_log) <= MAX_ACTION_LOG_LENGTH else None
+    except ValueError:
+        action_log = None
+    if not isinstance(action_log, dict):
+        messages.error(request, "تعذر حفظ نتيجتك، يرجى إعادة المحاولة.")
+        return redirect("scenarios:scenario_list")
 
-    # Update or create user scenario
-    user_scenario, created = UserScenario.objects.get_or_create(
+    claimed_score = action_log.get("score")
+    submission = ScenarioSubmission(
         user=request.user,
         scenario=scenario,
-        defaults={"status": "completed", "score": score},
+        action_log=action_log,
+        claimed_score=claimed_score if type(claimed_score) is int else None,
     )
-
-    if not created:
-        user_scenario.status = "completed"
-        user_scenario.score = max(user_scenario.score, score)
-        user_scenario.save()
-
-    # Award points and coins to user profile
-    profile = request.user.profile
-    profile.total_points += scenario.points_reward
-    profile.coins += scenario.coins_reward
-    profile.save()
+    with transaction.atomic():
+        issued = use_seed(request.user, scenario, action_log.get("seed"))
+        if not issued:
+            # Kept for the record, but never replayed
+            submission.status = "rejected"
+            submission.rejection_reason = "seed not issued"
+            submission.verified_at = timezone.now()
+        submission.save()
+    if not issued:
+        messages.error(request, "تعذر حفظ نتيجتك، يرجى إعادة المحاولة.")
+        return redirect("scenarios:scenario_list")
+    transaction.on_commit(lambda: enqueue(submission.id))
 
     messages.success(
         request,
-        f'مبروك! لقد أكملت "{scenario.title}" وحصلت على {scenario.points_reward} نقطة و{scenario.coins_reward} عملة!',
+        f'أحسنت! لقد أنهيت "{scenario.title}". سنتحقق من نتيجتك ونضيف مكافآتك خلال لحظات.',
     )
-
     return redirect("scenarios:scenario_list")
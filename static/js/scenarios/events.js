@@ -0,0 +1,166 @@
+// Reports game events for the scenario page this script is included in.
+// The page itself is static; the UserScenario row is created on the first
+// interaction with a game control, not on page view.
+//
+// startGame() resolves to the seed the server issued for the user's game.
+// It stays the same until a result played with it is submitted.
+//
+// Games save their state with saveState(delta), where delta is a JSON merge
+// patch of what changed since the last save, and restore it with
+// loadState(). Deltas made while a save is in flight are combined into the
+// next request, so there is at most one autosave request at a time.
+//
+// When another tab saved first the server answers 409. Saving then stops
+// until the game calls loadState() again, and a bizventure:state-conflict
+// event carries the unsaved delta in event.detail.delta, so the game can
+// reconcile it with the newer state rather than send days on top of it.
+(function () {
+  const script = document.currentScript;
+  const startUrl = script.dataset.startUrl;
+  const stateUrl = script.dataset.stateUrl;
+  let started = false;
+  let starting = null;
+  let stateVersion = 0;
+  let pendingDelta = null;
+  let saving = null;
+  let conflicted = false;
+
+  function csrfToken() {
+    const match = document.cookie.match(/(?:^|;\s*)csrftoken=([^;]+)/);
+    return match ? decodeURIComponent(match[1]) : "";
+  }
+
+  function startGame() {
+    if (!starting) {
+      // A click reports the start too; share the request in flight
+      starting = fetch(startUrl, {
+        method: "POST",
+        credentials: "same-origin",
+        headers: { "X-CSRFToken": csrfToken() },
+      })
+        .then((response) => (response.ok ? response.json() : Promise.reject(response)))
+        .finally(() => {
+          starting = null;
+        });
+    }
+    return starting.then((data) => data.seed);
+  }
+
+  function reportStart() {
+    if (started || !startUrl) {
+      return;
+    }
+    started = true;
+    startGame().catch(() => {
+      started = false;
+    });
+  }
+
+  function isObject(value) {
+    return value !== null && typeof value === "object" && !Array.isArray(value);
+  }
+
+  // Apply a merge patch to a value
+  function applyPatch(target, patch) {
+    if (!isObject(patch)) {
+      return patch;
+    }
+    const result = isObject(target) ? { ...target } : {};
+    for (const [key, value] of Object.entries(patch)) {
+      if (value === null) {
+        delete result[key];
+      } else {
+        result[key] = applyPatch(result[key], value);
+      }
+    }
+    return result;
+  }
+
+  // One merge patch with the effect of applying first, then second
+  function composePatches(first, second) {
+    if (!isObject(second)) {
+      return second;
+    }
+    if (!isObject(first)) {
+      return applyPatch(first, second);
+    }
+    const result = { ...first };
+    for (const [key, value] of Object.entries(second)) {
+      result[key] = key in first ? composePatches(first[key], value) : value;
+    }
+    return result;
+  }
+
+  function loadState() {
+    return fetch(stateUrl, { credentials: "same-origin" })
+      .then((response) => response.json())
+      .then((data) => {
+        stateVersion = data.version;
+        pendingDelta = null;
+        conflicted = false;
+        return data.state;
+      });
+  }
+
+  function flushState() {
+    if (conflicted) {
+      return Promise.resolve(false);
+    }
+    if (saving || pendingDelta === null) {
+      return saving || Promise.resolve(true);
+    }
+    const delta = pendingDelta;
+    pendingDelta = null;
+    saving = fetch(stateUrl, {
+      method: "POST",
+      credentials: "same-origin",
+      headers: { "Content-Type": "application/json", "X-CSRFToken": csrfToken() },
+      body: JSON.stringify({ version: stateVersion, delta }),
+    })
+      .then((response) =>
+        response.json().then((data) => {
+          if (response.status === 409) {
+            // Newer progress was saved elsewhere; hold everything unsaved
+            // until the game has reloaded it
+            conflicted = true;
+            const unsaved = pendingDelta === null ? delta : composePatches(delta, pendingDelta);
+            pendingDelta = null;
+            document.dispatchEvent(
+              new CustomEvent("bizventure:state-conflict", { detail: { delta: unsaved } })
+            );
+            return false;
+          }
+          if (!response.ok) {
+            return false;
+          }
+          stateVersion = data.version;
+          return true;
+        })
+      )
+      .catch(() => {
+        pendingDelta = pendingDelta === null ? delta : composePatches(delta, pendingDelta);
+        return false;
+      })
+      .finally(() => {
+        saving = null;
+      });
+    return saving.then((saved) => (saved && pendingDelta !== null ? flushState() : saved));
+  }
+
+  function saveState(delta) {
+    pendingDelta = pendingDelta === null ? delta : composePatches(pendingDelta, delta);
+    return flushState();
+  }
+
+  document.addEventListener(
+    "click",
+    (event) => {
+      if (event.target.closest("button, .btn")) {
+        reportStart();
+      }
+    },
+    true
+  );
+
+  window.BizVentureScenario = { reportStart, startGame, loadState, saveState };
+})();
@@ -0,0 +1,647 @@
+// Shared game runtime: plays any scenario from its JSON config.
+//
+// The day loop mirrors simulate() in scenarios/engine/simulate.py operation
+// for operation (same random draws, same order of floating point
+// arithmetic), so the action log submitted at the end replays on the server
+// to exactly the score shown here. Change both together.
+//
+// Signed-in players get their seed from the server when a game starts, and
+// keep it until a result is submitted, so starting over replays the same
+// market conditions. Guests, whose results aren't saved, pick their own.
+(function () {
+  "use strict";
+
+  const root = document.getElementById("game");
+  const events = window.BizVentureScenario || null;
+
+  // Random draws, see uniforms() in simulate.py
+  const MASK = (1n << 64n) - 1n;
+  const GOLDEN = 0x9e3779b97f4a7c15n;
+  const STREAMS = 2;
+  const CONDITION_STREAM = 0;
+  const CUSTOMER_STREAM = 1;
+
+  function splitmix64(x) {
+    let z = (x + GOLDEN) & MASK;
+    z = ((z ^ (z >> 30n)) * 0xbf58476d1ce4e5b9n) & MASK;
+    z = ((z ^ (z >> 27n)) * 0x94d049bb133111ebn) & MASK;
+    return z ^ (z >> 31n);
+  }
+
+  function uniform(seed, day, stream) {
+    const key = splitmix64(BigInt(seed));
+    const counter = BigInt(day * STREAMS + stream);
+    const z = splitmix64((key + counter * GOLDEN) & MASK);
+    return Number(z >> 11n) * 2 ** -53;
+  }
+
+  function newSeed() {
+    const words = crypto.getRandomValues(new Uint32Array(2));
+    return (words[0] & 0x1fffff) * 2 ** 32 + words[1];
+  }
+
+  // numpy.rint: round half to even
+  function rint(x) {
+    const floor = Math.floor(x);
+    const fraction = x - floor;
+    if (fraction !== 0.5) {
+      return fraction < 0.5 ? floor : floor + 1;
+    }
+    return floor % 2 === 0 ? floor : floor + 1;
+  }
+
+  function rowSum(values) {
+    let total = 0;
+    for (const value of values) {
+      total += value;
+    }
+    return total;
+  }
+
+  function orInfinity(value, sign) {
+    return value === null ? sign * Infinity : value;
+  }
+
+  function prepare(config) {
+    const products = config.products;
+    const weights = products.map((product) => product.demand_weight);
+    const stocked = products.map((product) => product.stocked);
+    let serviceShare = products.map((product, i) => (stocked[i] ? 0 : weights[i]));
+    const shareTotal = rowSum(serviceShare);
+    if (shareTotal) {
+      serviceShare = serviceShare.map((share) => share / shareTotal);
+    }
+
+    let cumulative = 0;
+    const cdf = config.conditions.map((condition) => (cumulative += condition.weight));
+    const last = cdf[cdf.length - 1];
+
+    const reputation = config.reputation;
+    return {
+      config,
+      products,
+      weights,
+      stocked,
+      serviceShare,
+      unitCost: products.map((product) => product.unit_cost),
+      basePrice: products.map((product) => product.base_price),
+      conditionCdf: cdf.map((value) => value / last),
+      priceLimits: config.price_bands.map((band) => orInfinity(band.max_ratio, 1)),
+      priceDemand: config.price_bands
+        .map((band) => band.demand)
+        .concat([config.price_bands[config.price_bands.length - 1].demand]),
+      reputation: {
+        ...reputation,
+        fair_price_ratio: orInfinity(reputation.fair_price_ratio, 1),
+        gouge_price_ratio: orInfinity(reputation.gouge_price_ratio, 1),
+        good_sales: orInfinity(reputation.good_sales, 1),
+        poor_sales: orInfinity(reputation.poor_sales, -1),
+      },
+    };
+  }
+
+  function sameDecision(a, b) {
+    const fields = (decision) => [decision.purchases, decision.prices, decision.quality, decision.options];
+    return a !== undefined && b !== undefined && JSON.stringify(fields(a)) === JSON.stringify(fields(b));
+  }
+
+  function chosen(model, options) {
+    return model.config.option_groups.map((group, i) => group.options[options[i]]);
+  }
+
+  function combine(choices, attribute) {
+    let combined = 1;
+    for (const option of choices) {
+      combined *= option[attribute];
+    }
+    return combined;
+  }
+
+  function startRun(model, firstOptions) {
+    let setup = 0;
+    for (const option of chosen(model, firstOptions)) {
+      setup += option.setup_cost;
+    }
+    const cash = model.config.starting_cash - setup;
+    return {
+      cash,
+      stock: model.products.map(() => 0),
+      reputation: model.reputation.initial,
+      active: cash >= 0,
+      totalProfit: cash - model.config.starting_cash,
+      itemsSold: 0,
+      daysPlayed: 0,
+    };
+  }
+
+  function conditionFor(model, seed, day) {
+    const draw = uniform(seed, day, CONDITION_STREAM);
+    let index = 0;
+    while (!(model.conditionCdf[index] > draw)) {
+      index += 1;
+    }
+    return index;
+  }
+
+  function qualityBand(model, quality) {
+    const index = model.config.quality_bands.findIndex(
+      (band) => quality >= band.low && quality <= band.high
+    );
+    return index === -1 ? null : model.config.quality_bands[index];
+  }
+
+  // Play one day of a run in place. Returns the day's report.
+  function playDay(model, run, seed, day, decision) {
+    const config = model.config;
+    const rep = model.reputation;
+    const active = run.active ? 1 : 0;
+    const choices = chosen(model, decision.options);
+    const condition = config.conditions[conditionFor(model, seed, day)];
+    const [low, high] = config.customers;
+    const customers = low + uniform(seed, day, CUSTOMER_STREAM) * (high - low);
+
+    const costFactor = combine(choices, "cost_factor");
+    let optionOverhead = 0;
+    for (const option of choices) {
+      optionOverhead += option.daily_cost;
+    }
+    const overhead = config.fixed_daily_cost + optionOverhead;
+
+    let buy = decision.purchases.map((units, i) => Math.max(Math.floor(units), 0) * (model.stocked[i] ? 1 : 0));
+    let goodsCost = rowSum(buy.map((units, i) => units * model.unitCost[i])) * costFactor;
+    const budget = Math.max(run.cash - overhead, 0);
+    const scale = goodsCost > budget ? budget / Math.max(goodsCost, 1e-9) : 1;
+    buy = buy.map((units) => Math.floor(units * scale) * active);
+    goodsCost = rowSum(buy.map((units, i) => units * model.unitCost[i])) * costFactor;
+    run.stock = run.stock.map((units, i) => units + buy[i]);
+
+    const band = qualityBand(model, decision.quality);
+    const ratio = decision.prices.map((price, i) => price / model.basePrice[i]);
+    const priceDemand = ratio.map((value) => {
+      const index = model.priceLimits.findIndex((limit) => limit >= value);
+      return model.priceDemand[index === -1 ? model.priceLimits.length : index];
+    });
+    const appeal =
+      condition.demand *
+      combine(choices, "demand") *
+      (band ? band.demand : 1) *
+      Math.max(1 + rep.demand_elasticity * (run.reputation / rep.initial - 1), 0);
+
+    const capacity = config.capacity * combine(choices, "capacity");
+    const sold = model.products.map((product, i) => {
+      const demand =
+        (customers * model.weights[i] + config.stock_sell_rate * run.stock[i] * model.weights[i]) *
+        (appeal * priceDemand[i]);
+      const available = model.stocked[i] ? run.stock[i] : capacity * model.serviceShare[i];
+      return Math.floor(Math.min(demand, available)) * active;
+    });
+
+    const priceFactor = combine(choices, "price_factor");
+    const revenue = rowSum(sold.map((units, i) => units * decision.prices[i])) * priceFactor;
+    const serviceCost =
+      rowSum(sold.map((units, i) => units * model.unitCost[i] * (model.stocked[i] ? 0 : 1))) * costFactor;
+    const expenses = (goodsCost + serviceCost + overhead) * active;
+
+    run.stock = run.stock.map((units, i) =>
+      Math.floor((units - sold[i] * (model.stocked[i] ? 1 : 0)) * (1 - config.spoilage))
+    );
+    const profit = revenue - expenses;
+    run.cash += profit;
+    run.totalProfit += profit;
+    const daySold = rowSum(sold);
+    run.itemsSold += daySold;
+    run.daysPlayed += active;
+
+    let delta = band ? band.reputation : 0;
+    const maxRatio = Math.max(...ratio);
+    if (delta > 0 && maxRatio > rep.fair_price_ratio) {
+      delta = 0;
+    }
+    if (maxRatio > rep.gouge_price_ratio) {
+      delta = Math.min(delta, -rep.step);
+    }
+    delta += daySold >= rep.good_sales ? rep.sales_step : 0;
+    delta -= daySold < rep.poor_sales ? rep.sales_step : 0;
+    if (run.active) {
+      run.reputation = Math.min(Math.max(run.reputation + delta, rep.minimum), rep.maximum);
+    }
+    run.active = run.active && run.cash >= 0;
+
+    return { condition, sold, revenue, expenses, profit };
+  }
+
+  function finalResults(model, run) {
+    const rep = model.reputation;
+    const finalReputation = rint(run.reputation * 10) / 10;
+    const profitPart = Math.min(Math.max(run.totalProfit / model.config.target_profit, 0), 1);
+    const reputationPart = (finalReputation - rep.minimum) / (rep.maximum - rep.minimum);
+    return {
+      totalProfit: run.totalProfit,
+      itemsSold: run.itemsSold,
+      finalReputation,
+      daysPlayed: run.daysPlayed,
+      bankrupt: run.cash < 0,
+      score: rint(70 * profitPart + 30 * reputationPart),
+    };
+  }
+
+  // --- Interface ---
+
+  const money = new Intl.NumberFormat("ar", { style: "currency", currency: "USD" });
+
+  function label(model, name) {
+    return (model.config.labels && model.config.labels[name]) || name.replace(/_/g, " ");
+  }
+
+  function element(tag, attributes, ...children) {
+    const node = document.createElement(tag);
+    for (const [key, value] of Object.entries(attributes || {})) {
+      if (key === "class") {
+        node.className = value;
+      } else {
+        node.setAttribute(key, value);
+      }
+    }
+    node.append(...children.filter((child) => child !== null && child !== undefined));
+    return node;
+  }
+
+  function csrfToken() {
+    const match = document.cookie.match(/(?:^|;\s*)csrftoken=([^;]+)/);
+    return match ? decodeURIComponent(match[1]) : "";
+  }
+
+  class Game {
+    constructor(model) {
+      this.model = model;
+      this.seed = null;
+      this.log = [];
+      this.run = null;
+      this.lastReport = null;
+      this.notice = null;
+      this.board = element("section", { class: "game-board" });
+      root.append(this.board);
+    }
+
+    get day() {
+      return this.log.length;
+    }
+
+    get finished() {
+      return this.run && (this.day >= this.model.config.days || !this.run.active);
+    }
+
+    newGame() {
+      this.seed = null;
+      this.log = [];
+      this.run = null;
+      this.lastReport = null;
+      this.notice = null;
+      this.render();
+    }
+
+    start() {
+      const seed = events ? events.startGame() : Promise.resolve(newSeed());
+      return seed
+        .then((value) => {
+          this.seed = value;
+          this.notice = null;
+        })
+        .catch(() => {
+          this.notice = "تعذر بدء اللعبة، يرجى إعادة المحاولة.";
+        })
+        .finally(() => this.render());
+    }
+
+    restore(state) {
+      this.seed = state.seed;
+      const days = Object.keys(state.days || {})
+        .map(Number)
+        .sort((a, b) => a - b);
+      this.log = [];
+      this.run = null;
+      for (const day of days) {
+        this.lastReport = this.apply(state.days[day]);
+      }
+      this.render();
+    }
+
+    // Another tab saved newer progress. If it is this game at an earlier
+    // day, send the days it is missing; if it is this game further on, or a
+    // different game, continue from the saved state and tell the player.
+    resolveConflict() {
+      return events.loadState().then((state) => {
+        const saved = state && state.seed !== undefined && state.seed !== null ? state : null;
+        const savedDays = saved ? Object.keys(saved.days || {}).length : 0;
+        const shared = Math.min(savedDays, this.day);
+        let sameGame = saved !== null && saved.seed === this.seed;
+        for (let day = 0; sameGame && day < shared; day++) {
+          sameGame = sameDecision(saved.days[day], this.log[day]);
+        }
+
+        if (sameGame && savedDays <= this.day) {
+          if (savedDays < this.day) {
+            const days = {};
+            for (let day = savedDays; day < this.day; day++) {
+              days[day] = this.log[day];
+            }
+            events.saveState({ days });
+          }
+          return;
+        }
+        if (saved) {
+          this.restore(saved);
+        } else {
+          this.newGame();
+        }
+        this.notice = "تم حفظ تقدم أحدث في نافذة أخرى، فتابعنا من هناك.";
+        this.render();
+      });
+    }
+
+    apply(decision) {
+      if (this.run === null) {
+        this.run = startRun(this.model, decision.options);
+      }
+      const report = playDay(this.model, this.run, this.seed, this.day, decision);
+      this.log.push(decision);
+      return report;
+    }
+
+    playDay(decision) {
+      const day = this.day;
+      this.notice = null;
+      this.lastReport = this.apply(decision);
+      if (events) {
+        const delta = { days: { [day]: decision } };
+        if (day === 0) {
+          delta.seed = this.seed;
+        }
+        events.saveState(delta);
+      }
+      this.render();
+    }
+
+    actionLog(score) {
+      return {
+        seed: this.seed,
+        purchases: this.log.map((decision) => decision.purchases),
+        prices: this.log.map((decision) => decision.prices),
+        quality: this.log.map((decision) => decision.quality),
+        options: this.log.map((decision) => decision.options),
+        score,
+      };
+    }
+
+    render() {
+      const parts = [
+        this.notice ? element("p", { class: "game-notice" }, this.notice) : null,
+        this.renderStatus(),
+        this.renderReport(),
+        this.seed === null ? this.renderStart() : this.finished ? this.renderEnd() : this.renderDay(),
+      ];
+      this.board.replaceChildren(...parts.filter((part) => part !== null));
+    }
+
+    renderStatus() {
+      const config = this.model.config;
+      const run = this.run || startRun(this.model, config.option_groups.map(() => 0));
+      return element(
+        "div",
+        { class: "game-status" },
+        element("span", {}, `اليوم ${Math.min(this.day + 1, config.days)} من ${config.days}`),
+        element("span", {}, `النقود: ${money.format(run.cash)}`),
+        element("span", {}, `السمعة: ${run.reputation.toFixed(1)}`),
+        element("span", {}, `الربح: ${money.format(run.totalProfit)}`)
+      );
+    }
+
+    renderStart() {
+      const button = element("button", { type: "button", class: "btn" }, "ابدأ اللعبة");
+      button.addEventListener("click", () => {
+        button.disabled = true;
+        this.start();
+      });
+      return element("div", { class: "game-start" }, button);
+    }
+
+    renderReport() {
+      const report = this.lastReport;
+      if (!report) {
+        return null;
+      }
+      const sold = report.sold
+        .map((units, i) => (units ? `${label(this.model, this.model.products[i].name)}: ${units}` : null))
+        .filter(Boolean)
+        .join("، ");
+      return element(
+        "div",
+        { class: "game-report" },
+        element("h2", {}, `نتيجة اليوم ${this.day}: ${label(this.model, report.condition.name)}`),
+        element("p", {}, `المبيعات: ${sold || "لا شيء"}`),
+        element(
+          "p",
+          {},
+          `الإيرادات ${money.format(report.revenue)} - المصاريف ${money.format(report.expenses)} = `,
+          element("strong", { class: report.profit >= 0 ? "gain" : "loss" }, money.format(report.profit))
+        )
+      );
+    }
+
+    renderDay() {
+      const model = this.model;
+      const config = model.config;
+      const previous = this.log[this.log.length - 1];
+      const condition = config.conditions[conditionFor(model, this.seed, this.day)];
+      const form = element("form", { class: "game-day" });
+      form.append(element("h2", {}, `حدث اليوم: ${label(model, condition.name)}`));
+
+      const rows = model.products.map((product, i) => {
+        const purchase = product.stocked
+          ? element("input", {
+              type: "number",
+              name: `buy-${i}`,
+              min: 0,
+              max: 10000,
+              step: 1,
+              value: previous ? previous.purchases[i] : 0,
+            })
+          : null;
+        const price = element("input", {
+          type: "number",
+          name: `price-${i}`,
+          min: 0.01,
+          max: product.base_price * 10,
+          step: 0.01,
+          value: previous ? previous.prices[i] : product.base_price,
+          required: "",
+        });
+        return element(
+          "tr",
+          {},
+          element("th", {}, label(model, product.name)),
+          element("td", {}, product.stocked ? money.format(product.unit_cost) : "-"),
+          element("td", {}, product.stocked ? `${this.run ? this.run.stock[i] : 0}` : "-"),
+          element("td", {}, purchase),
+          element("td", {}, price)
+        );
+      });
+      form.append(
+        element(
+          "table",
+          { class: "game-products" },
+          element(
+            "thead",
+            {},
+            element(
+              "tr",
+              {},
+              ...["المنتج", "التكلفة", "المخزون", "شراء", "السعر"].map((title) => element("th", {}, title))
+            )
+          ),
+          element("tbody", {}, ...rows)
+        )
+      );
+
+      config.option_groups.forEach((group, g) => {
+        const locked = this.day > 0 && group.options.some((option) => option.setup_cost);
+        const select = element("select", { name: `option-${g}` });
+        group.options.forEach((option, o) => {
+          const costs = [];
+          if (option.setup_cost) {
+            costs.push(`${money.format(option.setup_cost)} مرة واحدة`);
+          }
+          if (option.daily_cost) {
+            costs.push(`${money.format(option.daily_cost)} يومياً`);
+          }
+          const text = label(model, option.name) + (costs.length ? ` (${costs.join("، ")})` : "");
+          select.append(element("option", { value: o }, text));
+        });
+        select.value = previous ? previous.options[g] : 0;
+        select.disabled = locked;
+        form.append(element("label", { class: "game-option" }, label(model, group.name), select));
+      });
+
+      if (config.quality_bands.length > 1) {
+        form.append(
+          element(
+            "label",
+            { class: "game-option" },
+            "الجودة",
+            element("input", {
+              type: "range",
+              name: "quality",
+              min: 0,
+              max: 100,
+              value: previous ? Math.round(previous.quality * 100) : 50,
+            })
+          )
+        );
+      }
+
+      form.append(element("button", { type: "submit", class: "btn" }, "ابدأ اليوم"));
+      form.addEventListener("submit", (event) => {
+        event.preventDefault();
+        const data = new FormData(form);
+        const number = (name, fallback) => {
+          const value = Number(data.get(name));
+          return Number.isFinite(value) ? value : fallback;
+        };
+        this.playDay({
+          purchases: model.products.map((product, i) =>
+            product.stocked ? Math.min(Math.max(Math.floor(number(`buy-${i}`, 0)), 0), 10000) : 0
+          ),
+          prices: model.products.map((product, i) =>
+            Math.min(Math.max(number(`price-${i}`, product.base_price), 0.01), product.base_price * 10)
+          ),
+          quality: config.quality_bands.length > 1 ? number("quality", 50) / 100 : 0.5,
+          options: config.option_groups.map((group, g) =>
+            // Disabled selects aren't submitted; keep the first day's choice
+            this.day > 0 && form.elements[`option-${g}`].disabled
+              ? this.log[0].options[g]
+              : number(`option-${g}`, 0)
+          ),
+        });
+      });
+      return form;
+    }
+
+    renderEnd() {
+      const results = finalResults(this.model, this.run);
+      const end = element(
+        "div",
+        { class: "game-end" },
+        element("h2", {}, results.bankrupt ? "نفدت النقود!" : "انتهت اللعبة!"),
+        element("p", {}, `الربح الكلي: ${money.format(results.totalProfit)}`),
+        element("p", {}, `المبيعات: ${results.itemsSold}`),
+        element("p", {}, `السمعة: ${results.finalReputation}`),
+        element("p", { class: "game-score" }, `النتيجة: ${results.score} / 100`)
+      );
+
+      if (root.dataset.authenticated === "1") {
+        const form = element(
+          "form",
+          { method: "post", action: root.dataset.completeUrl },
+          element("input", { type: "hidden", name: "csrfmiddlewaretoken", value: csrfToken() }),
+          element("input", {
+            type: "hidden",
+            name: "action_log",
+            value: JSON.stringify(this.actionLog(results.score)),
+          }),
+          element("button", { type: "submit", class: "btn" }, "احفظ نتيجتي")
+        );
+        form.addEventListener("submit", (event) => {
+          event.preventDefault();
+          // Clear the saved game so the next visit starts a new one
+          const cleared = events ? events.saveState({ seed: null, days: null }) : Promise.resolve();
+          cleared.finally(() => form.submit());
+        });
+        end.append(form);
+      } else {
+        end.append(element("a", { class: "btn", href: root.dataset.loginUrl }, "سجّل الدخول لحفظ نتيجتك"));
+      }
+      const again = element("button", { type: "button", class: "btn btn-secondary" }, "العب مرة أخرى");
+      again.addEventListener("click", () => {
+        if (events) {
+          events.saveState({ seed: null, days: null });
+        }
+        this.newGame();
+        this.start();
+      });
+      end.append(again);
+      return end;
+    }
+  }
+
+  window.BizVentureRuntime = { prepare, startRun, playDay, finalResults };
+  if (!root) {
+    return;
+  }
+
+  fetch(root.dataset.configUrl)
+    .then((response) => response.json())
+    .then((config) => {
+      const game = new Game(prepare(config));
+      if (events) {
+        // Saving stays paused until the conflict is resolved
+        let resolving = Promise.resolve();
+        document.addEventListener("bizventure:state-conflict", () => {
+          resolving = resolving.then(() => game.resolveConflict()).catch(() => {
+            game.notice = "تعذر حفظ تقدمك، يرجى إعادة تحميل الصفحة.";
+            game.render();
+          });
+        });
+      }
+      const saved = events ? events.loadState().catch(() => null) : Promise.resolve(null);
+      return saved.then((state) => {
+        if (state && state.seed !== undefined && state.seed !== null) {
+          game.restore(state);
+        } else {
+          game.newGame();
+        }
+      });
+    })
+    .catch(() => {
+      root.append(element("p", { class: "game-error" }, "تعذر تحميل اللعبة، يرجى إعادة تحميل الصفحة."));
+    });
+})();